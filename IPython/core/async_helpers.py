@@ -137,6 +137,76 @@ def _async_parse_cell(cell: str) -> ast.AST:
         return ast.parse(cell)
 
 
+# Since Python 3.12 (PEP 709), list, set and dict comprehensions run in the
+# scope which contains them, rather than in a function of their own.
+_inlined_comprehensions = sys.version_info >= (3, 12)
+
+
+def _has_top_level_await(tree: ast.AST) -> bool:
+    """Detect if a parsed block of code awaits outside of any function, and
+    needs to run as a coroutine.
+
+    This gives the same answer as compiling it with
+    ``PyCF_ALLOW_TOP_LEVEL_AWAIT`` and checking the ``CO_COROUTINE`` flag of
+    the result, without compiling it.
+    """
+    return _awaits(tree, True)
+
+
+def _awaits(node: ast.AST, top_level: bool) -> bool:
+    """Whether evaluating `node` awaits in the scope it appears in.
+
+    `top_level` tells if that scope is the module itself, where an
+    asynchronous generator expression also makes the code a coroutine.
+    """
+    if isinstance(node, (ast.Await, ast.AsyncFor, ast.AsyncWith)):
+        return True
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+        # Only the parts evaluated when the function is defined
+        args = node.args
+        evaluated = [*args.defaults, *(d for d in args.kw_defaults if d is not None)]
+        if not isinstance(node, ast.Lambda):
+            evaluated.extend(node.decorator_list)
+            all_args = [*getattr(args, 'posonlyargs', ()), *args.args,
+                        *args.kwonlyargs, args.vararg, args.kwarg]
+            evaluated.extend(a.annotation for a in all_args
+                             if a is not None and a.annotation is not None)
+            if node.returns is not None:
+                evaluated.append(node.returns)
+        return any(_awaits(n, top_level) for n in evaluated)
+    if isinstance(node, ast.ClassDef):
+        return any(_awaits(n, top_level)
+                   for n in (*node.decorator_list, *node.bases, *node.keywords))
+    if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        # The first iterable is evaluated in the enclosing scope
+        first, *others = node.generators
+        if _awaits(first.iter, top_level):
+            return True
+        if isinstance(node, ast.GeneratorExp):
+            # An asynchronous generator is created, not awaited
+            return top_level and _comprehension_is_async(node, False)
+        return _comprehension_is_async(
+            node, top_level and _inlined_comprehensions)
+    return any(_awaits(child, top_level) for child in ast.iter_child_nodes(node))
+
+
+def _comprehension_is_async(node, top_level: bool) -> bool:
+    """Whether a comprehension is asynchronous, apart from its first iterable.
+
+    `top_level` tells if it runs in the module scope.
+    """
+    first, *others = node.generators
+    parts = [*first.ifs]
+    for generator in others:
+        parts.extend((generator.target, generator.iter, *generator.ifs))
+    if isinstance(node, ast.DictComp):
+        parts.extend((node.key, node.value))
+    else:
+        parts.append(node.elt)
+    return (any(generator.is_async for generator in node.generators)
+            or any(_awaits(part, top_level) for part in parts))
+
+
 def _should_be_async(cell: str) -> bool:
     """Detect if a block of code need to be wrapped in an `async def`
 
@@ -35,6 +35,8 @@
 import linecache
 import operator
 import time
+import types
+from collections import OrderedDict
 from contextlib import contextmanager
 
 #-----------------------------------------------------------------------------
@@ -62,6 +64,17 @@ def code_name(code, number=0):
     # even with truncated hashes, and the full one makes tracebacks too long
     return '<ipython-input-{0}-{1}>'.format(number, hash_digest[:12])
 
+
+def code_with_filename(code, filename):
+    """Return a copy of a code object, and of the code objects it contains,
+    attributed to another file."""
+    if code.co_filename == filename:
+        return code
+    consts = tuple(code_with_filename(c, filename)
+                   if isinstance(c, types.CodeType) else c
+                   for c in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
 #-----------------------------------------------------------------------------
 # Classes and functions
 #-----------------------------------------------------------------------------
@@ -92,6 +105,11 @@ def __init__(self):
         # (otherwise we'd lose our tracebacks).
         linecache.checkcache = check_linecache_ipython
 
+        # LRU cache of the results of transforming and compiling cells, see
+        # cache_cell. 0 disables it.
+        self.cell_cache_size = 128
+        self._cell_cache = OrderedDict()
+
 
     def ast_parse(self, source, filename='<unknown>', symbol='exec'):
         """Parse code to an AST with the current compiler flags active.
@@ -135,6 +153,40 @@ def cache(self, code, number=0):
         linecache._ipython_cache[name] = entry
         return name
 
+    def cell_key(self, source, *extra):
+        """Key of the compilation of `source` with the current compiler flags,
+        and any extra parameters it depends on, for :meth:`cache_cell`."""
+        digest = hashlib.sha1(source.encode("utf-8")).digest()
+        return (digest, len(source), self.flags) + extra
+
+    def get_cached_cell(self, key):
+        """Return the value cached for `key` by :meth:`cache_cell`, or None."""
+        try:
+            value = self._cell_cache[key]
+        except (KeyError, TypeError):
+            # TypeError: unhashable parameters, never cached
+            return None
+        self._cell_cache.move_to_end(key)
+        return value
+
+    def cache_cell(self, key, value):
+        """Remember a value derived from a cell, such as its transformed
+        source or its code objects, under a key built by :meth:`cell_key`.
+
+        The least recently used entries are dropped beyond
+        ``cell_cache_size`` entries.
+        """
+        if self.cell_cache_size <= 0:
+            return
+        try:
+            self._cell_cache[key] = value
+        except TypeError:
+            # Unhashable parameters, e.g. a transformer defining __eq__ only
+            return
+        self._cell_cache.move_to_end(key)
+        while len(self._cell_cache) > self.cell_cache_size:
+            self._cell_cache.popitem(last=False)
+
     @contextmanager
     def extra_flags(self, flags):
         ## bits that we'll set to 1
@@ -110,7 +110,9 @@
 # Copyright (C) 2001 Python Software Foundation, www.python.org
 
 
+import bisect
 import builtins as builtin_mod
+import functools
 import glob
 import inspect
 import itertools
@@ -119,10 +121,12 @@
 import re
 import string
 import sys
+import threading
 import time
 import unicodedata
 import uuid
 import warnings
+from collections import deque
 from contextlib import contextmanager
 from importlib import import_module
 from types import SimpleNamespace
@@ -176,6 +180,10 @@
 # may have trouble processing.
 MATCHES_LIMIT = 500
 
+# Origins of the completions which only keep the candidates starting with the
+# completed word, and can thus be narrowed down as the word grows.
+_PREFIX_FILTERED_ORIGINS = frozenset({'jedi', 'IPCompleter.python_matches'})
+
 _deprecation_readline_sentinel = object()
 
 
@@ -190,6 +198,22 @@ class ProvisionalCompleterWarning(FutureWarning):
 
 warnings.filterwarnings('error', category=ProvisionalCompleterWarning)
 
+
+class CompletionCancelled(Exception):
+    """
+    Raised from within the completer when the request was cancelled, see
+    the ``cancel_check`` argument of :any:`IPCompleter.completions`.
+    """
+    pass
+
+
+def _check_cancelled(cancel_check):
+    """Raise :any:`CompletionCancelled` if ``cancel_check`` says the request
+    is not wanted anymore."""
+    if cancel_check is not None and cancel_check():
+        raise CompletionCancelled()
+
+
 @contextmanager
 def provisionalcompleter(action='ignore'):
     """
@@ -674,11 +698,10 @@ def global_matches(self, text):
                 if word[:n] == text and word != "__builtins__":
                     match_append(word)
 
-        snake_case_re = re.compile(r"[^_]+(_[^_]+)+?\Z")
         for lst in [self.namespace.keys(),
                     self.global_namespace.keys()]:
-            shortened = {"_".join([sub[0] for sub in word.split('_')]) : word
-                         for word in lst if snake_case_re.match(word)}
+            shortened = {_snake_case_abbreviation(word) : word
+                         for word in lst if _snake_case_re.match(word)}
             for word in shortened.keys():
                 if word[:n] == text and word != "__builtins__":
                     match_append(shortened[word])
@@ -843,6 +866,20 @@ def _add_to_filtered_keys(key):
     return quote, token_start, matched
 
 
+_snake_case_re = re.compile(r"[^_]+(_[^_]+)+?\Z")
+
+
+def _snake_case_abbreviation(word:str) -> Optional[str]:
+    """Abbreviation under which :any:`Completer.global_matches` also completes
+    a snake case name, e.g. ``s_c_n`` for ``snake_case_name``.
+
+    Returns None if ``word`` is not in snake case.
+    """
+    if not _snake_case_re.match(word):
+        return None
+    return "_".join([sub[0] for sub in word.split('_')])
+
+
 def cursor_to_position(text:str, line:int, column:int)->int:
     """
     Convert the (line,column) position of the cursor in text to an offset in a
@@ -1029,6 +1066,17 @@ def _make_signature(completion)-> str:
                                           for p in signature.defined_names()) if f])
 
 
+class MatcherTiming(NamedTuple):
+    """Time taken by one call to a matcher, see :any:`IPCompleter.matcher_timings`."""
+    matcher: str
+    seconds: float
+    matches: int
+
+
+def _matcher_name(matcher) -> str:
+    return getattr(matcher, '__qualname__', None) or repr(matcher)
+
+
 class _CompleteResult(NamedTuple):
     matched_text : str
     matches: Sequence[str]
@@ -1085,6 +1133,38 @@ def _greedy_changed(self, change):
         """,
     ).tag(config=True)
 
+    cache_completions = Bool(True,
+        help="""Reuse the previous completions while the word being completed
+        only grows.
+
+        When the cursor only moved forward over newly typed identifier
+        characters, the previous candidates are filtered instead of running
+        every matcher and Jedi again. The cache is cleared after each
+        execution, since the user namespace may have changed.
+        """
+    ).tag(config=True)
+
+    matcher_timings_size = Int(1000,
+        help="""Number of matcher calls kept in ``IPCompleter.matcher_timings``,
+        and summarized by ``%completion_profile``."""
+    ).tag(config=True)
+
+    disabled_matchers = ListTrait(Unicode(),
+        help="""Names of the matchers to skip, e.g. ``['file_matches']``.
+
+        Matchers are named as in ``%completion_profile``; ``jedi`` and
+        ``custom`` stand for Jedi and for the custom completers of
+        ``complete_command`` hooks.
+        """
+    ).tag(config=True)
+
+    matcher_order = ListTrait(Unicode(),
+        help="""Names of matchers to run first, in this order. The other
+        matchers follow in their default order. This matters when
+        ``merge_completions`` is False, as the first matcher finding something
+        wins."""
+    ).tag(config=True)
+
     profile_completions = Bool(
         default_value=False,
         help="If True, emit profiling data for completion subsystem using cProfile."
@@ -1095,6 +1175,18 @@ def _greedy_changed(self, change):
         help="Template for path at which to output profile data for completions."
     ).tag(config=True)
 
+    @observe('greedy', 'use_jedi', 'dict_keys_only', 'merge_completions',
+             'omit__names', 'backslash_combining_completions',
+             'cache_completions', 'disabled_matchers', 'matcher_order')
+    def _completion_settings_changed(self, change):
+        self.clear_completion_cache()
+
+    @observe('matcher_timings_size')
+    def _matcher_timings_size_changed(self, change):
+        # Also called while the config is loaded, before __init__ made the deque
+        self.matcher_timings = deque(getattr(self, 'matcher_timings', ()),
+                                     maxlen=change['new'])
+
     @observe('limit_to__all__')
     def _limit_to_all_changed(self, change):
         warnings.warn('`IPython.core.IPCompleter.limit_to__all__` configuration '
@@ -1168,11 +1260,24 @@ def __init__(self, shell=None, namespace=None, global_namespace=None,
         # This is set externally by InteractiveShell
         self.custom_completers = None
 
+        # (full_text, offset, namespaces, completions) of the last request,
+        # see _cached_completions
+        self._completion_cache = None
+
+        # The latest MatcherTiming records, oldest first
+        self.matcher_timings = deque(maxlen=self.matcher_timings_size)
+
+        # Held while a request uses the state of the completer (line_buffer,
+        # text_until_cursor, matches, the completion cache, Jedi), so that
+        # requests made from several threads do not mix up their states.
+        self._lock = threading.RLock()
+
         # This is a list of names of unicode characters that can be completed
         # into their corresponding unicode value. The list is large, so we
         # laziliy initialize it on first use. Consuming code should access this
         # attribute through the `@unicode_names` property.
         self._unicode_names = None
+        self._unicode_names_prefix_index = None
 
     @property
     def matchers(self) -> List[Any]:
@@ -1181,14 +1286,14 @@ def matchers(self) -> List[Any]:
             return [self.dict_key_matches]
 
         if self.use_jedi:
-            return [
+            matchers = [
                 *self.custom_matchers,
                 self.file_matches,
                 self.magic_matches,
                 self.dict_key_matches,
             ]
         else:
-            return [
+            matchers = [
                 *self.custom_matchers,
                 self.python_matches,
                 self.file_matches,
@@ -1196,6 +1301,30 @@ def matchers(self) -> List[Any]:
                 self.python_func_kw_matches,
                 self.dict_key_matches,
             ]
+        if self.disabled_matchers:
+            matchers = [m for m in matchers if self._matcher_enabled(_matcher_name(m))]
+        if self.matcher_order:
+            def rank(matcher):
+                name = _matcher_name(matcher)
+                for i, wanted in enumerate(self.matcher_order):
+                    if self._matcher_named(name, wanted):
+                        return i
+                return len(self.matcher_order)
+            matchers.sort(key=rank)
+        return matchers
+
+    @staticmethod
+    def _matcher_named(name:str, wanted:str) -> bool:
+        """Whether ``wanted`` designates the matcher called ``name``; the
+        class name in front of method matchers can be left out."""
+        return wanted == name or wanted == name.rsplit('.', 1)[-1]
+
+    def _matcher_enabled(self, name:str) -> bool:
+        return not any(self._matcher_named(name, n) for n in self.disabled_matchers)
+
+    def _record_timing(self, name:str, start:float, matches:int):
+        self.matcher_timings.append(
+            MatcherTiming(name, time.perf_counter() - start, matches))
 
     def all_completions(self, text:str) -> List[str]:
         """
@@ -1780,7 +1909,7 @@ def latex_matches(self, text:str) -> Tuple[str, Sequence[str]]:
             else:
                 # If a user has partially typed a latex symbol, give them
                 # a full list of options \al -> [\aleph, \alpha]
-                matches = [k for k in latex_symbols if k.startswith(s)]
+                matches = _latex_symbols_index().matches(s)
                 if matches:
                     return s, matches
         return '', ()
@@ -1833,7 +1962,8 @@ def dispatch_custom_completer(self, text):
 
         return None
 
-    def completions(self, text: str, offset: int)->Iterator[Completion]:
+    def completions(self, text: str, offset: int, *,
+                    cancel_check=None)->Iterator[Completion]:
         """
         Returns an iterator over the possible completions
 
@@ -1849,6 +1979,11 @@ def completions(self, text: str, offset: int)->Iterator[Completion]:
         offset:int
             Integer representing the position of the cursor in ``text``. Offset
             is 0-based indexed.
+        cancel_check:callable, optional
+            Called without arguments between matchers; if it returns True, the
+            request is abandoned by raising :any:`CompletionCancelled`. For
+            frontends completing in a background thread, to drop requests
+            whose input changed.
 
         Yields
         ------
@@ -1892,7 +2027,23 @@ def completions(self, text: str, offset: int)->Iterator[Completion]:
             else:
                 profiler = None
 
-            for c in self._completions(text, offset, _timeout=self.jedi_compute_type_timeout/1000):
+            completions: Iterable[Completion]
+            if self.cache_completions:
+                with self._lock:
+                    cached = self._cached_completions(text, offset)
+                if cached is None:
+                    cached = list(self._completions(
+                        text, offset, _timeout=self.jedi_compute_type_timeout/1000,
+                        cancel_check=cancel_check))
+                    with self._lock:
+                        self._store_completions(text, offset, cached)
+                completions = cached
+            else:
+                completions = self._completions(
+                    text, offset, _timeout=self.jedi_compute_type_timeout/1000,
+                    cancel_check=cancel_check)
+
+            for c in completions:
                 if c and (c in seen):
                     continue
                 yield c
@@ -1909,7 +2060,85 @@ def completions(self, text: str, offset: int)->Iterator[Completion]:
                 print("Writing profiler output to", output_path)
                 profiler.dump_stats(output_path)
 
-    def _completions(self, full_text: str, offset: int, *, _timeout) -> Iterator[Completion]:
+    def clear_completion_cache(self):
+        """Forget the completions kept for incremental completion.
+
+        Called after each execution, as the user namespace may have changed.
+        """
+        self._completion_cache = None
+
+    def _completion_namespaces(self):
+        return (id(getattr(self, 'namespace', None)), id(self.global_namespace))
+
+    def _store_completions(self, full_text: str, offset: int, completions: List[Completion]):
+        """Keep ``completions`` for :meth:`_cached_completions`.
+
+        Nothing is kept if IPython's own matches may have been truncated to
+        ``MATCHES_LIMIT``, as filtering them would then miss candidates, nor
+        when the result depends on which matchers produced something
+        (``merge_completions`` disabled), nor when some completions come from
+        matchers which do not simply filter by prefix (magics, LaTeX and
+        unicode names, custom completers...).
+        """
+        if (not self.merge_completions
+                or not self._prefix_filtered_context(full_text, offset)
+                or any(c._origin not in _PREFIX_FILTERED_ORIGINS for c in completions)
+                or sum(c._origin != 'jedi' for c in completions) >= MATCHES_LIMIT):
+            self._completion_cache = None
+        else:
+            self._completion_cache = (full_text, offset,
+                                      self._completion_namespaces(), completions)
+
+    @staticmethod
+    def _prefix_filtered_context(full_text: str, offset: int) -> bool:
+        """Whether completing at ``offset`` may only involve matchers that
+        filter by prefix, i.e. the cursor is neither after a backslash
+        (LaTeX and unicode names) nor on a magic's line."""
+        line = full_text[:offset].rpartition('\n')[2]
+        return '\\' not in line and not line.lstrip().startswith(('%', '!'))
+
+    def _cached_completions(self, full_text: str, offset: int) -> Optional[List[Completion]]:
+        """Narrow down the previous completions, if possible.
+
+        This is possible when the only change since the previous request is
+        that identifier characters were typed at the cursor: the matchers kept
+        complete a prefix, so the new candidates are the previous ones which
+        still agree with what was typed (see :meth:`_store_completions` for
+        which completions are kept). Returns None when the completions must be
+        computed again.
+        """
+        if self._completion_cache is None:
+            return None
+        old_text, old_offset, namespaces, completions = self._completion_cache
+        if (offset <= old_offset
+                or not self._prefix_filtered_context(full_text, offset)
+                or namespaces != self._completion_namespaces()
+                or full_text[:old_offset] != old_text[:old_offset]
+                or full_text[offset:] != old_text[old_offset:]):
+            return None
+        typed = full_text[old_offset:offset]
+        if not all(c.isalnum() or c == '_' for c in typed):
+            return None
+        # Names starting with an underscore may have been hidden
+        # (``omit__names``) when completing on an empty word.
+        before = old_text[:old_offset]
+        if typed.startswith('_') and not (before[-1:].isalnum() or before.endswith('_')):
+            return None
+
+        narrowed = []
+        for c in completions:
+            word = full_text[c.start:offset]
+            if c.text.startswith(word) or (
+                    c._origin.endswith('python_matches')
+                    and (_snake_case_abbreviation(c.text) or '').startswith(word)):
+                narrowed.append(Completion(start=c.start, end=offset, text=c.text,
+                                           type=c.type, _origin=c._origin,
+                                           signature=c.signature))
+        self._completion_cache = (full_text, offset, namespaces, narrowed)
+        return narrowed
+
+    def _completions(self, full_text: str, offset: int, *, _timeout,
+                     cancel_check=None) -> Iterator[Completion]:
         """
         Core completion module.Same signature as :any:`completions`, with the
         extra `timeout` parameter (in seconds).
@@ -1942,22 +2171,29 @@ def _completions(self, full_text: str, offset: int, *, _timeout) -> Iterator[Com
         cursor_line, cursor_column = position_to_cursor(full_text, offset)
 
         matched_text, matches, matches_origin, jedi_matches = self._complete(
-            full_text=full_text, cursor_line=cursor_line, cursor_pos=cursor_column)
+            full_text=full_text, cursor_line=cursor_line, cursor_pos=cursor_column,
+            cancel_check=cancel_check)
 
         iter_jm = iter(jedi_matches)
         if _timeout:
+            start = time.perf_counter()
+            typed = 0
             for jm in iter_jm:
-                try:
-                    type_ = jm.type
-                except Exception:
-                    if self.debug:
-                        print("Error in Jedi getting type of ", jm)
-                    type_ = None
+                _check_cancelled(cancel_check)
+                typed += 1
+                # Jedi is not thread safe; the lock is not held while yielding
+                with self._lock:
+                    try:
+                        type_ = jm.type
+                    except Exception:
+                        if self.debug:
+                            print("Error in Jedi getting type of ", jm)
+                        type_ = None
+                    if type_ == 'function':
+                        signature = _make_signature(jm)
+                    else:
+                        signature = ''
                 delta = len(jm.name_with_symbols) - len(jm.complete)
-                if type_ == 'function':
-                    signature = _make_signature(jm)
-                else:
-                    signature = ''
                 yield Completion(start=offset - delta,
                                  end=offset,
                                  text=jm.name_with_symbols,
@@ -1967,6 +2203,7 @@ def _completions(self, full_text: str, offset: int, *, _timeout) -> Iterator[Com
 
                 if time.monotonic() > deadline:
                     break
+            self._record_timing('jedi.type', start, typed)
 
         for jm in iter_jm:
             delta = len(jm.name_with_symbols) - len(jm.complete)
@@ -2035,7 +2272,7 @@ def complete(self, text=None, line_buffer=None, cursor_pos=None) -> Tuple[str, S
         return self._complete(line_buffer=line_buffer, cursor_pos=cursor_pos, text=text, cursor_line=0)[:2]
 
     def _complete(self, *, cursor_line, cursor_pos, line_buffer=None, text=None,
-                  full_text=None) -> _CompleteResult:
+                  full_text=None, cancel_check=None) -> _CompleteResult:
         """
         Like complete but can also returns raw jedi completions as well as the
         origin of the completion text. This could (and should) be made much
@@ -2055,8 +2292,15 @@ def _complete(self, *, cursor_line, cursor_pos, line_buffer=None, text=None,
             matches_origin: ? list same lenght as matches, and where each completion came from
             jedi_matches: list of Jedi matches, have it's own structure.
         """
-
-
+        with self._lock:
+            return self._complete_locked(
+                cursor_line=cursor_line, cursor_pos=cursor_pos,
+                line_buffer=line_buffer, text=text, full_text=full_text,
+                cancel_check=cancel_check)
+
+    def _complete_locked(self, *, cursor_line, cursor_pos, line_buffer, text,
+                         full_text, cancel_check) -> _CompleteResult:
+        """:meth:`_complete`, called with ``_lock`` held."""
         # if the cursor position isn't given, the only sane assumption we can
         # make is that it's at the end of the line (the common case)
         if cursor_pos is None:
@@ -2080,10 +2324,15 @@ def _complete(self, *, cursor_line, cursor_pos, line_buffer=None, text=None,
                          back_latex_name_matches,
                          back_unicode_name_matches,
                          self.fwd_unicode_match):
+                name = meth.__qualname__
+                if not self._matcher_enabled(name):
+                    continue
+                start = time.perf_counter()
                 name_text, name_matches = meth(base_text)
+                self._record_timing(name, start, len(name_matches))
                 if name_text:
                     return _CompleteResult(name_text, name_matches[:MATCHES_LIMIT], \
-                           [meth.__qualname__]*min(len(name_matches), MATCHES_LIMIT), ())
+                           [name]*min(len(name_matches), MATCHES_LIMIT), ())
 
 
         # If no line buffer is given, assume the input text is all there was
@@ -2095,9 +2344,15 @@ def _complete(self, *, cursor_line, cursor_pos, line_buffer=None, text=None,
 
         # Do magic arg matches
         for matcher in self.magic_arg_matchers:
-            matches = list(matcher(line_buffer))[:MATCHES_LIMIT]
+            name = matcher.__qualname__
+            if not self._matcher_enabled(name):
+                continue
+            start = time.perf_counter()
+            matches = list(matcher(line_buffer))
+            self._record_timing(name, start, len(matches))
+            matches = matches[:MATCHES_LIMIT]
             if matches:
-                origins = [matcher.__qualname__] * len(matches)
+                origins = [name] * len(matches)
                 return _CompleteResult(text, matches, origins, ())
 
         # Start with a clean slate of completions
@@ -2108,26 +2363,37 @@ def _complete(self, *, cursor_line, cursor_pos, line_buffer=None, text=None,
         # simply collapse the dict into a list for readline, but we'd have
         # richer completion semantics in other environments.
         completions:Iterable[Any] = []
-        if self.use_jedi:
+        _check_cancelled(cancel_check)
+        if self.use_jedi and self._matcher_enabled('jedi'):
             if not full_text:
                 full_text = line_buffer
-            completions = self._jedi_matches(
-                cursor_pos, cursor_line, full_text)
+            start = time.perf_counter()
+            completions = list(self._jedi_matches(
+                cursor_pos, cursor_line, full_text))
+            self._record_timing('jedi', start, len(completions))
 
         if self.merge_completions:
             matches = []
             for matcher in self.matchers:
+                _check_cancelled(cancel_check)
+                name = _matcher_name(matcher)
+                start = time.perf_counter()
                 try:
-                    matches.extend([(m, matcher.__qualname__)
-                                    for m in matcher(text)])
+                    found = [(m, name) for m in matcher(text)]
                 except:
                     # Show the ugly traceback if the matcher causes an
                     # exception, but do NOT crash the kernel!
                     sys.excepthook(*sys.exc_info())
+                else:
+                    self._record_timing(name, start, len(found))
+                    matches.extend(found)
         else:
             for matcher in self.matchers:
-                matches = [(m, matcher.__qualname__)
-                            for m in matcher(text)]
+                _check_cancelled(cancel_check)
+                name = _matcher_name(matcher)
+                start = time.perf_counter()
+                matches = [(m, name) for m in matcher(text)]
+                self._record_timing(name, start, len(matches))
                 if matches:
                     break
                     
@@ -2141,7 +2407,12 @@ def _complete(self, *, cursor_line, cursor_pos, line_buffer=None, text=None,
 
         _filtered_matches = sorted(filtered_matches, key=lambda x: completions_sorting_key(x[0]))
 
-        custom_res = [(m, 'custom') for m in self.dispatch_custom_completer(text) or []]
+        _check_cancelled(cancel_check)
+        custom_res = []
+        if self._matcher_enabled('custom'):
+            start = time.perf_counter()
+            custom_res = [(m, 'custom') for m in self.dispatch_custom_completer(text) or []]
+            self._record_timing('custom', start, len(custom_res))
         
         _filtered_matches = custom_res or _filtered_matches
         
@@ -2158,7 +2429,8 @@ def fwd_unicode_match(self, text:str) -> Tuple[str, Sequence[str]]:
         Forward match a string starting with a backslash with a list of
         potential Unicode completions.
 
-        Will compute list list of Unicode character names on first call and cache it.
+        Will compute the list of Unicode character names, and an index to
+        search it by prefix, on first call and cache them.
 
         Returns
         -------
@@ -2166,22 +2438,6 @@ def fwd_unicode_match(self, text:str) -> Tuple[str, Sequence[str]]:
             - matched text (empty if no matches)
             - list of potential completions, empty tuple  otherwise)
         """
-        # TODO: self.unicode_names is here a list we traverse each time with ~100k elements.
-        # We could do a faster match using a Trie.
-
-        # Using pygtrie the follwing seem to work:
-
-        #     s = PrefixSet()
-
-        #     for c in range(0,0x10FFFF + 1):
-        #         try:
-        #             s.add(unicodedata.name(chr(c)))
-        #         except ValueError:
-        #             pass
-        #     [''.join(k) for k in s.iter(prefix)]
-
-        # But need to be timed and adds an extra dependency.
-
         slashpos = text.rfind('\\')
         # if text starts with slash
         if slashpos > -1:
@@ -2191,7 +2447,7 @@ def fwd_unicode_match(self, text:str) -> Tuple[str, Sequence[str]]:
             # initialize it, so we don't want to initialize it unless we're
             # actually going to use it.
             s = text[slashpos+1:]
-            candidates = [x for x in self.unicode_names if x.startswith(s)]
+            candidates = self._unicode_names_index.matches(s)
             if candidates:
                 return s, candidates
             else:
@@ -2208,16 +2464,47 @@ def unicode_names(self) -> List[str]:
         The list is lazily initialized on first access.
         """
         if self._unicode_names is None:
-            names = []
-            for c in range(0,0x10FFFF + 1):
-                try:
-                    names.append(unicodedata.name(chr(c)))
-                except ValueError:
-                    pass
             self._unicode_names = _unicode_name_compute(_UNICODE_RANGES)
 
         return self._unicode_names
 
+    @property
+    def _unicode_names_index(self) -> '_PrefixIndex':
+        """Prefix index of :any:`unicode_names`, lazily built on first access."""
+        if self._unicode_names_prefix_index is None:
+            self._unicode_names_prefix_index = _PrefixIndex(self.unicode_names)
+        return self._unicode_names_prefix_index
+
+class _PrefixIndex:
+    """Sorted view of a list of strings, finding those that start with a given
+    prefix by bisection instead of testing each of them.
+
+    Matches are returned in the order of the original list.
+    """
+
+    def __init__(self, words:Iterable[str]):
+        self._words = list(words)
+        self._order = sorted(range(len(self._words)), key=self._words.__getitem__)
+        self._sorted = [self._words[i] for i in self._order]
+
+    def matches(self, prefix:str) -> List[str]:
+        start = bisect.bisect_left(self._sorted, prefix)
+        if prefix and prefix[-1] != chr(sys.maxunicode):
+            # the first string greater than all the ones starting with prefix
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            stop = bisect.bisect_left(self._sorted, upper, start)
+        else:
+            stop = start
+            while stop < len(self._sorted) and self._sorted[stop].startswith(prefix):
+                stop += 1
+        return [self._words[i] for i in sorted(self._order[start:stop])]
+
+
+@functools.lru_cache(maxsize=None)
+def _latex_symbols_index() -> _PrefixIndex:
+    return _PrefixIndex(latex_symbols)
+
+
 def _unicode_name_compute(ranges:List[Tuple[int,int]]) -> List[str]:
     names = []
     for start,stop in ranges:
@@ -20,7 +20,10 @@
 import inspect
 import os
 import re
+import sqlite3
 import sys
+import threading
+from contextlib import closing
 from importlib import import_module
 from importlib.machinery import all_suffixes
 
@@ -44,13 +47,11 @@
 #-----------------------------------------------------------------------------
 _suffixes = all_suffixes()
 
-# Time in seconds after which the rootmodules will be stored permanently in the
-# ipython ip.db database (kept in the user's .ipython dir).
+# Time in seconds spent listing sys.path entries missing from the module index
+# while the user waits for a completion. Entries left over are listed in the
+# background and show up in later completions.
 TIMEOUT_STORAGE = 2
 
-# Time in seconds after which we give up
-TIMEOUT_GIVEUP = 20
-
 # Regular expression for the python import statement
 import_re = re.compile(r'(?P<name>[^\W\d]\w*?)'
                        r'(?P<package>[/\\]__init__)?'
@@ -104,48 +105,201 @@ def module_list(path):
     return list(set(modules))
 
 
+def _mtime(path):
+    """mtime of a sys.path entry, or None if it does not exist."""
+    try:
+        return os.stat(path or '.').st_mtime
+    except OSError:
+        return None
+
+
+class ModuleIndex(object):
+    """Index of the modules found in directories (and zip files).
+
+    The modules of each directory are listed with :func:`module_list`, and
+    kept along with the directory's mtime in a single SQLite database, so the
+    index survives restarts. Directories are only listed again when their
+    mtime changes. Known directories are served from the index right away and
+    checked for changes in a background thread, so completion does not wait
+    on slow or network filesystems.
+
+    The current working directory (``''`` or ``'.'`` in sys.path) changes too
+    often to be worth indexing, and is always listed directly.
+    """
+
+    def __init__(self, db_path=None):
+        # None keeps the index in memory only
+        self.db_path = None if db_path is None else str(db_path)
+        # path -> (mtime, modules)
+        self._entries = {}
+        # paths to check for changes, and paths changed but not saved yet
+        self._pending = set()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._load()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""CREATE TABLE IF NOT EXISTS modules
+                     (path text PRIMARY KEY, mtime real, modules text)""")
+        return conn
+
+    def _load(self):
+        if self.db_path is None:
+            return
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute("SELECT path, mtime, modules FROM modules").fetchall()
+        except sqlite3.Error:
+            return
+        for path, mtime, modules in rows:
+            self._entries[path] = (mtime, modules.split())
+
+    def _save(self, paths):
+        if self.db_path is None or not paths:
+            return
+        rows = []
+        for path in paths:
+            mtime, modules = self._entries[path]
+            rows.append((path, mtime, ' '.join(modules)))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO modules VALUES (?, ?, ?)", rows)
+
+    @staticmethod
+    def _list(path):
+        modules = module_list(path)
+        try:
+            modules.remove('__init__')
+        except ValueError:
+            pass
+        return modules
+
+    def _update(self, path):
+        """(Re)list ``path`` if it changed since it was indexed."""
+        mtime = _mtime(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return
+        # Missing paths are indexed too, so they are not checked again until
+        # they appear.
+        modules = [] if mtime is None else self._list(path)
+        with self._lock:
+            self._entries[path] = (mtime, modules)
+            self._dirty.add(path)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    dirty, self._dirty = self._dirty, set()
+                    if not dirty:
+                        self._thread = None
+                        return
+                    path = None
+                else:
+                    path = self._pending.pop()
+            try:
+                if path is None:
+                    self._save(dirty)
+                else:
+                    self._update(path)
+            except (OSError, sqlite3.Error):
+                pass
+
+    def _schedule(self, paths=()):
+        """Check ``paths`` for changes, and save changes, in the background."""
+        with self._lock:
+            self._pending.update(paths)
+            if self._thread is None and (self._pending or self._dirty):
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name="IPythonModuleIndex")
+                self._thread.start()
+
+    def wait(self, timeout=None):
+        """Wait for the background thread to check and save everything."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def refresh(self):
+        """Check every indexed path for changes, in the background."""
+        self._schedule(list(self._entries))
+
+    def modules(self, paths, timeout=None):
+        """Return the modules found in ``paths``.
+
+        Paths missing from the index are listed right away until ``timeout``
+        seconds have passed; the rest are listed in the background and only
+        returned by later calls. Indexed paths are answered from the index,
+        and checked for changes in the background.
+        """
+        start_time = time()
+        found = []
+        later = []
+        for path in paths:
+            if path in ('', '.'):
+                found.extend(self._list(path))
+                continue
+            if path not in self._entries:
+                if timeout is not None and time() - start_time > timeout:
+                    later.append(path)
+                    continue
+                self._update(path)
+            else:
+                later.append(path)
+            found.extend(self._entries[path][1])
+        self._schedule(later)
+        return found
+
+
+_module_index = None
+
+def get_module_index():
+    """Return the module index of the running IPython, stored in its profile
+    directory, or None if IPython is not running.
+    """
+    global _module_index
+    ip = get_ipython()
+    if ip is None:
+        return None
+    try:
+        db_path = os.path.join(ip.profile_dir.location, 'module_index.sqlite')
+    except AttributeError:
+        db_path = None
+    if _module_index is None or _module_index.db_path != db_path:
+        _module_index = ModuleIndex(db_path)
+    return _module_index
+
+
 def get_root_modules():
     """
     Returns a list containing the names of all the modules available in the
     folders of the pythonpath.
 
-    ip.db['rootmodules_cache'] maps sys.path entries to list of modules.
+    The folders are listed through the :class:`ModuleIndex` of the running
+    IPython, see :func:`get_module_index`.
     """
-    ip = get_ipython()
-    if ip is None:
+    index = get_module_index()
+    if index is None:
         # No global shell instance to store cached list of modules.
         # Don't try to scan for modules every time.
         return list(sys.builtin_module_names)
 
-    rootmodules_cache = ip.db.get('rootmodules_cache', {})
     rootmodules = list(sys.builtin_module_names)
-    start_time = time()
-    store = False
-    for path in sys.path:
-        try:
-            modules = rootmodules_cache[path]
-        except KeyError:
-            modules = module_list(path)
-            try:
-                modules.remove('__init__')
-            except ValueError:
-                pass
-            if path not in ('', '.'): # cwd modules should not be cached
-                rootmodules_cache[path] = modules
-            if time() - start_time > TIMEOUT_STORAGE and not store:
-                store = True
-                print("\nCaching the list of root modules, please wait!")
-                print("(This will only be done once - type '%rehashx' to "
-                      "reset cache!)\n")
-                sys.stdout.flush()
-            if time() - start_time > TIMEOUT_GIVEUP:
-                print("This is taking too long, we give up.\n")
-                return []
-        rootmodules.extend(modules)
-    if store:
-        ip.db['rootmodules_cache'] = rootmodules_cache
-    rootmodules = list(set(rootmodules))
-    return rootmodules
+    rootmodules.extend(index.modules(sys.path, timeout=TIMEOUT_STORAGE))
+    return list(set(rootmodules))
+
+
+def package_modules(path):
+    """
+    Return the names of the modules in the package directory ``path``, through
+    the module index when IPython is running.
+    """
+    index = get_module_index()
+    if index is None:
+        return module_list(path)
+    return index.modules([path])
 
 
 def is_importable(module, attr, only_modules):
@@ -174,7 +328,7 @@ def try_import(mod: str, only_modules=False) -> List[str]:
 
     completions.extend(getattr(m, '__all__', []))
     if m_is_init:
-        completions.extend(module_list(os.path.dirname(m.__file__)))
+        completions.extend(package_modules(os.path.dirname(m.__file__)))
     completions_set = {c for c in completions if isinstance(c, str)}
     completions_set.discard('__init__')
     return list(completions_set)
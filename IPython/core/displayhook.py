@@ -8,14 +8,66 @@
 # Distributed under the terms of the Modified BSD License.
 
 import builtins as builtin_mod
+import functools
+import itertools
+import os
+import pickle
 import sys
 import io as _io
+import tempfile
 import tokenize
+import weakref
 
 from traitlets.config.configurable import Configurable
-from traitlets import Instance, Float
+from traitlets import Instance, Float, Integer, Enum
+from IPython.utils.timing import record_span
 from warnings import warn
 
+
+def _estimate_size(obj):
+    """Roughly estimate the number of bytes kept alive by an output.
+
+    Uses ``nbytes`` when the object has it (numpy arrays, pandas series...),
+    otherwise :func:`sys.getsizeof`, adding the items of builtin containers
+    one level deep, extrapolated from the first thousand of them.
+    """
+    try:
+        nbytes = getattr(obj, 'nbytes', None)
+    except Exception:
+        nbytes = None
+    if isinstance(nbytes, int):
+        return nbytes
+    try:
+        size = sys.getsizeof(obj)
+    except TypeError:
+        return 0
+    if isinstance(obj, dict):
+        items = itertools.chain.from_iterable(obj.items())
+        count = 2 * len(obj)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = iter(obj)
+        count = len(obj)
+    else:
+        return size
+    sample = list(itertools.islice(items, 1000))
+    if sample:
+        size += sum(map(sys.getsizeof, sample)) * count // len(sample)
+    return size
+
+
+def _load_pickle(path):
+    """Load an output evicted to disk, and remove its file."""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError):
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 # TODO: Move the various attributes (cache_size, [others now moved]). Some
 # of these are also attributes of InteractiveShell. They should be on ONE object
 # only and the other objects should ask that one object for their values.
@@ -33,6 +85,26 @@ class DisplayHook(Configurable):
                            allow_none=True)
     cull_fraction = Float(0.2)
 
+    cache_max_bytes = Integer(0, help=
+        """Approximate memory budget of the output cache, in bytes; 0 means
+        no limit. Sizes are estimated from ``nbytes`` or :func:`sys.getsizeof`.
+        When the budget is exceeded, outputs are evicted from ``Out`` and
+        ``_N``, the largest and oldest ones first; the latest output is
+        always kept.
+        """
+    ).tag(config=True)
+
+    cache_eviction = Enum(('drop', 'weakref', 'disk'), default_value='drop',
+        help="""What becomes of outputs evicted to fit ``cache_max_bytes``:
+        'drop' forgets them, 'weakref' keeps them in ``Out`` as long as they
+        are alive elsewhere, and 'disk' pickles them to a temporary directory
+        from which ``Out[N]`` reloads them. With 'weakref', only the objects
+        supporting weak references are kept: builtin lists, dicts, tuples,
+        numbers, strings and bytes are dropped.
+        
+        """
+    ).tag(config=True)
+
     def __init__(self, shell=None, cache_size=1000, **kwargs):
         super(DisplayHook, self).__init__(shell=shell, **kwargs)
         cache_size_min = 3
@@ -49,6 +121,13 @@ def __init__(self, shell=None, cache_size=1000, **kwargs):
 
         self.cache_size = cache_size
 
+        # Estimated sizes of the outputs in the cache, see cull_cache_bytes
+        self._output_sizes = {}
+        # Temporary directory for outputs evicted to disk
+        self._spill_dir = None
+        # Whether we warned about an output 'weakref' eviction could not keep
+        self._warned_weakref = False
+
         # we need a reference to the user-level namespace
         self.shell = shell
         
@@ -229,6 +308,9 @@ def update_user_ns(self, result):
                 to_main[new_result] = result
                 self.shell.push(to_main, interactive=False)
                 self.shell.user_ns['_oh'][self.prompt_count] = result
+                if self.cache_max_bytes:
+                    self._output_sizes[self.prompt_count] = _estimate_size(result)
+                    self.cull_cache_bytes()
 
     def fill_exec_result(self, result):
         if self.exec_result is not None:
@@ -257,15 +339,18 @@ def __call__(self, result=None):
         """
         self.check_for_underscore()
         if result is not None and not self.quiet():
-            self.start_displayhook()
-            self.write_output_prompt()
-            format_dict, md_dict = self.compute_format_data(result)
-            self.update_user_ns(result)
-            self.fill_exec_result(result)
-            if format_dict:
-                self.write_format_data(format_dict, md_dict)
-                self.log_output(format_dict)
-            self.finish_displayhook()
+            spans = getattr(self.exec_result, 'spans', None)
+            with record_span(spans, 'displayhook',
+                             self.shell.record_allocations):
+                self.start_displayhook()
+                self.write_output_prompt()
+                format_dict, md_dict = self.compute_format_data(result)
+                self.update_user_ns(result)
+                self.fill_exec_result(result)
+                if format_dict:
+                    self.write_format_data(format_dict, md_dict)
+                    self.log_output(format_dict)
+                self.finish_displayhook()
 
     def cull_cache(self):
         """Output cache is full, cull the oldest entries"""
@@ -280,7 +365,65 @@ def cull_cache(self):
                 break
             self.shell.user_ns.pop('_%i' % n, None)
             oh.pop(n, None)
-        
+            self._output_sizes.pop(n, None)
+
+    def cull_cache_bytes(self):
+        """Evict outputs until the cache fits in ``cache_max_bytes``.
+
+        The entries with the largest size times age go first; the latest
+        output is never evicted.
+        """
+        oh = self.shell.user_ns.get('_oh', {})
+        sizes = self._output_sizes
+        for n in [n for n in sizes if n not in oh]:
+            # removed by the user, or by %reset
+            del sizes[n]
+        for n in oh.keys() - sizes.keys():
+            # cached before the budget was set, or restored after eviction
+            sizes[n] = _estimate_size(oh[n])
+        total = sum(sizes.values())
+        if total <= self.cache_max_bytes:
+            return
+        latest = self.prompt_count
+        candidates = sorted((n for n in sizes if n != latest),
+                            key=lambda n: sizes[n] * (latest - n + 1),
+                            reverse=True)
+        for n in candidates:
+            if total <= self.cache_max_bytes:
+                break
+            total -= sizes.pop(n)
+            self.shell.user_ns.pop('_%i' % n, None)
+            self._demote(n, oh.pop(n), oh)
+
+    def _demote(self, n, result, oh):
+        """Keep an evicted output reachable as configured by cache_eviction."""
+        evicted = getattr(oh, 'evicted', None)
+        if evicted is None or self.cache_eviction == 'drop':
+            return
+        if self.cache_eviction == 'weakref':
+            try:
+                evicted[n] = weakref.ref(result)
+            except TypeError:
+                if not self._warned_weakref:
+                    self._warned_weakref = True
+                    warn("Output %i was dropped from the cache, as %s objects "
+                         "do not support weak references (see "
+                         "DisplayHook.cache_eviction)."
+                         % (n, type(result).__name__))
+            return
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory(prefix='ipython-out-')
+        path = os.path.join(self._spill_dir.name, '%i.pickle' % n)
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Not picklable, or no space left: the output is dropped
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        evicted[n] = functools.partial(_load_pickle, path)
+
 
     def flush(self):
         if not self.do_full_cache:
@@ -298,6 +441,10 @@ def flush(self):
         oh = self.shell.user_ns.get('_oh', None)
         if oh is not None:
             oh.clear()
+        self._output_sizes.clear()
+        if self._spill_dir is not None:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
 
         # Release our own references to objects:
         self._, self.__, self.___ = '', '', ''
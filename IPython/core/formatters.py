@@ -15,6 +15,7 @@
 import sys
 import traceback
 import warnings
+import weakref
 from io import StringIO
 
 from decorator import decorator
@@ -52,6 +53,18 @@ def _active_types_changed(self, change):
             else:
                 formatter.enabled = False
 
+    accepted_types = List(Unicode(),
+        help="""List of mime-types the frontend is able to render.
+
+        When set, representations of other types are not computed at all:
+        their formatters are not called, and ``_repr_mimebundle_`` receives
+        these types as ``include``. Other representations can still be
+        computed on request, by passing them as ``include`` to
+        :meth:`DisplayFormatter.format`.
+
+        An empty list, the default, accepts all types.
+        """).tag(config=True)
+
     ipython_display_formatter = ForwardDeclaredInstance('FormatterABC')
     @default('ipython_display_formatter')
     def _default_formatter(self):
@@ -111,7 +124,8 @@ def format(self, obj, include=None, exclude=None):
         include : list, tuple or set; optional
             A list of format type strings (MIME types) to include in the
             format data dict. If this is set *only* the format types included
-            in this list will be computed.
+            in this list will be computed. Defaults to
+            :attr:`accepted_types`.
         exclude : list, tuple or set; optional
             A list of format type string (MIME types) to exclude in the format
             data dict. If this is set all format types will be computed,
@@ -147,6 +161,9 @@ def format(self, obj, include=None, exclude=None):
             # object handled itself, don't proceed
             return {}, {}
 
+        if not include:
+            include = self.accepted_types
+
         format_dict, md_dict = self.mimebundle_formatter(obj, include=include, exclude=exclude)
 
         if format_dict or md_dict:
@@ -158,6 +175,10 @@ def format(self, obj, include=None, exclude=None):
                 md_dict = {k:v for k,v in md_dict.items() if k not in exclude}
 
         for format_type, formatter in self.formatters.items():
+            if include and format_type not in include:
+                continue
+            if exclude and format_type in exclude:
+                continue
             if format_type in format_dict:
                 # already got it from mimebundle, maybe don't render again.
                 # exception: manually registered per-mime renderer
@@ -170,11 +191,7 @@ def format(self, obj, include=None, exclude=None):
                 except KeyError:
                     # no special formatter, use mime-bundle-provided value
                     continue
-            if include and format_type not in include:
-                continue
-            if exclude and format_type in exclude:
-                continue
-            
+
             md = None
             try:
                 data = formatter(obj)
@@ -284,6 +301,61 @@ def _get_type(obj):
 """)
 
 
+class _VersionedDict(dict):
+    """A dict counting the changes made to it in :attr:`version`.
+
+    Used for the printer registries of formatters, so that what is cached
+    from them can be discarded whenever they are edited.
+    """
+
+    version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self.version += 1
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.version += 1
+        return item
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self.version += 1
+        return value
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
+class _PrinterDict(Dict):
+    """A Dict trait whose value is a :class:`_VersionedDict`."""
+
+    def validate(self, obj, value):
+        value = super().validate(obj, value)
+        if not isinstance(value, _VersionedDict):
+            value = _VersionedDict(value)
+        return value
+
+
 class BaseFormatter(Configurable):
     """A base formatter class that is configurable.
 
@@ -322,12 +394,31 @@ class BaseFormatter(Configurable):
 
     # The type-specific printers.
     # Map type objects to the format functions.
-    type_printers = Dict().tag(config=True)
+    type_printers = _PrinterDict().tag(config=True)
 
     # The deferred-import type-specific printers.
     # Map (modulename, classname) pairs to the format functions.
-    deferred_printers = Dict().tag(config=True)
-    
+    deferred_printers = _PrinterDict().tag(config=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Maps types to the class of their MRO whose printer they use, or
+        # None; see _resolve_type.
+        self._lookup_cache = weakref.WeakKeyDictionary()
+        self._lookup_cache_state = None
+
+    @observe('type_printers', 'deferred_printers')
+    def _printers_changed(self, change):
+        self._clear_lookup_cache()
+
+    def _clear_lookup_cache(self):
+        """Forget the printers resolved for each type.
+
+        Direct edits of :attr:`type_printers` and :attr:`deferred_printers`
+        are noticed from the number of changes made to them.
+        """
+        self._lookup_cache_state = None
+
     @catch_format_error
     def __call__(self, obj):
         """Compute the format for an object."""
@@ -421,13 +512,46 @@ def lookup_by_type(self, typ):
             else:
                 return self.deferred_printers[typ_key]
         else:
-            for cls in pretty._get_mro(typ):
-                if cls in self.type_printers or self._in_deferred_types(cls):
-                    return self.type_printers[cls]
-        
+            cls = self._resolve_type(typ)
+            if cls is not None:
+                return self.type_printers[cls]
+
         # If we have reached here, the lookup failed.
         raise KeyError("No registered printer for {0!r}".format(typ))
 
+    def _resolve_type(self, typ):
+        """Return the class of the MRO of `typ` registered in
+        :attr:`type_printers`, or None.
+
+        Deferred printers met on the way are moved to :attr:`type_printers`.
+        The result is cached for each type until printers change.
+        """
+        state = (self.type_printers.version, self.deferred_printers.version)
+        if state != self._lookup_cache_state:
+            self._lookup_cache.clear()
+        try:
+            cls = self._lookup_cache[typ]
+        except (KeyError, TypeError):
+            pass
+        else:
+            if cls is None or cls in self.type_printers:
+                return cls
+
+        for cls in pretty._get_mro(typ):
+            if cls in self.type_printers or self._in_deferred_types(cls):
+                break
+        else:
+            cls = None
+        # Resolving deferred printers changed the registries, but none of the
+        # cached results.
+        self._lookup_cache_state = (self.type_printers.version,
+                                    self.deferred_printers.version)
+        try:
+            self._lookup_cache[typ] = cls
+        except TypeError:
+            pass
+        return cls
+
     def for_type(self, typ, func=None):
         """Add a format function for a given type.
         
@@ -464,6 +588,7 @@ def for_type(self, typ, func=None):
         
         if func is not None:
             self.type_printers[typ] = func
+            self._clear_lookup_cache()
         
         return oldfunc
 
@@ -504,6 +629,7 @@ def for_type_by_name(self, type_module, type_name, func=None):
         
         if func is not None:
             self.deferred_printers[key] = func
+            self._clear_lookup_cache()
         return oldfunc
     
     def pop(self, typ, default=_raise_key_error):
@@ -545,6 +671,7 @@ def pop(self, typ, default=_raise_key_error):
                 old = self.deferred_printers.pop(_mod_name_key(typ), default)
         if old is _raise_key_error:
             raise KeyError("No registered value for {0!r}".format(typ))
+        self._clear_lookup_cache()
         return old
 
     def _in_deferred_types(self, cls):
@@ -601,7 +728,30 @@ def dtype_pprinter(obj, p, cycle):
         Set to 0 to disable truncation.
         """
     ).tag(config=True)
-    
+
+    max_depth = Integer(0,
+        help="""Replace objects nested deeper than this by ``...``.
+
+        Set to 0 to disable truncation.
+        """
+    ).tag(config=True)
+
+    max_output = Integer(0,
+        help="""Truncate the representation to this many characters, and stop
+        visiting the object once they are printed.
+
+        Set to 0 to disable truncation.
+        """
+    ).tag(config=True)
+
+    max_lines = Integer(0,
+        help="""Truncate the representation to this many lines, and stop
+        visiting the object once they are printed.
+
+        Set to 0 to disable truncation.
+        """
+    ).tag(config=True)
+
     # Look for a _repr_pretty_ methods to use for pretty printing.
     print_method = ObjectName('_repr_pretty_')
 
@@ -696,6 +846,9 @@ def __call__(self, obj):
             printer = pretty.RepresentationPrinter(stream, self.verbose,
                 self.max_width, self.newline,
                 max_seq_length=self.max_seq_length,
+                max_depth=self.max_depth,
+                max_output=self.max_output,
+                max_lines=self.max_lines,
                 singleton_pprinters=self.singleton_printers,
                 type_pprinters=self.type_printers,
                 deferred_pprinters=self.deferred_printers)
@@ -18,7 +18,9 @@
 from traitlets import (
     Any,
     Bool,
+    CaselessStrEnum,
     Dict,
+    Float,
     Instance,
     Integer,
     List,
@@ -177,6 +179,47 @@ class HistoryAccessor(HistoryAccessorBase):
         """
     ).tag(config=True)
 
+    journal_mode = CaselessStrEnum(
+        ("delete", "truncate", "persist", "wal"),
+        default_value=None,
+        allow_none=True,
+        help="""SQLite journal mode to set on the history database.
+
+        ``wal`` (write-ahead logging) lets several IPython sessions sharing a
+        profile write history without blocking each other's readers, and
+        makes each write much cheaper. It is persistent, so it applies to
+        every process using the file afterwards. WAL needs shared memory and
+        does not work on network filesystems such as NFS. By default the
+        journal mode of the database is left untouched.
+        """,
+    ).tag(config=True)
+
+    synchronous = CaselessStrEnum(
+        ("off", "normal", "full", "extra"),
+        default_value=None,
+        allow_none=True,
+        help="""SQLite ``synchronous`` level for history database connections.
+
+        ``normal`` is safe in WAL mode and avoids an fsync on every commit;
+        it can only lose the last few commits on power failure. By default
+        SQLite's own setting (``full``) is used.
+        """,
+    ).tag(config=True)
+
+    fts_index = Bool(True,
+        help="""Maintain a full-text index of the history for faster searching.
+
+        When SQLite was built with the FTS5 extension, IPython keeps a trigram
+        index of every input in the ``history_fts`` table, which lets
+        :meth:`search` (and ``%history -g``) avoid scanning the whole history
+        table. Without FTS5, or with this set to False, searches fall back to
+        a plain ``GLOB`` scan.
+        """
+    ).tag(config=True)
+
+    # Whether the full-text index could be created in the current database
+    _fts_available = False
+
     # The SQLite database
     db = Any()
     @observe('db')
@@ -242,6 +285,7 @@ def init_db(self):
         kwargs = dict(detect_types=sqlite3.PARSE_DECLTYPES|sqlite3.PARSE_COLNAMES)
         kwargs.update(self.connection_options)
         self.db = sqlite3.connect(str(self.hist_file), **kwargs)
+        self._configure_connection(self.db, journal_mode=self.journal_mode)
         self.db.execute("""CREATE TABLE IF NOT EXISTS sessions (session integer
                         primary key autoincrement, start timestamp,
                         end timestamp, num_cmds integer, remark text)""")
@@ -254,9 +298,81 @@ def init_db(self):
                         (session integer, line integer, output text,
                         PRIMARY KEY (session, line))""")
         self.db.commit()
+        self._fts_available = self.fts_index and self._init_fts_index()
         # success! reset corrupt db count
         self._corrupt_db_counter = 0
 
+    def _configure_connection(self, conn, journal_mode=None):
+        """Apply the configured pragmas to a new connection.
+
+        ``synchronous`` is per connection, whereas the journal mode is stored
+        in the database, so it is only set when opening the main connection.
+        """
+        try:
+            if journal_mode:
+                conn.execute("PRAGMA journal_mode=%s" % journal_mode)
+            if self.synchronous:
+                conn.execute("PRAGMA synchronous=%s" % self.synchronous)
+        except sqlite3.OperationalError as e:
+            # e.g. another process holds a lock; that's no reason to treat
+            # the database as corrupt
+            self.log.warning("Failed to configure SQLite history: %s", e)
+
+    def _init_fts_index(self):
+        """Create the full-text index of the history, and catch it up with the
+        history table.
+
+        Returns False if this SQLite does not support FTS5 with the trigram
+        tokenizer, in which case searches use a plain GLOB scan.
+        """
+        try:
+            self.db.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS history_fts
+                            USING fts5(source, source_raw, content='',
+                            tokenize='trigram case_sensitive 1')""")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS history_fts_last
+                            (rowid integer primary key, session integer,
+                            line integer)""")
+            with self.db:
+                self._update_fts_index(self.db)
+        except sqlite3.OperationalError as e:
+            self.log.debug("History full-text index unavailable: %s", e)
+            return False
+        return True
+
+    @staticmethod
+    def _update_fts_index(conn):
+        """Index the rows of the history table that are not indexed yet.
+
+        The index is contentless and keyed by the rowid of the history table,
+        so this picks up rows written by any process, including older IPython
+        versions which do not know about the index.
+
+        The history table has no INTEGER PRIMARY KEY, so its rowids are not
+        stable: a VACUUM after deleting rows renumbers them, and deleting the
+        latest rows lets their rowids be reused. ``history_fts_last`` keeps
+        the rowid, session and line of the last row indexed; when that rowid
+        no longer holds that row, the index is rebuilt.
+        """
+        last = conn.execute(
+            "SELECT rowid, session, line FROM history_fts_last").fetchone()
+        if last is not None:
+            row = conn.execute("SELECT session, line FROM history WHERE rowid = ?",
+                               (last[0],)).fetchone()
+            if row is None or tuple(row) != tuple(last[1:]):
+                last = None
+        if last is None:
+            conn.execute("INSERT INTO history_fts(history_fts) VALUES('delete-all')")
+        conn.execute("""INSERT INTO history_fts(rowid, source, source_raw)
+                     SELECT rowid, source, source_raw FROM history
+                     WHERE rowid > ?""", (last[0] if last else 0,))
+        newest = conn.execute("""SELECT rowid, session, line FROM history
+                              ORDER BY rowid DESC LIMIT 1""").fetchone()
+        if last is None or (newest is not None and newest[0] != last[0]):
+            conn.execute("DELETE FROM history_fts_last")
+            if newest is not None:
+                conn.execute("INSERT INTO history_fts_last VALUES (?, ?, ?)",
+                             newest)
+
     def writeout_cache(self):
         """Overridden by HistoryManager to dump the cache before certain
         database lookups."""
@@ -358,6 +474,38 @@ def get_tail(self, n=10, raw=True, output=False, include_latest=False):
             return reversed(list(cur)[1:])
         return reversed(list(cur))
 
+    def iter_tail(self, raw=True, page_size=1000):
+        """Iterate over the whole history database, most recent line first.
+
+        Unlike :meth:`get_tail`, lines are fetched ``page_size`` at a time,
+        so only as much of the database is read as is actually consumed.
+
+        Parameters
+        ----------
+        raw : bool
+          See :meth:`get_range`
+        page_size : int
+          The number of lines fetched by each query.
+
+        Returns
+        -------
+        Tuples as :meth:`get_range`
+        """
+        if not self.enabled:
+            return
+        self.writeout_cache()
+        cur = self._run_sql("ORDER BY session DESC, line DESC LIMIT ?",
+                            (page_size,), raw=raw)
+        while True:
+            page = cur.fetchall()
+            yield from page
+            if len(page) < page_size:
+                return
+            session, line, _ = page[-1]
+            cur = self._run_sql("WHERE (session, line) < (?, ?) "
+                                "ORDER BY session DESC, line DESC LIMIT ?",
+                                (session, line, page_size), raw=raw)
+
     @catch_corrupt_db
     def search(self, pattern="*", raw=True, search_raw=True,
                output=False, n=None, unique=False):
@@ -388,6 +536,21 @@ def search(self, pattern="*", raw=True, search_raw=True,
         self.writeout_cache()
         sqlform = "WHERE %s GLOB ?" % tosearch
         params = (pattern,)
+        query = _glob_to_fts_query(pattern) if self._fts_available else None
+        if query:
+            try:
+                with self.db:
+                    self._update_fts_index(self.db)
+            except sqlite3.OperationalError:
+                # e.g. a read-only database: the index may be lagging behind
+                query = None
+        if query:
+            # The index only narrows down the candidates, GLOB stays the
+            # authority on what matches.
+            column = "source_raw" if search_raw else "source"
+            sqlform = ("WHERE history.rowid IN (SELECT rowid FROM history_fts "
+                       "WHERE history_fts MATCH ?) AND %s GLOB ?" % tosearch)
+            params = ("{%s} : (%s)" % (column, query), pattern)
         if unique:
             sqlform += ' GROUP BY {0}'.format(tosearch)
         if n is not None:
@@ -459,6 +622,52 @@ def get_range_by_str(self, rangestr, raw=True, output=False):
                 yield line
 
 
+class OutputHistory(dict):
+    """The output history, ``Out``, keyed by execution count.
+
+    Outputs evicted from the cache by the displayhook (see
+    ``DisplayHook.cache_max_bytes``) may leave a loader in :attr:`evicted`,
+    a callable returning the output or None, so that ``Out[n]`` and
+    ``Out.get(n)`` still work while the output is available. They put it
+    back in the dict, where the displayhook counts it again. ``n in Out``
+    is true for evicted outputs without loading them, so it may be true for
+    an output which is no longer available. Iteration, ``len()`` and the
+    views only cover the outputs in the dict.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evicted = {}
+
+    def _restore(self, key):
+        """Put back an evicted output, returning whether it was available."""
+        loader = self.evicted.pop(key, None)
+        if loader is None:
+            return False
+        value = loader()
+        if value is None:
+            return False
+        self[key] = value
+        return True
+
+    def __missing__(self, key):
+        if self._restore(key):
+            return super().__getitem__(key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return super().__contains__(key) or key in self.evicted
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def clear(self):
+        super().clear()
+        self.evicted.clear()
+
+
 class HistoryManager(HistoryAccessor):
     """A class to organize all history-related functionality in one place.
     """
@@ -483,6 +692,10 @@ def _dir_hist_default(self):
     # A dict of output history, keyed with ints from the shell's
     # execution count.
     output_hist = Dict()
+    @default('output_hist')
+    def _output_hist_default(self):
+        return OutputHistory()
+
     # The text/plain repr of outputs.
     output_hist_reprs = Dict()
 
@@ -496,6 +709,12 @@ def _dir_hist_default(self):
         help="Write to database every x commands (higher values save disk access & power).\n"
         "Values of 1 or less effectively disable caching."
     ).tag(config=True)
+    db_cache_interval = Float(0,
+        help="Also write cached history to the database at least every x seconds.\n"
+        "Together with db_cache_size this batches writes by size or age, so that "
+        "several cells are committed in one transaction without holding entries "
+        "back for long. 0 disables the time-based flush."
+    ).tag(config=True)
     # The input and output caches
     db_input_cache = List()
     db_output_cache = List()
@@ -748,16 +967,27 @@ def store_output(self, line_num):
             self.save_flag.set()
 
     def _writeout_input_cache(self, conn):
+        if not self.db_input_cache:
+            return
         with conn:
-            for line in self.db_input_cache:
-                conn.execute("INSERT INTO history VALUES (?, ?, ?, ?)",
-                                (self.session_number,)+line)
+            conn.executemany("INSERT INTO history VALUES (?, ?, ?, ?)",
+                             [(self.session_number,) + line
+                              for line in self.db_input_cache])
+            if self._fts_available:
+                try:
+                    self._update_fts_index(conn)
+                except sqlite3.DatabaseError as e:
+                    # Never lose history because of the index; searches will
+                    # catch it up later.
+                    self.log.debug("Failed to update history index: %s", e)
 
     def _writeout_output_cache(self, conn):
+        if not self.db_output_cache:
+            return
         with conn:
-            for line in self.db_output_cache:
-                conn.execute("INSERT INTO output_history VALUES (?, ?, ?)",
-                                (self.session_number,)+line)
+            conn.executemany("INSERT INTO output_history VALUES (?, ?, ?)",
+                             [(self.session_number,) + line
+                              for line in self.db_output_cache])
 
     @only_when_enabled
     def writeout_cache(self, conn=None):
@@ -798,7 +1028,9 @@ class HistorySavingThread(threading.Thread):
 
     It waits for the HistoryManager's save_flag to be set, then writes out
     the history cache. The main thread is responsible for setting the flag when
-    the cache size reaches a defined threshold."""
+    the cache size reaches a defined threshold. If the manager's
+    ``db_cache_interval`` is set, the cache is also written out when that many
+    seconds have passed without the flag being set."""
     daemon = True
     stop_now = False
     enabled = True
@@ -816,8 +1048,10 @@ def run(self):
                 str(self.history_manager.hist_file),
                 **self.history_manager.connection_options
             )
+            self.history_manager._configure_connection(self.db)
+            interval = self.history_manager.db_cache_interval or None
             while True:
-                self.history_manager.save_flag.wait()
+                self.history_manager.save_flag.wait(interval)
                 if self.stop_now:
                     self.db.close()
                     return
@@ -890,6 +1124,34 @@ def extract_hist_ranges(ranges_str):
         yield (endsess, 1, end)
 
 
+# Runs of literal characters in a glob pattern
+_glob_literal_re = re.compile(r"\[\^?\]?[^\]]*\]?|([^*?\[]+)")
+
+
+def _glob_to_fts_query(pattern):
+    """Build an FTS5 trigram query which any string matching the glob
+    ``pattern`` must also match, or return None if the index cannot help.
+
+    Every run of at least three literal characters must appear as a substring
+    of a match, so the runs are AND-ed together as phrases.
+
+    Examples
+    --------
+    >>> _glob_to_fts_query("*def f*return*")
+    '"def f" AND "return"'
+    >>> _glob_to_fts_query("a?b*") is None
+    True
+    """
+    phrases = []
+    for m in _glob_literal_re.finditer(pattern):
+        literal = m.group(1)
+        if literal and len(literal) >= 3:
+            phrases.append('"%s"' % literal.replace('"', '""'))
+    if not phrases:
+        return None
+    return " AND ".join(phrases)
+
+
 def _format_lineno(session, line):
     """Helper function to format line numbers properly."""
     if session == 0:
@@ -11,6 +11,7 @@
 # Distributed under the terms of the Modified BSD License.
 
 from codeop import compile_command
+from itertools import chain
 import re
 import tokenize
 from typing import List, Tuple, Optional, Any
@@ -474,6 +475,23 @@ def make_tokens_by_line(lines:List[str]):
     '\\r\\n') for this to properly work. Use `.splitlines(keeplineending=True)`
     for example when passing block of text to this function.
 
+    """
+    if len(lines) > 1 and not lines[0].endswith(('\n', '\r', '\r\n', '\x0b', '\x0c')):
+        warnings.warn("`make_tokens_by_line` received a list of lines which do not have lineending markers ('\\n', '\\r', '\\r\\n', '\\x0b', '\\x0c'), behavior will be unspecified")
+    return _tokens_by_line(lines)[0]
+
+
+def _tokens_by_line(lines, start=0, indents=()):
+    """Implementation of :func:`make_tokens_by_line`, which can resume.
+
+    Tokenizes ``lines[start:]``, assuming ``lines[:start]`` ended a logical
+    line with the indentation levels ``indents`` (the whitespace of each
+    INDENT token still open) on the tokenizer's stack.
+
+    Returns ``(tokens_by_line, boundaries)``. ``boundaries`` lists
+    ``(groups, rows, indents)`` for each point after which tokenizing could
+    resume the same way: the number of complete groups before it, the number
+    of physical lines they span, and the indentation stack.
     """
     # NL tokens are used inside multiline expressions, but also after blank
     # lines or comments. This is intentional - see https://bugs.python.org/issue17061
@@ -482,19 +500,42 @@ def make_tokens_by_line(lines:List[str]):
 
     #   reexported from token on 3.7+
     NEWLINE, NL = tokenize.NEWLINE, tokenize.NL  # type: ignore
+    INDENT, DEDENT = tokenize.INDENT, tokenize.DEDENT  # type: ignore
     tokens_by_line:List[List[Any]] = [[]]
-    if len(lines) > 1 and not lines[0].endswith(('\n', '\r', '\r\n', '\x0b', '\x0c')):
-        warnings.warn("`make_tokens_by_line` received a list of lines which do not have lineending markers ('\\n', '\\r', '\\r\\n', '\\x0b', '\\x0c'), behavior will be unspecified")
+    boundaries = []
+
+    # The tokenizer cannot be given an initial state: rebuild its indentation
+    # stack with one dummy statement per level, and drop their tokens.
+    skip = len(indents)
+    shift = start - skip
+    stack = list(indents)
+    readline = chain((ws + '_\n' for ws in indents), lines[start:]).__next__
     parenlev = 0
+    depth = 0  # unlike parenlev, may go negative, as in tokenize
     try:
-        for token in tokenize.generate_tokens(iter(lines).__next__):
+        for token in tokenize.generate_tokens(readline):
+            if token.start[0] <= skip:
+                continue
+            if shift:
+                token = token._replace(
+                    start=(token.start[0] + shift, token.start[1]),
+                    end=(token.end[0] + shift, token.end[1]))
             tokens_by_line[-1].append(token)
             if (token.type == NEWLINE) \
                     or ((token.type == NL) and (parenlev <= 0)):
                 tokens_by_line.append([])
+                if depth == 0 and token.string:
+                    boundaries.append((len(tokens_by_line) - 1,
+                                       token.start[0], tuple(stack)))
+            elif token.type == INDENT:
+                stack.append(token.string)
+            elif token.type == DEDENT:
+                stack.pop()
             elif token.string in {'(', '[', '{'}:
                 parenlev += 1
+                depth += 1
             elif token.string in {')', ']', '}'}:
+                depth -= 1
                 if parenlev > 0:
                     parenlev -= 1
     except tokenize.TokenError:
@@ -506,7 +547,66 @@ def make_tokens_by_line(lines:List[str]):
         tokens_by_line.pop()
 
 
-    return tokens_by_line
+    return tokens_by_line, boundaries
+
+
+class _TokenCache:
+    """Tokens grouped by line for the last few inputs tokenized.
+
+    Multi-line input is checked again each time a line is added to it, so
+    :meth:`tokens_by_line` only tokenizes the lines after the last complete
+    logical line it shares with a previous input.
+    """
+
+    def __init__(self, size=4):
+        self.size = size
+        # (lines, tokens_by_line, boundaries), most recent last
+        self.entries:List[Tuple[List[str], List[List[Any]], List[Any]]] = []
+
+    def _resume_point(self, lines):
+        """Return ``(entry, boundary index)`` of the longest reusable prefix"""
+        best, best_ix, best_rows = None, -1, 0
+        for entry in self.entries:
+            old, _, boundaries = entry
+            # Boundaries are in order: bisect for the last one whose
+            # lines are unchanged.
+            lo, hi = 0, len(boundaries)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                rows = boundaries[mid][1]
+                if rows <= len(lines) and old[:rows] == lines[:rows]:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo and boundaries[lo - 1][1] > best_rows:
+                best, best_ix, best_rows = entry, lo - 1, boundaries[lo - 1][1]
+        return best, best_ix
+
+    def tokens_by_line(self, lines:List[str]):
+        """Same as :func:`make_tokens_by_line`, reusing earlier results"""
+        lines = list(lines)
+        entry, ix = self._resume_point(lines)
+        tokens_by_line = boundaries = None
+        if entry is not None:
+            ngroups, rows, indents = entry[2][ix]
+            try:
+                tail, tail_boundaries = _tokens_by_line(lines, rows, indents)
+            except Exception:
+                # Let a full tokenization raise it
+                pass
+            else:
+                tokens_by_line = entry[1][:ngroups] + tail
+                boundaries = entry[2][:ix + 1] + [
+                    (g + ngroups, r, i) for g, r, i in tail_boundaries]
+        if tokens_by_line is None:
+            tokens_by_line, boundaries = _tokens_by_line(lines)
+
+        if entry is not None:
+            self.entries.remove(entry)
+        self.entries.append((lines, tokens_by_line, boundaries))
+        del self.entries[:max(0, len(self.entries) - self.size)]
+        # Callers may modify the lists they get
+        return [list(line) for line in tokens_by_line]
 
 def show_linewise_tokens(s: str):
     """For investigation and debugging"""
@@ -543,6 +643,7 @@ def __init__(self):
             EscapedCommand,
             HelpEnd,
         ]
+        self._token_cache = _TokenCache()
 
     def do_one_token_transform(self, lines):
         """Find and run the transform earliest in the code.
@@ -558,7 +659,7 @@ def do_one_token_transform(self, lines):
         Python, not using lots of IPython special syntax, so this shouldn't be
         a performance issue.
         """
-        tokens_by_line = make_tokens_by_line(lines)
+        tokens_by_line = self._token_cache.tokens_by_line(lines)
         candidates = []
         for transformer_cls in self.token_transformers:
             transformer = transformer_cls.find(tokens_by_line)
@@ -660,7 +761,7 @@ def check_complete(self, cell: str):
         except SyntaxError:
             return 'invalid', None
 
-        tokens_by_line = make_tokens_by_line(lines)
+        tokens_by_line = self._token_cache.tokens_by_line(lines)
 
         if not tokens_by_line:
             return 'incomplete', find_last_indent(lines)
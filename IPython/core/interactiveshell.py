@@ -17,6 +17,7 @@
 import builtins as builtin_mod
 import functools
 import inspect
+import json
 import os
 import re
 import runpy
@@ -42,7 +43,8 @@
 from IPython.core.autocall import ExitAutocall
 from IPython.core.builtin_trap import BuiltinTrap
 from IPython.core.events import EventManager, available_events
-from IPython.core.compilerop import CachingCompiler, check_linecache_ipython
+from IPython.core.compilerop import (CachingCompiler, check_linecache_ipython,
+                                     code_name, code_with_filename)
 from IPython.core.debugger import Pdb
 from IPython.core.display_trap import DisplayTrap
 from IPython.core.displayhook import DisplayHook
@@ -56,6 +58,7 @@
 from IPython.core.macro import Macro
 from IPython.core.payload import PayloadManager
 from IPython.core.prefilter import PrefilterManager
+from IPython.core.profiledb import ProfileDB
 from IPython.core.profiledir import ProfileDir
 from IPython.core.usage import default_banner
 from IPython.display import display
@@ -74,6 +77,7 @@
 from IPython.utils.syspathcontext import prepended_to_syspath
 from IPython.utils.text import format_screen, LSString, SList, DollarFormatter
 from IPython.utils.tempdir import TemporaryDirectory
+from IPython.utils.timing import record_span
 from traitlets import (
     Integer, Bool, CaselessStrEnum, Enum, List, Dict, Unicode, Instance, Type,
     observe, default, validate, Any
@@ -167,7 +171,8 @@ def removed_co_newlocals(function:types.FunctionType) -> types.FunctionType:
 # we still need to run things using the asyncio eventloop, but there is no
 # async integration
 from .async_helpers import (_asyncio_runner,  _asyncify, _pseudo_sync_runner)
-from .async_helpers import _curio_runner, _trio_runner, _should_be_async
+from .async_helpers import (_curio_runner, _trio_runner, _should_be_async,
+                            _has_top_level_await)
 
 
 def _ast_asyncify(cell:str, wrapper_name:str) -> ast.Module:
@@ -309,12 +314,20 @@ class ExecutionResult(object):
     """The result of a call to :meth:`InteractiveShell.run_cell`
 
     Stores information about what took place.
+
+    When :attr:`InteractiveShell.record_timings` is on, :attr:`spans` lists
+    the phases the cell went through, as ``(phase, start, wall, cpu, blocks)``
+    tuples (see :func:`IPython.utils.timing.record_span`); blocks is None
+    unless :attr:`InteractiveShell.record_allocations` is on. The phases are
+    ``transform``, ``parse``, ``ast_transform``, ``compile``, ``exec``,
+    ``displayhook`` and ``history``; ``displayhook`` runs within ``exec``.
     """
     execution_count = None
     error_before_exec = None
     error_in_exec = None
     info = None
     result = None
+    spans = None
 
     def __init__(self, info):
         self.info = info
@@ -323,6 +336,49 @@ def __init__(self, info):
     def success(self):
         return (self.error_before_exec is None) and (self.error_in_exec is None)
 
+    @property
+    def timings(self):
+        """Time spent in each phase, as ``{phase: (wall, cpu, blocks)}``.
+
+        Wall clock and CPU times are in seconds, blocks is the change in the
+        number of memory blocks allocated, or None if it was not recorded.
+        Phases run several times, like ``compile`` and ``exec`` for a cell of
+        several statements, are summed.
+        """
+        timings = {}
+        for name, _, wall, cpu, blocks in self.spans or ():
+            w, c, b = timings.get(name, (0., 0., None))
+            if blocks is not None:
+                b = (b or 0) + blocks
+            timings[name] = (w + wall, c + cpu, b)
+        return timings
+
+    def trace_events(self, pid=None, tid=0):
+        """Return the spans as Chrome trace events.
+
+        These are "complete" events, as read by ``chrome://tracing`` and
+        Perfetto, within one event covering the whole cell.
+        """
+        if not self.spans:
+            return []
+        if pid is None:
+            pid = os.getpid()
+        begin = min(span[1] for span in self.spans)
+        end = max(span[1] + span[2] for span in self.spans)
+        cell = {'name': 'cell', 'cat': 'run_cell', 'ph': 'X', 'pid': pid,
+                'tid': tid, 'ts': 1e6 * begin, 'dur': 1e6 * (end - begin),
+                'args': {'execution_count': self.execution_count,
+                         'success': self.success}}
+        events = [cell]
+        for name, start, wall, cpu, blocks in self.spans:
+            args = {'cpu': cpu}
+            if blocks is not None:
+                args['blocks'] = blocks
+            events.append({'name': name, 'cat': 'run_cell', 'ph': 'X',
+                           'pid': pid, 'tid': tid, 'ts': 1e6 * start,
+                           'dur': 1e6 * wall, 'args': args})
+        return events
+
     def raise_error(self):
         """Reraises error if `success` is `False`, otherwise does nothing"""
         if self.error_before_exec is not None:
@@ -336,6 +392,70 @@ def __repr__(self):
                 (name, id(self), self.execution_count, self.error_before_exec, self.error_in_exec, repr(self.info), repr(self.result))
 
 
+class _CellPipeline(object):
+    """What is known about a transformed cell on its way to execution.
+
+    Built once per cell by :meth:`InteractiveShell._run_cell` and handed to
+    both :meth:`InteractiveShell.should_run_async` and
+    :meth:`InteractiveShell.run_cell_async`, so that the source is parsed a
+    single time and the cell cache is consulted a single time.
+    """
+
+    def __init__(self, shell, cell, silent=False, shell_futures=True, spans=None):
+        self.cell = cell
+        self.spans = spans
+        self.record_allocations = shell.record_allocations
+        # Our own compiler remembers the __future__ environment. If we want to
+        # run code with a separate __future__ environment, use the default
+        # compiler
+        self.compiler = shell.compile if shell_futures else CachingCompiler()
+        self.interactivity = "none" if silent else shell.ast_node_interactivity
+        self.cell_name = code_name(cell, shell.execution_count)
+        self.autoawait = shell.autoawait
+
+        # Code compiled when the same cell last ran in the same conditions,
+        # see cell_cache_size. AST transformers must see every execution (they
+        # may reject input or have side effects), so they disable the cache.
+        self.cache_key = self.compiled = None
+        if (shell_futures and not shell.ast_transformers
+                and sys.version_info >= (3, 8)):
+            self.cache_key = self.compiler.cell_key(
+                cell, 'code', self.interactivity, shell.autoawait)
+            self.compiled = self.compiler.get_cached_cell(self.cache_key)
+
+        self._tree = self._error = None
+
+    def parse(self):
+        """Parse the cell once, with the compiler flags active.
+
+        Later calls return the same tree, or raise the same exception.
+        """
+        if self._tree is None and self._error is None:
+            try:
+                with record_span(self.spans, 'parse', self.record_allocations):
+                    self._tree = self.compiler.ast_parse(self.cell,
+                                                         filename=self.cell_name)
+            except Exception as e:
+                self._error = e
+        if self._error is not None:
+            raise self._error
+        return self._tree
+
+    @property
+    def is_async(self):
+        """Whether the cell needs to run with a coroutine runner."""
+        if not self.autoawait:
+            return False
+        if self.compiled is not None:
+            return any(async_ for _, async_ in self.compiled[1])
+        if sys.version_info < (3, 8):
+            return _should_be_async(self.cell)
+        try:
+            return _has_top_level_await(self.parse())
+        except Exception:
+            return False
+
+
 class InteractiveShell(SingletonConfigurable):
     """An enhanced, interactive shell for Python."""
 
@@ -425,6 +545,20 @@ def _import_runner(self, proposal):
         time re-flushing a too small cache than working
         """
     ).tag(config=True)
+    cell_cache_size = Integer(128, help=
+        """
+        Number of cells whose transformed source and compiled code are kept,
+        so that running the same cell again skips transforming, parsing and
+        compiling it. Set to 0 to disable this cache.
+        """
+    ).tag(config=True)
+
+    @observe('cell_cache_size')
+    def _cell_cache_size_changed(self, change):
+        if hasattr(self, 'compile'):
+            self.compile.cell_cache_size = change['new']
+            self.compile._cell_cache.clear()
+
     color_info = Bool(True, help=
         """
         Use colors for displaying information about objects. Because this
@@ -567,10 +701,56 @@ def _prompt_trait_changed(self, change):
         help='Total length of command history'
     ).tag(config=True)
 
-    history_load_length = Integer(1000, help=
+    history_load_length = Integer(1000, allow_none=True, help=
         """
         The number of saved history entries to be loaded
-        into the history buffer at startup.
+        into the history buffer at startup. Entries are loaded in the
+        background, most recent first; set to None to load the whole
+        history database.
+        """
+    ).tag(config=True)
+
+    profile_db = CaselessStrEnum(('sqlite', 'pickleshare'), default_value='sqlite', help=
+        """
+        Storage of the profile database (the ``db`` attribute of the shell),
+        where %store, %bookmark and the directory history keep their data.
+        ``sqlite`` uses the db.sqlite file of the profile, into which the
+        ``pickleshare`` one, a directory with a file per key, is imported the
+        first time.
+        """
+    ).tag(config=True)
+
+    profile_db_journal_mode = CaselessStrEnum(
+        ('delete', 'truncate', 'persist', 'wal'), default_value='wal', help=
+        """
+        SQLite journal mode of the profile database. ``wal`` needs shared
+        memory, which network file systems such as NFS may not support: use
+        ``delete`` there.
+        """
+    ).tag(config=True)
+
+    record_timings = Bool(True, help=
+        """
+        Record the time and CPU time taken by each phase of running a cell in
+        the spans of its ExecutionResult, which handlers of the post_run_cell
+        event receive.
+        """
+    ).tag(config=True)
+
+    record_allocations = Bool(False, help=
+        """
+        Also record the change in the number of memory blocks allocated by
+        each phase of running a cell. Counting the blocks takes time
+        proportional to the number of live objects, twice per phase and
+        statement, which adds up with a large heap. Requires record_timings.
+        """
+    ).tag(config=True)
+
+    timings_trace_file = Unicode('', help=
+        """
+        File to append the timings of each cell to, as Chrome trace events
+        that chrome://tracing or https://ui.perfetto.dev can open. Requires
+        record_timings.
         """
     ).tag(config=True)
 
@@ -656,7 +836,7 @@ def __init__(self, ipython_dir=None, profile_dir=None,
         # While we're trying to have each part of the code directly access what
         # it needs without keeping redundant references to objects, we have too
         # much legacy code that expects ip.db to exist.
-        self.db = PickleShareDB(os.path.join(self.profile_dir.location, 'db'))
+        self.init_db()
 
         self.init_history()
         self.init_encoding()
@@ -736,6 +916,16 @@ def init_ipython_dir(self, ipython_dir):
 
         self.ipython_dir = get_ipython_dir()
 
+    def init_db(self):
+        """Open the profile database, see profile_db"""
+        db_dir = os.path.join(self.profile_dir.location, 'db')
+        if self.profile_db == 'pickleshare':
+            self.db = PickleShareDB(db_dir)
+        else:
+            self.db = ProfileDB(os.path.join(self.profile_dir.location, 'db.sqlite'),
+                                migrate_from=db_dir,
+                                journal_mode=self.profile_db_journal_mode)
+
     def init_profile_dir(self, profile_dir):
         if profile_dir is not None:
             self.profile_dir = profile_dir
@@ -749,6 +939,7 @@ def init_instance_attrs(self):
 
         # command compiler
         self.compile = CachingCompiler()
+        self.compile.cell_cache_size = self.cell_cache_size
 
         # Make an empty namespace, which extension writers can rely on both
         # existing and NEVER being used by ipython itself.  This gives them a
@@ -2162,6 +2353,8 @@ def init_completer(self):
                                      parent=self,
                                      )
         self.configurables.append(self.Completer)
+        # Executing code may change the namespace completions come from
+        self.events.register('post_execute', self.Completer.clear_completion_cache)
 
         # Add custom completers to the basic ones built into IPCompleter
         sdisp = self.strdispatchers.get('complete_command', StrDispatch())
@@ -2884,21 +3077,45 @@ def run_cell(self, raw_cell, store_history=False, silent=False, shell_futures=Tr
             self.events.trigger('post_execute')
             if not silent:
                 self.events.trigger('post_run_cell', result)
+        if self.timings_trace_file and result is not None and result.spans:
+            self._write_trace_events(result)
         return result
 
+    def _write_trace_events(self, result):
+        """Append the timings of a cell to timings_trace_file.
+
+        The file is in the JSON array trace format, which may be left without
+        its closing bracket, so events are appended as they come.
+        """
+        path = os.path.expanduser(self.timings_trace_file)
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                if f.tell() == 0:
+                    f.write('[\n')
+                for event in result.trace_events():
+                    f.write(json.dumps(event) + ',\n')
+        except OSError as e:
+            warn("Could not write timings to %s: %s" % (path, e))
+
     def _run_cell(self, raw_cell:str, store_history:bool, silent:bool, shell_futures:bool) -> ExecutionResult:
         """Internal method to run a complete IPython cell."""
 
         # we need to avoid calling self.transform_cell multiple time on the same thing
         # so we need to store some results:
         preprocessing_exc_tuple = None
+        spans = [] if self.record_timings else None
         try:
-            transformed_cell = self.transform_cell(raw_cell)
+            with record_span(spans, 'transform', self.record_allocations):
+                transformed_cell = self.transform_cell(raw_cell)
         except Exception:
             transformed_cell = raw_cell
             preprocessing_exc_tuple = sys.exc_info()
 
         assert transformed_cell is not None
+        pipeline = None
+        if preprocessing_exc_tuple is None:
+            pipeline = _CellPipeline(self, transformed_cell, silent,
+                                     shell_futures, spans)
         coro = self.run_cell_async(
             raw_cell,
             store_history=store_history,
@@ -2906,6 +3123,7 @@ def _run_cell(self, raw_cell:str, store_history:bool, silent:bool, shell_futures
             shell_futures=shell_futures,
             transformed_cell=transformed_cell,
             preprocessing_exc_tuple=preprocessing_exc_tuple,
+            _pipeline=pipeline,
         )
 
         # run_cell_async is async, but may not actually need an eventloop.
@@ -2918,6 +3136,7 @@ def _run_cell(self, raw_cell:str, store_history:bool, silent:bool, shell_futures
             raw_cell,
             transformed_cell=transformed_cell,
             preprocessing_exc_tuple=preprocessing_exc_tuple,
+            _pipeline=pipeline,
         ):
             runner = self.loop_runner
         else:
@@ -2933,7 +3152,8 @@ def _run_cell(self, raw_cell:str, store_history:bool, silent:bool, shell_futures
             return result
 
     def should_run_async(
-        self, raw_cell: str, *, transformed_cell=None, preprocessing_exc_tuple=None
+        self, raw_cell: str, *, transformed_cell=None, preprocessing_exc_tuple=None,
+        _pipeline=None
     ) -> bool:
         """Return whether a cell should be run asynchronously via a coroutine runner
 
@@ -2954,6 +3174,8 @@ def should_run_async(
         if preprocessing_exc_tuple is not None:
             return False
         assert preprocessing_exc_tuple is None
+        if _pipeline is not None:
+            return _pipeline.is_async
         if transformed_cell is None:
             warnings.warn(
                 "`should_run_async` will not call `transform_cell`"
@@ -2983,7 +3205,8 @@ async def run_cell_async(
         shell_futures=True,
         *,
         transformed_cell: Optional[str] = None,
-        preprocessing_exc_tuple: Optional[Any] = None
+        preprocessing_exc_tuple: Optional[Any] = None,
+        _pipeline: Optional[_CellPipeline] = None
     ) -> ExecutionResult:
         """Run a complete IPython cell asynchronously.
 
@@ -3017,6 +3240,11 @@ async def run_cell_async(
         info = ExecutionInfo(
             raw_cell, store_history, silent, shell_futures)
         result = ExecutionResult(info)
+        if self.record_timings:
+            result.spans = []
+            if _pipeline is not None and _pipeline.spans is not None:
+                # Already holds the transform and parse phases
+                result.spans = _pipeline.spans
 
         if (not raw_cell) or raw_cell.isspace():
             self.last_execution_succeeded = True
@@ -3071,8 +3299,9 @@ def error_before_exec(value):
 
         # Store raw and processed history
         if store_history:
-            self.history_manager.store_inputs(self.execution_count,
-                                              cell, raw_cell)
+            with record_span(result.spans, 'history', self.record_allocations):
+                self.history_manager.store_inputs(self.execution_count,
+                                                  cell, raw_cell)
         if not silent:
             self.logger.log(cell, raw_cell)
 
@@ -3083,10 +3312,11 @@ def error_before_exec(value):
                 self.execution_count += 1
             return error_before_exec(preprocessing_exc_tuple[1])
 
-        # Our own compiler remembers the __future__ environment. If we want to
-        # run code with a separate __future__ environment, use the default
-        # compiler
-        compiler = self.compile if shell_futures else CachingCompiler()
+        pipeline = _pipeline
+        if pipeline is None or pipeline.cell_name != code_name(cell, self.execution_count):
+            pipeline = _CellPipeline(self, cell, silent, shell_futures,
+                                     result.spans)
+        compiler = pipeline.compiler
 
         _run_async = False
 
@@ -3094,60 +3324,79 @@ def error_before_exec(value):
             cell_name = self.compile.cache(cell, self.execution_count)
 
             with self.display_trap:
-                # Compile to bytecode
-                try:
-                    if sys.version_info < (3,8) and self.autoawait:
-                        if _should_be_async(cell):
-                            # the code AST below will not be user code: we wrap it
-                            # in an `async def`. This will likely make some AST
-                            # transformer below miss some transform opportunity and
-                            # introduce a small coupling to run_code (in which we
-                            # bake some assumptions of what _ast_asyncify returns.
-                            # they are ways around (like grafting part of the ast
-                            # later:
-                            #    - Here, return code_ast.body[0].body[1:-1], as well
-                            #    as last expression in  return statement which is
-                            #    the user code part.
-                            #    - Let it go through the AST transformers, and graft
-                            #    - it back after the AST transform
-                            # But that seem unreasonable, at least while we
-                            # do not need it.
-                            code_ast = _ast_asyncify(cell, 'async-def-wrapper')
-                            _run_async = True
+                interactivity = pipeline.interactivity
+                cache_key, compiled = pipeline.cache_key, pipeline.compiled
+                if self.ast_transformers:
+                    # Added by a pre_run_cell handler, after the lookup
+                    cache_key = compiled = None
+                if compiled is not None:
+                    compiler.flags, codes = compiled
+                    # Give the displayhook a reference to our ExecutionResult
+                    # so it can fill in the output value.
+                    self.displayhook.exec_result = result
+                    has_raised = await self.run_compiled_nodes(
+                        [(code_with_filename(code, cell_name), async_)
+                         for code, async_ in codes], result=result)
+                else:
+                    # Compile to bytecode
+                    try:
+                        if sys.version_info < (3,8) and self.autoawait:
+                            if _should_be_async(cell):
+                                # the code AST below will not be user code: we wrap it
+                                # in an `async def`. This will likely make some AST
+                                # transformer below miss some transform opportunity and
+                                # introduce a small coupling to run_code (in which we
+                                # bake some assumptions of what _ast_asyncify returns.
+                                # they are ways around (like grafting part of the ast
+                                # later:
+                                #    - Here, return code_ast.body[0].body[1:-1], as well
+                                #    as last expression in  return statement which is
+                                #    the user code part.
+                                #    - Let it go through the AST transformers, and graft
+                                #    - it back after the AST transform
+                                # But that seem unreasonable, at least while we
+                                # do not need it.
+                                code_ast = _ast_asyncify(cell, 'async-def-wrapper')
+                                _run_async = True
+                            else:
+                                code_ast = pipeline.parse()
                         else:
-                            code_ast = compiler.ast_parse(cell, filename=cell_name)
-                    else:
-                        code_ast = compiler.ast_parse(cell, filename=cell_name)
-                except self.custom_exceptions as e:
-                    etype, value, tb = sys.exc_info()
-                    self.CustomTB(etype, value, tb)
-                    return error_before_exec(e)
-                except IndentationError as e:
-                    self.showindentationerror()
-                    return error_before_exec(e)
-                except (OverflowError, SyntaxError, ValueError, TypeError,
-                        MemoryError) as e:
-                    self.showsyntaxerror()
-                    return error_before_exec(e)
-
-                # Apply AST transformations
-                try:
-                    code_ast = self.transform_ast(code_ast)
-                except InputRejected as e:
-                    self.showtraceback()
-                    return error_before_exec(e)
-
-                # Give the displayhook a reference to our ExecutionResult so it
-                # can fill in the output value.
-                self.displayhook.exec_result = result
-
-                # Execute the user code
-                interactivity = "none" if silent else self.ast_node_interactivity
-                if _run_async:
-                    interactivity = 'async'
-
-                has_raised = await self.run_ast_nodes(code_ast.body, cell_name,
-                       interactivity=interactivity, compiler=compiler, result=result)
+                            code_ast = pipeline.parse()
+                    except self.custom_exceptions as e:
+                        etype, value, tb = sys.exc_info()
+                        self.CustomTB(etype, value, tb)
+                        return error_before_exec(e)
+                    except IndentationError as e:
+                        self.showindentationerror()
+                        return error_before_exec(e)
+                    except (OverflowError, SyntaxError, ValueError, TypeError,
+                            MemoryError) as e:
+                        self.showsyntaxerror()
+                        return error_before_exec(e)
+
+                    # Apply AST transformations
+                    try:
+                        with record_span(result.spans, 'ast_transform',
+                                         self.record_allocations):
+                            code_ast = self.transform_ast(code_ast)
+                    except InputRejected as e:
+                        self.showtraceback()
+                        return error_before_exec(e)
+
+                    # Give the displayhook a reference to our ExecutionResult so it
+                    # can fill in the output value.
+                    self.displayhook.exec_result = result
+
+                    # Execute the user code
+                    if _run_async:
+                        interactivity = 'async'
+
+                    codes = [] if cache_key is not None else None
+                    has_raised = await self.run_ast_nodes(code_ast.body, cell_name,
+                           interactivity=interactivity, compiler=compiler, result=result,
+                           _compiled=codes)
+                    if codes:
+                        compiler.cache_cell(cache_key, (compiler.flags, codes))
 
                 self.last_execution_succeeded = not has_raised
                 self.last_execution_result = result
@@ -3159,7 +3408,8 @@ def error_before_exec(value):
         if store_history:
             # Write output to the database. Does nothing unless
             # history output logging is enabled.
-            self.history_manager.store_output(self.execution_count)
+            with record_span(result.spans, 'history', self.record_allocations):
+                self.history_manager.store_output(self.execution_count)
             # Each cell is a *single* input, regardless of how many lines it has
             self.execution_count += 1
 
@@ -3179,7 +3429,16 @@ def transform_cell(self, raw_cell):
         see :meth:`transform_ast`.
         """
         # Static input transformations
-        cell = self.input_transformer_manager.transform_cell(raw_cell)
+        manager = self.input_transformer_manager
+        # The key holds the transformers themselves, not their ids, which may
+        # be reused by new transformers once the old ones are gone.
+        key = self.compile.cell_key(
+            raw_cell, 'transform', *manager.cleanup_transforms,
+            *manager.line_transforms, *manager.token_transformers)
+        cell = self.compile.get_cached_cell(key)
+        if cell is None:
+            cell = manager.transform_cell(raw_cell)
+            self.compile.cache_cell(key, cell)
 
         if len(cell.splitlines()) == 1:
             # Dynamic transformations - only applied for single line commands
@@ -3227,7 +3486,7 @@ def transform_ast(self, node):
         return node
 
     async def run_ast_nodes(self, nodelist:ListType[AST], cell_name:str, interactivity='last_expr',
-                        compiler=compile, result=None):
+                        compiler=compile, result=None, *, _compiled=None):
         """Run a sequence of AST nodes. The execution mode depends on the
         interactivity parameter.
 
@@ -3257,6 +3516,10 @@ async def run_ast_nodes(self, nodelist:ListType[AST], cell_name:str, interactivi
           the AST nodes into code objects. Default is the built-in compile().
         result : ExecutionResult, optional
           An object to store exceptions that occur during execution.
+        _compiled : list, optional
+          If all the nodes compiled and ran without error, filled with
+          ``(code, async_)`` pairs that :meth:`run_compiled_nodes` can run
+          again.
 
         Returns
         -------
@@ -3300,6 +3563,7 @@ async def run_ast_nodes(self, nodelist:ListType[AST], cell_name:str, interactivi
         else:
             raise ValueError("Interactivity was %r" % interactivity)
 
+        spans = result.spans if result is not None else None
         try:
             if _async and sys.version_info > (3,8):
                 raise ValueError("This branch should never happen on Python 3.8 and above, "
@@ -3330,16 +3594,23 @@ def compare(code):
                 for node in to_run_interactive:
                     to_run.append((node, 'single'))
 
+                codes = []
                 for node,mode in to_run:
                     if mode == 'exec':
                         mod = Module([node], [])
                     elif mode == 'single':
                         mod = ast.Interactive([node])
-                    with compiler.extra_flags(getattr(ast, 'PyCF_ALLOW_TOP_LEVEL_AWAIT', 0x0) if self.autoawait else 0x0):
+                    with compiler.extra_flags(getattr(ast, 'PyCF_ALLOW_TOP_LEVEL_AWAIT', 0x0) if self.autoawait else 0x0), \
+                            record_span(spans, 'compile', self.record_allocations):
                         code = compiler(mod, cell_name, mode)
                         asy = compare(code)
-                    if (await self.run_code(code, result,  async_=asy)):
+                    codes.append((code, asy))
+                    with record_span(spans, 'exec', self.record_allocations):
+                        has_raised = await self.run_code(code, result, async_=asy)
+                    if has_raised:
                         return True
+                if _compiled is not None:
+                    _compiled.extend(codes)
 
             # Flush softspace
             if softspace(sys.stdout, 0):
@@ -3362,6 +3633,32 @@ def compare(code):
 
         return False
 
+    async def run_compiled_nodes(self, codes, result=None):
+        """Run code objects compiled by :meth:`run_ast_nodes`.
+
+        Parameters
+        ----------
+        codes : list
+          ``(code, async_)`` pairs, see :meth:`run_code`.
+        result : ExecutionResult, optional
+          An object to store exceptions that occur during execution.
+
+        Returns
+        -------
+        True if an exception occurred while running code, False if it finished
+        running.
+        """
+        spans = result.spans if result is not None else None
+        for code, async_ in codes:
+            with record_span(spans, 'exec', self.record_allocations):
+                has_raised = await self.run_code(code, result, async_=async_)
+            if has_raised:
+                return True
+        # Flush softspace
+        if softspace(sys.stdout, 0):
+            print()
+        return False
+
     def _async_exec(self, code_obj: types.CodeType, user_ns: dict):
         """
         Evaluate an asynchronous code object using a code runner
@@ -593,6 +593,92 @@ def notebook(self, s):
         with io.open(args.filename, 'w', encoding='utf-8') as f:
             write(nb, f, version=4)
 
+    @magic_arguments.magic_arguments()
+    @magic_arguments.argument(
+        '-c', '--clear', action='store_true', default=False,
+        help='Forget the timings recorded so far.'
+    )
+    @magic_arguments.argument(
+        '--disable', action='append', default=[], metavar='MATCHER',
+        help='Skip the given matcher; can be repeated.'
+    )
+    @magic_arguments.argument(
+        '--enable', action='append', default=[], metavar='MATCHER',
+        help='Run again a matcher previously disabled; can be repeated.'
+    )
+    @magic_arguments.argument(
+        '--order', nargs='+', metavar='MATCHER',
+        help='Run the given matchers first, in this order.'
+    )
+    @line_magic
+    def completion_profile(self, parameter_s=''):
+        """Show how long each completion matcher takes.
+
+        Every call to a matcher is timed (see
+        ``IPCompleter.matcher_timings_size``). Without options, print for each
+        matcher the number of calls, the mean number of candidates it returned,
+        and percentiles of its latency in milliseconds. The options allow to
+        disable the slowest matchers, or to change the order in which they run,
+        for the rest of the session; use the ``IPCompleter.disabled_matchers``
+        and ``IPCompleter.matcher_order`` options to make this permanent.
+
+        Examples
+        --------
+        ::
+
+            In [1]: %completion_profile
+            In [2]: %completion_profile --disable file_matches
+            In [3]: %completion_profile --order dict_key_matches python_matches
+        """
+        args = magic_arguments.parse_argstring(self.completion_profile,
+                                               parameter_s)
+        completer = self.shell.Completer
+        changed = False
+        if args.clear:
+            completer.matcher_timings.clear()
+            changed = True
+        if args.disable or args.enable:
+            disabled = [m for m in completer.disabled_matchers
+                        if m not in args.enable]
+            disabled += [m for m in args.disable if m not in disabled]
+            completer.disabled_matchers = disabled
+            changed = True
+        if args.order:
+            completer.matcher_order = args.order
+            changed = True
+        if changed:
+            return
+
+        stats = {}
+        for timing in completer.matcher_timings:
+            stats.setdefault(timing.matcher, []).append(timing)
+        if not stats:
+            print('No completion recorded yet.')
+            return
+
+        def percentile(values, p):
+            return values[min(len(values) - 1, int(p * len(values)))] * 1e3
+
+        header = '%-40s %6s %8s %8s %8s %8s %8s' % (
+            'matcher', 'calls', 'matches', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms')
+        lines = [header, '-' * len(header)]
+        rows = []
+        for name, timings in stats.items():
+            seconds = sorted(t.seconds for t in timings)
+            matches = sum(t.matches for t in timings) / len(timings)
+            rows.append((percentile(seconds, 0.9), name, len(timings), matches,
+                         percentile(seconds, 0.5), percentile(seconds, 0.99),
+                         seconds[-1] * 1e3))
+        for p90, name, calls, matches, p50, p99, worst in sorted(rows, reverse=True):
+            lines.append('%-40s %6d %8.1f %8.2f %8.2f %8.2f %8.2f' % (
+                name, calls, matches, p50, p90, p99, worst))
+        if completer.disabled_matchers:
+            lines.append('')
+            lines.append('Disabled: ' + ', '.join(completer.disabled_matchers))
+        if completer.matcher_order:
+            lines.append('Order: ' + ', '.join(completer.matcher_order))
+        print('\n'.join(lines))
+
 @magics_class
 class AsyncMagics(BasicMagics):
 
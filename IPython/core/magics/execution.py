@@ -8,15 +8,19 @@
 import ast
 import bdb
 import builtins as builtin_mod
+import contextlib
 import gc
 import itertools
+import json
 import os
 import shlex
 import sys
 import time
 import timeit
+import tracemalloc
 import math
 import re
+import tokenize
 from pdb import Restart
 
 import cProfile as profile
@@ -30,6 +34,8 @@
 from IPython.core.magic import (Magics, magics_class, line_magic, cell_magic,
                                 line_cell_magic, on_off, needs_local_scope,
                                 no_var_expand)
+from IPython.lib.lineprofiler import LineProfiler
+from IPython.lib.sampling import StackSampler
 from IPython.testing.skipdoctest import skip_doctest
 from IPython.utils.contexts import preserve_keys
 from IPython.utils.capture import capture_output
@@ -68,8 +74,20 @@ class TimeitResult(object):
     best: (float) best execution time / number
     all_runs: (list of float) execution time of each run (in s)
     compile_time: (float) time of statement compilation (s)
-
+    stmt: (str) the statement that was timed, if known
+    memory: (MemoryTracer) memory allocated by one loop, with ``%timeit -m``
+    baseline: (TimeitResult) the saved result compared to, with
+    ``%timeit --compare``
+
+    The ``median``, ``iqr`` and ``outliers`` properties describe the timings
+    once outliers are rejected, and :meth:`compare` tests whether they differ
+    significantly from another result's, such as a baseline saved with
+    :meth:`to_dict` and loaded with :meth:`from_dict`.
     """
+    stmt = None
+    memory = None
+    baseline = None
+
     def __init__(self, loops, repeat, best, worst, all_runs, compile_time, precision):
         self.loops = loops
         self.repeat = repeat
@@ -89,6 +107,66 @@ def stdev(self):
         mean = self.average
         return (math.fsum([(x - mean) ** 2 for x in self.timings]) / len(self.timings)) ** 0.5
 
+    @property
+    def kept_timings(self):
+        """Timings per loop within 1.5 IQR of the quartiles (Tukey's fences)"""
+        q1, _, q3 = _quartiles(self.timings)
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        return [t for t in self.timings if low <= t <= high]
+
+    @property
+    def outliers(self):
+        """Number of timings rejected as outliers"""
+        return len(self.timings) - len(self.kept_timings)
+
+    @property
+    def median(self):
+        """Median time per loop, outliers excluded"""
+        return _quartiles(self.kept_timings)[1]
+
+    @property
+    def iqr(self):
+        """Interquartile range of the times per loop, outliers excluded"""
+        q1, _, q3 = _quartiles(self.kept_timings)
+        return q3 - q1
+
+    def compare(self, baseline):
+        """Compare these timings to those of a `baseline` result.
+
+        Returns ``(ratio, p)``: the ratio of the medians, above 1 when this
+        result is slower, and the two-sided p-value of a Mann-Whitney U test
+        that both sets of timings come from the same distribution.
+        """
+        return self.median / baseline.median, _mann_whitney(self.timings, baseline.timings)
+
+    def to_dict(self):
+        """Return the result as a dict, for :meth:`from_dict` to load"""
+        return {'loops': self.loops, 'repeat': self.repeat,
+                'all_runs': self.all_runs, 'compile_time': self.compile_time}
+
+    @classmethod
+    def from_dict(cls, data, precision=3):
+        """Make a result out of a dict returned by :meth:`to_dict`"""
+        all_runs = data['all_runs']
+        loops = data['loops']
+        return cls(loops, data['repeat'], min(all_runs) / loops,
+                   max(all_runs) / loops, all_runs, data['compile_time'], precision)
+
+    def format_stats(self):
+        """Describe the median and IQR of the timings, as a string"""
+        return (
+            u"{median} median, {iqr} IQR per loop ({runs} run{run_plural}, {loops} loop{loop_plural} each, {outliers} outlier{outlier_plural} rejected)"
+                .format(
+                    runs = self.repeat,
+                    loops = self.loops,
+                    outliers = self.outliers,
+                    loop_plural = "" if self.loops == 1 else "s",
+                    run_plural = "" if self.repeat == 1 else "s",
+                    outlier_plural = "" if self.outliers == 1 else "s",
+                    median = _format_time(self.median, self._precision),
+                    iqr = _format_time(self.iqr, self._precision))
+                )
+
     def __str__(self):
         pm = '+-'
         if hasattr(sys.stdout, 'encoding') and sys.stdout.encoding:
@@ -114,6 +192,62 @@ def _repr_pretty_(self, p , cycle):
         p.text(u'<TimeitResult : '+unic+u'>')
 
 
+class MemoryTracer(object):
+    """Measure the memory allocated by code run in a ``with`` block.
+
+    Uses :mod:`tracemalloc`, which is started for the duration of the block
+    if it is not tracing already. Afterwards:
+
+    peak: (int) highest memory allocated during the block, over what was
+    allocated when it started (bytes), or None if it can not be measured
+    net: (int) memory allocated during the block and still held (bytes)
+    top_lines: (list) up to `top` ``(filename, lineno, size)`` triples, the
+    lines which allocated most of `net`
+
+    Peak memory can not be measured on Python < 3.9 when tracemalloc was
+    already tracing.
+    """
+    def __init__(self, top=0):
+        self.top = top
+        self.peak = self.net = None
+        self.top_lines = []
+
+    def __enter__(self):
+        self._started = not tracemalloc.is_tracing()
+        self._has_peak = True
+        if self._started:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        else:
+            self._has_peak = False
+        self._snapshot = tracemalloc.take_snapshot() if self.top else None
+        self._start = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        current, peak = tracemalloc.get_traced_memory()
+        self.net = current - self._start
+        if self._has_peak:
+            self.peak = max(peak - self._start, self.net, 0)
+        if self.top:
+            # Leave out the measuring code itself
+            ignore = [tracemalloc.Filter(False, filename) for filename in
+                      (tracemalloc.__file__, __file__, clock2.__code__.co_filename)]
+            stats = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(
+                self._snapshot.filter_traces(ignore), 'lineno')
+            self.top_lines = [(stat.traceback[0].filename, stat.traceback[0].lineno,
+                               stat.size_diff)
+                              for stat in stats[:self.top] if stat.size_diff > 0]
+        self._snapshot = None
+        if self._started:
+            tracemalloc.stop()
+
+    def __str__(self):
+        peak = 'n/a' if self.peak is None else _format_bytes(self.peak)
+        return u"peak %s, net %s" % (peak, _format_bytes(self.net))
+
+
 class TimeitTemplateFiller(ast.NodeTransformer):
     """Fill in the AST template for timing execution.
 
@@ -282,6 +416,26 @@ def prun(self, parameter_s='', cell=None):
         -q
           suppress output to the pager.  Best used with -T and/or -D above.
 
+        --sample
+          instead of tracing every call with cProfile, sample the call stack
+          at regular intervals from a background thread (see
+          :class:`IPython.lib.sampling.StackSampler`). The overhead is much
+          lower, so long running or numeric code can be profiled without
+          distorting it, but the results are statistical. In this mode:
+
+             * The report lists the functions seen most often in the samples.
+               ``-s cumulative`` sorts them by samples in the function and
+               the ones it called instead of in the function itself.
+             * ``-l`` takes an integer number of functions to list (20 by
+               default) or strings to look for in their names.
+             * ``-D`` writes the samples as collapsed stacks, for flame graph
+               tools, or in the speedscope format if the file name ends in
+               ``.json``.
+             * ``-r`` returns the :class:`~IPython.lib.sampling.StackSampler`.
+
+        --interval <seconds>
+          time between two samples with ``--sample`` (default 0.001).
+
         If you want to run complete programs under the profiler's control, use
         ``%run -p [prof_opts] filename.py [args to program]`` where prof_opts
         contains profiler specific options as described here.
@@ -296,10 +450,13 @@ def prun(self, parameter_s='', cell=None):
 
         """
         opts, arg_str = self.parse_options(parameter_s, 'D:l:rs:T:q',
+                                           'sample', 'interval=',
                                            list_all=True, posix=False)
         if cell is not None:
             arg_str += '\n' + cell
         arg_str = self.shell.transform_cell(arg_str)
+        if 'sample' in opts:
+            return self._run_with_sampler(arg_str, opts, self.shell.user_ns)
         return self._run_with_profiler(arg_str, opts, self.shell.user_ns)
 
     def _run_with_profiler(self, code, opts, namespace):
@@ -378,6 +535,154 @@ def _run_with_profiler(self, code, opts, namespace):
 
         return None
 
+    def _run_with_sampler(self, code, opts, namespace):
+        """
+        Run `code` with the sampling profiler.  Used by ``%prun --sample``.
+
+        Parameters are the same as for :meth:`_run_with_profiler`.
+        """
+        opts.merge(Struct(D=[''], l=[], s=['time'], T=[''], interval=['0.001']))
+
+        try:
+            interval = float(opts.interval[-1])
+            sampler = StackSampler(interval)
+        except ValueError as e:
+            raise UsageError("Invalid sampling interval: %s" % opts.interval[-1]) from e
+
+        limit, restrict = 20, []
+        for lim in opts.l:
+            try:
+                limit = int(lim)
+            except ValueError:
+                restrict.append(lim)
+        sort = 'total' if opts.s[0].startswith('cum') else 'self'
+
+        sys_exit = ''
+        with sampler:
+            try:
+                exec(code, namespace, namespace)
+            except SystemExit:
+                sys_exit = """*** SystemExit exception caught in code being profiled."""
+
+        output = sampler.summary(limit=limit, sort=sort, restrict=restrict)
+
+        if 'q' not in opts:
+            page.page(output)
+        print(sys_exit, end=' ')
+
+        dump_file = opts.D[0]
+        text_file = opts.T[0]
+        if dump_file:
+            sampler.dump(dump_file)
+            print(
+                f"\n*** Profile samples written to file {repr(dump_file)}.{sys_exit}"
+            )
+        if text_file:
+            Path(text_file).write_text(output)
+            print(
+                f"\n*** Profile printout saved to text file {repr(text_file)}.{sys_exit}"
+            )
+
+        if 'r' in opts:
+            return sampler
+
+        return None
+
+    @skip_doctest
+    @no_var_expand
+    @line_cell_magic
+    def lprun(self, parameter_s='', cell=None):
+        """Run a statement through the line profiler.
+
+        Usage, in line mode:
+          %lprun -f func [-f func2 ...] [options] statement
+
+        Usage, in cell mode:
+          %%lprun -f func [-f func2 ...] [options] [statement]
+          code...
+          code...
+
+        The statement is run like with %prun, while the functions given with
+        -f are profiled line by line: for each line, the number of times it
+        ran, the time it took in total and per hit, including the functions
+        it called, and its share of the function's time are shown next to
+        its source.
+
+        Only the code of these functions is monitored, through
+        ``sys.monitoring`` on Python 3.12 and above, so the rest of the
+        program runs at full speed. On older versions ``sys.settrace`` is
+        used, which slows down every function call.
+
+        Options:
+
+        -f <function>
+          an expression evaluating to a function, method or class (all the
+          methods of which are then profiled) in the user namespace. Can be
+          given several times.
+
+        -r
+          return the :class:`IPython.lib.lineprofiler.LineProfiler`, whose
+          ``stats`` attribute holds the results.
+
+        -T <filename>
+          save the report to a text file. It is still shown on screen.
+
+        -q
+          suppress output to the pager.  Best used with -T above.
+
+        Examples
+        --------
+        ::
+
+          In [1]: def f(n):
+             ...:     s = 0
+             ...:     for i in range(n):
+             ...:         s += i * i
+             ...:     return s
+
+          In [2]: %lprun -f f f(10000)
+        """
+        opts, arg_str = self.parse_options(parameter_s, 'f:rT:q',
+                                           list_all=True, posix=False)
+        if cell is not None:
+            arg_str += '\n' + cell
+        if not getattr(opts, 'f', None):
+            raise UsageError("No function to profile, give one with -f")
+
+        prof = LineProfiler()
+        for expr in opts.f:
+            try:
+                func = eval(expr, self.shell.user_ns)
+            except Exception as e:
+                raise UsageError("Could not evaluate %r: %s" % (expr, e)) from e
+            try:
+                prof.add_function(func)
+            except TypeError as e:
+                raise UsageError(str(e)) from e
+
+        arg_str = self.shell.transform_cell(arg_str)
+        sys_exit = ''
+        try:
+            prof.runctx(arg_str, self.shell.user_ns, self.shell.user_ns)
+        except SystemExit:
+            sys_exit = """*** SystemExit exception caught in code being profiled."""
+
+        if 'q' not in opts:
+            page.page(prof.format_stats(style=self.shell.colors))
+        print(sys_exit, end=' ')
+
+        if 'T' in opts:
+            text_file = opts.T[0]
+            Path(text_file).write_text(prof.format_stats())
+            print(
+                f"\n*** Profile printout saved to text file {repr(text_file)}.{sys_exit}"
+            )
+
+        if 'r' in opts:
+            return prof
+
+        return None
+
     @line_magic
     def pdb(self, parameter_s=''):
         """Control the automatic calling of the pdb interactive debugger.
@@ -1003,9 +1308,11 @@ def timeit(self, line='', cell=None, local_ns=None):
         """Time execution of a Python statement or expression
 
         Usage, in line mode:
-          %timeit [-n<N> -r<R> [-t|-c] -q -p<P> -o] statement
+          %timeit [-n<N> -r<R> [-t|-c] -q -p<P> -o -m] [--stats] [--save <file>]
+                  [--compare <file>] statement [;; statement...]
         or in cell mode:
-          %%timeit [-n<N> -r<R> [-t|-c] -q -p<P> -o] setup_code
+          %%timeit [-n<N> -r<R> [-t|-c] -q -p<P> -o -m] [--stats] [--save <file>]
+                   [--compare <file>] setup_code
           code
           code...
 
@@ -1042,6 +1349,26 @@ def timeit(self, line='', cell=None, local_ns=None):
         -o: return a TimeitResult that can be stored in a variable to inspect
             the result in more details.
 
+        -m: also report the peak and net memory allocated by one loop,
+        measured with tracemalloc on an extra, untimed run (which includes
+        the setup code in cell mode).
+
+        --stats: report the median and interquartile range of the timings,
+        after rejecting outliers (timings more than 1.5 IQR away from the
+        quartiles), instead of their mean and standard deviation.
+
+        --save <file>: save the timings to a JSON file, keyed by statement.
+        Results for other statements already in the file are kept.
+
+        --compare <file>: compare the timings to those saved for the same
+        statement in a JSON file by ``--save``, and tell whether the
+        difference is significant (p < 0.05 with a Mann-Whitney U test).
+
+        Several statements separated by ``;;`` are timed side by side: their
+        runs are interleaved so that they see the same conditions, and each
+        statement is compared to the first one. With -o, a list of
+        TimeitResult is returned.
+
         .. versionchanged:: 7.3
             User variables are no longer expanded,
             the magic line is always left unmodified.
@@ -1064,6 +1391,15 @@ def timeit(self, line='', cell=None, local_ns=None):
 
           In [6]: %timeit -n1 time.sleep(2)
 
+          In [7]: %timeit --stats u is None ;; u == None
+          u is None: 13.9 ns median, 0.0865 ns IQR per loop (7 runs, 100000000 loops each, 0 outliers rejected)
+          u == None: 24.9 ns median, 0.24 ns IQR per loop (7 runs, 10000000 loops each, 0 outliers rejected)
+          u == None is 1.79x slower than u is None (p=0.00217)
+
+          In [8]: %timeit --save baseline.json sorted(range(1000))
+
+          In [9]: %timeit --compare baseline.json sorted(range(1000))
+
 
         The times reported by %timeit will be slightly higher than those
         reported by the timeit.py script when variables are accessed. This is
@@ -1073,7 +1409,8 @@ def timeit(self, line='', cell=None, local_ns=None):
         does not matter as long as results from timeit.py are not mixed with
         those from %timeit."""
 
-        opts, stmt = self.parse_options(line,'n:r:tcp:qo',
+        opts, stmt = self.parse_options(line,'n:r:tcp:qom',
+                                        'stats', 'save=', 'compare=',
                                         posix=False, strict=False)
         if stmt == "" and cell is None:
             return
@@ -1090,7 +1427,13 @@ def timeit(self, line='', cell=None, local_ns=None):
         if hasattr(opts, "c"):
             timefunc = clock
 
-        timer = Timer(timer=timefunc)
+        # Read the files first, not to time the code for nothing
+        baselines = saved = None
+        if 'compare' in opts:
+            baselines = _load_timings(opts.compare, missing_ok=False)
+        if 'save' in opts:
+            saved = _load_timings(opts.save, missing_ok=True)
+
         # this code has tight coupling to the inner workings of timeit.Timer,
         # but is there a better way to achieve that the code stmt has access
         # to the shell namespace?
@@ -1099,42 +1442,49 @@ def timeit(self, line='', cell=None, local_ns=None):
         if cell is None:
             # called as line magic
             ast_setup = self.shell.compile.ast_parse("pass")
-            ast_stmt = self.shell.compile.ast_parse(transform(stmt))
+            stmts = _split_statements(stmt)
         else:
             ast_setup = self.shell.compile.ast_parse(transform(stmt))
-            ast_stmt = self.shell.compile.ast_parse(transform(cell))
+            stmts = _split_statements(cell)
+        asts_stmt = [self.shell.compile.ast_parse(transform(s)) for s in stmts]
 
         ast_setup = self.shell.transform_ast(ast_setup)
-        ast_stmt = self.shell.transform_ast(ast_stmt)
+        asts_stmt = [self.shell.transform_ast(a) for a in asts_stmt]
 
         # Check that these compile to valid Python code *outside* the timer func
         # Invalid code may become valid when put inside the function & loop,
         # which messes up error messages.
         # https://github.com/ipython/ipython/issues/10636
         self.shell.compile(ast_setup, "<magic-timeit-setup>", "exec")
-        self.shell.compile(ast_stmt, "<magic-timeit-stmt>", "exec")
-
-        # This codestring is taken from timeit.template - we fill it in as an
-        # AST, so that we can apply our AST transformations to the user code
-        # without affecting the timing code.
-        timeit_ast_template = ast.parse('def inner(_it, _timer):\n'
-                                        '    setup\n'
-                                        '    _t0 = _timer()\n'
-                                        '    for _i in _it:\n'
-                                        '        stmt\n'
-                                        '    _t1 = _timer()\n'
-                                        '    return _t1 - _t0\n')
-
-        timeit_ast = TimeitTemplateFiller(ast_setup, ast_stmt).visit(timeit_ast_template)
-        timeit_ast = ast.fix_missing_locations(timeit_ast)
+        for ast_stmt in asts_stmt:
+            self.shell.compile(ast_stmt, "<magic-timeit-stmt>", "exec")
 
         # Track compilation time so it can be reported if too long
         # Minimum time above which compilation time will be reported
         tc_min = 0.1
 
-        t0 = clock()
-        code = self.shell.compile(timeit_ast, "<magic-timeit>", "exec")
-        tc = clock()-t0
+        timers = []
+        for ast_stmt in asts_stmt:
+            # This codestring is taken from timeit.template - we fill it in as an
+            # AST, so that we can apply our AST transformations to the user code
+            # without affecting the timing code.
+            timeit_ast_template = ast.parse('def inner(_it, _timer):\n'
+                                            '    setup\n'
+                                            '    _t0 = _timer()\n'
+                                            '    for _i in _it:\n'
+                                            '        stmt\n'
+                                            '    _t1 = _timer()\n'
+                                            '    return _t1 - _t0\n')
+
+            timeit_ast = TimeitTemplateFiller(ast_setup, ast_stmt).visit(timeit_ast_template)
+            timeit_ast = ast.fix_missing_locations(timeit_ast)
+
+            t0 = clock()
+            code = self.shell.compile(timeit_ast, "<magic-timeit>", "exec")
+            timer = Timer(timer=timefunc)
+            timer.compile_time = clock()-t0
+            timer.code = code
+            timers.append(timer)
 
         ns = {}
         glob = self.shell.user_ns
@@ -1146,46 +1496,109 @@ def timeit(self, line='', cell=None, local_ns=None):
                     conflict_globs[var_name] = var_val
             glob.update(local_ns)
             
-        exec(code, glob, ns)
-        timer.inner = ns["inner"]
-
-        # This is used to check if there is a huge difference between the
-        # best and worst timings.
-        # Issue: https://github.com/ipython/ipython/issues/6471
-        if number == 0:
-            # determine number so that 0.2 <= total time < 2.0
-            for index in range(0, 10):
-                number = 10 ** index
-                time_number = timer.timeit(number)
-                if time_number >= 0.2:
-                    break
+        for timer in timers:
+            exec(timer.code, glob, ns)
+            timer.inner = ns["inner"]
+
+            # This is used to check if there is a huge difference between the
+            # best and worst timings.
+            # Issue: https://github.com/ipython/ipython/issues/6471
+            timer.number = number
+            if number == 0:
+                # determine number so that 0.2 <= total time < 2.0
+                for index in range(0, 10):
+                    timer.number = 10 ** index
+                    time_number = timer.timeit(timer.number)
+                    if time_number >= 0.2:
+                        break
 
-        all_runs = timer.repeat(repeat, number)
-        best = min(all_runs) / number
-        worst = max(all_runs) / number
-        timeit_result = TimeitResult(number, repeat, best, worst, all_runs, tc, precision)
+        # Interleave the runs of several statements, so that slow drifts in
+        # the machine's state affect them alike
+        runs = [[] for timer in timers]
+        for _ in range(repeat):
+            for timer, all_runs in zip(timers, runs):
+                all_runs.append(timer.timeit(timer.number))
+
+        tracers = [None] * len(timers)
+        if 'm' in opts:
+            # Tracing allocations slows code down: not while timing it
+            for i, timer in enumerate(timers):
+                with MemoryTracer() as tracers[i]:
+                    timer.inner(itertools.repeat(None, 1), timefunc)
+
+        results = []
+        for s, timer, all_runs, tracer in zip(stmts, timers, runs, tracers):
+            best = min(all_runs) / timer.number
+            worst = max(all_runs) / timer.number
+            timeit_result = TimeitResult(timer.number, repeat, best, worst,
+                                         all_runs, timer.compile_time, precision)
+            timeit_result.stmt = s.strip()
+            timeit_result.memory = tracer
+            results.append(timeit_result)
 
         # Restore global vars from conflict_globs
         if conflict_globs:
            glob.update(conflict_globs)
                 
         if not quiet :
-            # Check best timing is greater than zero to avoid a
-            # ZeroDivisionError.
-            # In cases where the slowest timing is lesser than a microsecond
-            # we assume that it does not really matter if the fastest
-            # timing is 4 times faster than the slowest timing or not.
-            if worst > 4 * best and best > 0 and worst > 1e-6:
-                print("The slowest run took %0.2f times longer than the "
-                      "fastest. This could mean that an intermediate result "
-                      "is being cached." % (worst / best))
-           
-            print( timeit_result )
-
-            if tc > tc_min:
-                print("Compiler time: %.2f s" % tc)
+            for timeit_result in results:
+                best, worst = timeit_result.best, timeit_result.worst
+                # Check best timing is greater than zero to avoid a
+                # ZeroDivisionError.
+                # In cases where the slowest timing is lesser than a microsecond
+                # we assume that it does not really matter if the fastest
+                # timing is 4 times faster than the slowest timing or not.
+                if worst > 4 * best and best > 0 and worst > 1e-6:
+                    print("The slowest run took %0.2f times longer than the "
+                          "fastest. This could mean that an intermediate result "
+                          "is being cached." % (worst / best))
+               
+                report = timeit_result.format_stats() if 'stats' in opts else timeit_result
+                if len(results) > 1:
+                    print(u"%s: %s" % (timeit_result.stmt, report))
+                else:
+                    print( report )
+                if timeit_result.memory is not None:
+                    print(u"Memory: %s per loop" % timeit_result.memory)
+
+                if timeit_result.compile_time > tc_min:
+                    print("Compiler time: %.2f s" % timeit_result.compile_time)
+
+            for timeit_result in results[1:]:
+                ratio, p = timeit_result.compare(results[0])
+                print(u"%s is %s than %s (p=%.3g)" % (
+                    timeit_result.stmt, _format_ratio(ratio), results[0].stmt, p))
+
+        if baselines is not None:
+            for timeit_result in results:
+                if timeit_result.stmt not in baselines:
+                    if not quiet:
+                        print(u"No baseline for %r in %s" % (timeit_result.stmt, opts.compare))
+                    continue
+                timeit_result.baseline = baseline = TimeitResult.from_dict(
+                    baselines[timeit_result.stmt], precision)
+                if quiet:
+                    continue
+                ratio, p = timeit_result.compare(baseline)
+                if p >= 0.05:
+                    verdict = "no significant difference"
+                elif ratio > 1:
+                    verdict = "significant regression"
+                else:
+                    verdict = "significant improvement"
+                print(u"%sCompared to baseline (%s median): %s, p=%.3g: %s" % (
+                    timeit_result.stmt + ": " if len(results) > 1 else "",
+                    _format_time(baseline.median, precision),
+                    _format_ratio(ratio), p, verdict))
+
+        if saved is not None:
+            for timeit_result in results:
+                saved[timeit_result.stmt] = timeit_result.to_dict()
+            with open(opts.save, 'w', encoding='utf-8') as f:
+                json.dump(saved, f, indent=1, sort_keys=True)
+
         if return_result:
-            return timeit_result
+            return results if len(results) > 1 else results[0]
 
     @skip_doctest
     @no_var_expand
@@ -1194,9 +1607,22 @@ def timeit(self, line='', cell=None, local_ns=None):
     def time(self,line='', cell=None, local_ns=None):
         """Time execution of a Python statement or expression.
 
+        Usage, in line mode:
+          %time [-m] statement
+        or in cell mode:
+          %%time [-m]
+          code
+          code...
+
         The CPU and wall clock times are printed, and the value of the
         expression (if any) is returned.  Note that under Win32, system time
         is always reported as 0, since it can not be measured.
+
+        With -m, the memory allocated while running the code is also
+        reported, using :mod:`tracemalloc`: its peak, the net amount still
+        held afterwards, and the lines responsible for most of the latter.
+        Tracing allocations slows the code down, so the times measured
+        with -m are higher.
         
         This function can be used both as a line and cell magic:
 
@@ -1248,8 +1674,21 @@ def time(self,line='', cell=None, local_ns=None):
           CPU times: user 0.00 s, sys: 0.00 s, total: 0.00 s
           Wall time: 0.00 s
           Compiler : 0.78 s
+
+          In [7]: %time -m x = [0] * 10**6
+          CPU times: user 1.91 ms, sys: 4.06 ms, total: 5.97 ms
+          Wall time: 5.94 ms
+          Memory: peak 7.63 MiB, net 7.63 MiB
+            <timed exec>:1: 7.63 MiB
           """
 
+        # Only a leading -m is an option: '%time -x' times the expression
+        memory = False
+        m = re.match(r'-m(\s+|$)', line)
+        if m and (cell is not None or line[m.end():].strip()):
+            memory = True
+            line = line[m.end():]
+
         # fail immediately if the given expression can't be compiled
         
         if line and cell:
@@ -1295,31 +1734,33 @@ def time(self,line='', cell=None, local_ns=None):
         # skew measurement as little as possible
         glob = self.shell.user_ns
         wtime = time.time
+        tracer = MemoryTracer(top=5) if memory else None
         # time execution
-        wall_st = wtime()
-        if mode=='eval':
-            st = clock2()
-            try:
-                out = eval(code, glob, local_ns)
-            except:
-                self.shell.showtraceback()
-                return
-            end = clock2()
-        else:
-            st = clock2()
-            try:
-                exec(code, glob, local_ns)
-                out=None
-                # multi-line %%time case
-                if expr_val is not None:
-                    code_2 = self.shell.compile(expr_val, source, 'eval')
-                    out = eval(code_2, glob, local_ns)
-            except:
-                self.shell.showtraceback()
-                return
-            end = clock2()
+        with tracer or contextlib.nullcontext():
+            wall_st = wtime()
+            if mode=='eval':
+                st = clock2()
+                try:
+                    out = eval(code, glob, local_ns)
+                except:
+                    self.shell.showtraceback()
+                    return
+                end = clock2()
+            else:
+                st = clock2()
+                try:
+                    exec(code, glob, local_ns)
+                    out=None
+                    # multi-line %%time case
+                    if expr_val is not None:
+                        code_2 = self.shell.compile(expr_val, source, 'eval')
+                        out = eval(code_2, glob, local_ns)
+                except:
+                    self.shell.showtraceback()
+                    return
+                end = clock2()
 
-        wall_end = wtime()
+            wall_end = wtime()
         # Compute actual times and report
         wall_time = wall_end-wall_st
         cpu_user = end[0]-st[0]
@@ -1330,6 +1771,10 @@ def time(self,line='', cell=None, local_ns=None):
             print("CPU times: user %s, sys: %s, total: %s" % \
                 (_format_time(cpu_user),_format_time(cpu_sys),_format_time(cpu_tot)))
         print("Wall time: %s" % _format_time(wall_time))
+        if tracer is not None:
+            print("Memory: %s" % tracer)
+            for filename, lineno, size in tracer.top_lines:
+                print("  %s:%d: %s" % (filename, lineno, _format_bytes(size)))
         if tc > tc_min:
             print("Compiler : %s" % _format_time(tc))
         if tp > tp_min:
@@ -1462,6 +1907,115 @@ def parse_breakpoint(text, current_file):
     else:
         return text[:colon], int(text[colon+1:])
     
+def _format_bytes(size, precision=3):
+    """Formats a number of bytes in a human readable form"""
+    units = ['B', 'KiB', 'MiB', 'GiB', 'TiB']
+    order = 0
+    while abs(size) >= 1024 and order < len(units) - 1:
+        size /= 1024
+        order += 1
+    if order == 0:
+        return u"%d %s" % (size, units[0])
+    return u"%.*g %s" % (precision, size, units[order])
+
+
+def _split_statements(source):
+    """Split `source` on ``;;`` outside of strings, for %timeit.
+
+    Returns the non-blank pieces, without blank lines around them.
+    """
+    splits = []
+    try:
+        previous = None
+        for token in tokenize.generate_tokens(StringIO(source).readline):
+            if (token.string == ';' and previous is not None
+                    and previous.string == ';' and previous.end == token.start):
+                splits.append((previous.start, token.end))
+                previous = None
+            else:
+                previous = token
+    except (tokenize.TokenError, SyntaxError):
+        pass
+
+    lines = source.splitlines(keepends=True)
+    offsets = list(itertools.accumulate([0] + [len(l) for l in lines]))
+    pieces, start = [], 0
+    for (row0, col0), (row1, col1) in splits:
+        pieces.append(source[start:offsets[row0 - 1] + col0])
+        start = offsets[row1 - 1] + col1
+    pieces.append(source[start:])
+    pieces = [re.sub(r'^\s*\n', '', p).rstrip() for p in pieces if p.strip()]
+    return pieces if len(pieces) > 1 else [source]
+
+
+def _load_timings(filename, missing_ok):
+    """Load the timings saved by ``%timeit --save``"""
+    try:
+        with open(filename, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError as e:
+        if missing_ok:
+            return {}
+        raise UsageError("No timings file %r" % filename) from e
+    except ValueError as e:
+        raise UsageError("Invalid timings file %r: %s" % (filename, e)) from e
+
+
+def _format_ratio(ratio):
+    """Describe the ratio of two times, as 'N.NNx slower/faster'"""
+    if ratio >= 1:
+        return "%.2fx slower" % ratio
+    return "%.2fx faster" % (1 / ratio)
+
+
+def _quartiles(values):
+    """First quartile, median and third quartile of a list of numbers.
+
+    Interpolates linearly between data points, like ``numpy.percentile``.
+    """
+    values = sorted(values)
+    last = len(values) - 1
+
+    def percentile(q):
+        pos = q * last
+        lo = int(math.floor(pos))
+        hi = min(lo + 1, last)
+        return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+    return percentile(0.25), percentile(0.5), percentile(0.75)
+
+
+def _mann_whitney(a, b):
+    """Two-sided p-value of the Mann-Whitney U test for samples `a` and `b`.
+
+    Uses the normal approximation, with tie and continuity corrections.
+    """
+    n1, n2 = len(a), len(b)
+    ranked = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+    # Average the ranks of tied values
+    ranks = [0.] * len(ranked)
+    ties = 0.
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    r1 = math.fsum(r for r, (_, group) in zip(ranks, ranked) if group == 0)
+    u = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    var = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if var <= 0:
+        return 1.
+    z = (abs(u - mean) - 0.5) / math.sqrt(var)
+    return min(1., math.erfc(max(z, 0) / math.sqrt(2)))
+
+
 def _format_time(timespan, precision=3):
     """Formats the timespan in a human readable form"""
 
@@ -147,7 +147,8 @@ def logstart(self, parameter_s=''):
                 output_hist = self.shell.history_manager.output_hist
                 for n in range(1,len(input_hist)-1):
                     log_write(input_hist[n].rstrip() + u'\n')
-                    if n in output_hist:
+                    # Outputs evicted from the cache are not loaded back
+                    if n in output_hist.keys():
                         log_write(repr(output_hist[n]),'output')
             else:
                 logger.log_write(u'\n'.join(input_hist[1:]))
@@ -210,13 +210,15 @@ def rehashx(self, parameter_s=''):
         '|'-separated string of extensions, stored in the IPython config
         variable win_exec_ext.  This defaults to 'exe|com|bat'.
 
-        This function also resets the root module cache of module completer,
-        used on slow filesystems.
+        This function also checks the module index used by the import
+        completer for new or removed modules.
         """
         from IPython.core.alias import InvalidAliasError
+        from IPython.core.completerlib import get_module_index
 
-        # for the benefit of module completer in ipy_completers.py
-        del self.shell.db['rootmodules_cache']
+        index = get_module_index()
+        if index is not None:
+            index.refresh()
 
         path = [os.path.abspath(os.path.expanduser(p)) for p in
             os.environ.get('PATH','').split(os.pathsep)]
@@ -0,0 +1,226 @@
+"""A persistent mapping for profile data, stored in a single SQLite file.
+
+:class:`ProfileDB` is what ``get_ipython().db`` is: where ``%store``,
+``%bookmark``, ``%rehashx``, the directory history and the completer keep
+data between sessions. It replaces the ``pickleshare`` database, which stored
+each key in a file of the ``db`` directory of the profile, and imports that
+directory the first time it runs.
+"""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+import os
+import pickle
+import sqlite3
+import threading
+from warnings import warn
+
+__all__ = ['ProfileDB']
+
+# Readable by every supported Python version
+PICKLE_PROTOCOL = 4
+
+
+class ProfileDB(MutableMapping):
+    """A mapping of string keys to picklable values, stored in SQLite.
+
+    It can be used in place of a ``pickleshare.PickleShareDB``: keys are
+    slash separated paths, which :meth:`keys` can match against a glob
+    pattern, and removing a missing key is not an error.
+
+    Values read are cached, until another process changes the database. Each
+    write is committed on its own, unless it is made in a :meth:`transaction`,
+    which commits several writes at once, atomically.
+
+    Parameters
+    ----------
+    filename : str
+        The SQLite database file, created if needed.
+    migrate_from : str, optional
+        A pickleshare database directory, whose entries are copied into the
+        new database the first time it is opened.
+    journal_mode : str
+        The SQLite journal mode. The default write-ahead log makes writes
+        cheap, and lets readers in other processes carry on during writes,
+        but needs shared memory, which some network file systems lack.
+    """
+
+    def __init__(self, filename, migrate_from=None, journal_mode='wal'):
+        self.filename = filename
+        # key -> unpickled value
+        self.cache = {}
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._data_version = None
+        try:
+            self._connect(filename, journal_mode)
+        except sqlite3.DatabaseError as e:
+            warn("Could not open the profile database %s (%s), using a "
+                 "temporary one." % (filename, e))
+            self._connect(':memory:', None)
+        if migrate_from:
+            self._migrate(migrate_from)
+
+    def _connect(self, filename, journal_mode):
+        # Transactions are handled explicitly, see transaction()
+        conn = sqlite3.connect(filename, timeout=10, isolation_level=None,
+                               check_same_thread=False)
+        try:
+            if journal_mode:
+                conn.execute("PRAGMA journal_mode=%s" % journal_mode)
+                if journal_mode.lower() == 'wal':
+                    # Only the last commits can be lost on power failure
+                    conn.execute("PRAGMA synchronous=normal")
+        except sqlite3.OperationalError:
+            # Locked by another process: keep the journal mode it has
+            pass
+        conn.execute("CREATE TABLE IF NOT EXISTS store "
+                     "(key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta "
+                     "(name TEXT PRIMARY KEY, value TEXT)")
+        self.connection = conn
+
+    def _migrate(self, root):
+        """Copy the entries of a pickleshare directory, if not done before.
+
+        The pickled data is copied as is, and the directory is left in place
+        for older versions of IPython.
+        """
+        if not os.path.isdir(root):
+            return
+        with self.transaction():
+            done = self.connection.execute(
+                "SELECT 1 FROM meta WHERE name='migrated_from'").fetchone()
+            if done:
+                return
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    key = os.path.relpath(path, root).replace(os.sep, '/')
+                    try:
+                        with open(path, 'rb') as f:
+                            data = f.read()
+                    except OSError:
+                        continue
+                    self.connection.execute(
+                        "INSERT OR IGNORE INTO store VALUES (?, ?)", (key, data))
+            self.connection.execute(
+                "INSERT INTO meta VALUES ('migrated_from', ?)", (root,))
+
+    def _check_cache(self):
+        """Forget the cached values if another connection committed"""
+        version, = self.connection.execute("PRAGMA data_version").fetchone()
+        if version != self._data_version:
+            self.cache.clear()
+            self._data_version = version
+
+    @contextmanager
+    def transaction(self):
+        """Context manager committing all the writes made in it at once.
+
+        Nothing is written if an exception is raised. Nested transactions are
+        part of the outermost one.
+        """
+        with self._lock:
+            if not self._transaction_depth:
+                self.connection.execute("BEGIN IMMEDIATE")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if not self._transaction_depth:
+                    self.connection.execute("ROLLBACK")
+                    self.cache.clear()
+                raise
+            else:
+                self._transaction_depth -= 1
+                if not self._transaction_depth:
+                    self.connection.execute("COMMIT")
+
+    def __getitem__(self, key):
+        with self._lock:
+            self._check_cache()
+            try:
+                return self.cache[key]
+            except KeyError:
+                pass
+            row = self.connection.execute(
+                "SELECT value FROM store WHERE key=?", (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            try:
+                value = pickle.loads(row[0])
+            except Exception:
+                # e.g. the class of the value can not be imported any more
+                raise KeyError(key)
+            self.cache[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        data = pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO store VALUES (?, ?)", (key, data))
+            self.cache[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            self.cache.pop(key, None)
+            self.connection.execute("DELETE FROM store WHERE key=?", (key,))
+
+    def __contains__(self, key):
+        with self._lock:
+            self._check_cache()
+            if key in self.cache:
+                return True
+            return self.connection.execute(
+                "SELECT 1 FROM store WHERE key=?", (key,)).fetchone() is not None
+
+    def keys(self, globpat=None):
+        """All the keys, or those matching a glob pattern, as a list.
+
+        As with file names, ``*`` does not match slashes.
+        """
+        with self._lock:
+            keys = [key for key, in self.connection.execute(
+                "SELECT key FROM store ORDER BY key")]
+        if globpat is None:
+            return keys
+        parts = globpat.split('/')
+        return [key for key in keys if _match_parts(key.split('/'), parts)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        with self._lock:
+            count, = self.connection.execute(
+                "SELECT count(*) FROM store").fetchone()
+        return count
+
+    def uncache(self, *keys):
+        """Forget the cached values of some keys, or of all of them"""
+        with self._lock:
+            if not keys:
+                self.cache.clear()
+            for key in keys:
+                self.cache.pop(key, None)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.connection.close()
+            self.cache.clear()
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.filename)
+
+
+def _match_parts(parts, pattern):
+    return len(parts) == len(pattern) and all(
+        fnmatchcase(part, pat) for part, pat in zip(parts, pattern))
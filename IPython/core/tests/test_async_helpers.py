@@ -3,11 +3,14 @@
 
 Should only trigger on python 3.5+ or will have syntax errors.
 """
+import ast
+import inspect
 from itertools import chain, repeat
+from unittest import mock
 import nose.tools as nt
 from textwrap import dedent, indent
 from unittest import TestCase
-from IPython.testing.decorators import skip_without
+from IPython.testing.decorators import skipif, skip_without
 import sys
 from typing import TYPE_CHECKING
 
@@ -20,7 +23,7 @@
 iprc = lambda x: ip.run_cell(dedent(x)).raise_error()
 iprc_nr = lambda x: ip.run_cell(dedent(x))
 
-from IPython.core.async_helpers import _should_be_async
+from IPython.core.async_helpers import _should_be_async, _has_top_level_await
 
 class AsyncTest(TestCase):
     def test_should_be_async(self):
@@ -260,6 +263,64 @@ def g():
         """)
 
 
+    def test_has_top_level_await(self):
+        tla = lambda x: _has_top_level_await(ast.parse(dedent(x)))
+        nt.assert_false(tla("x = 1"))
+        nt.assert_true(tla("x = await bar()"))
+        nt.assert_true(tla("[x async for x in y]"))
+        nt.assert_true(tla("async with a:\n    pass"))
+        nt.assert_true(tla("def f(a=await x):\n    pass"))
+        nt.assert_false(tla("lambda: (await x)"))
+        nt.assert_false(
+            tla(
+                """
+            class A:
+                async def f(self):
+                    await x
+            """
+            )
+        )
+
+    @skipif(sys.version_info < (3, 8), "needs PyCF_ALLOW_TOP_LEVEL_AWAIT")
+    def test_has_top_level_await_like_compile(self):
+        cases = [
+            "def f() -> await x: pass",
+            "def f(a: await x): pass",
+            "def f(*a: await x, b: await y, **c: await z): pass",
+            "@await d\ndef f(): pass",
+            "class A(await b): pass",
+            "lambda a=await x: a",
+            "(x async for x in y)",
+            "(await x for x in y)",
+            "(x for x in await y)",
+            "[x for z in w for x in await z]",
+            "[x for z in w if await z]",
+            "{k: await v for k, v in y}",
+            "[[x async for x in y] for z in w]",
+            "[(x async for x in y) for z in w]",
+            "[(await x for x in y) for z in w]",
+            "[(x async for x in y) for z in await w]",
+            "lambda: (await x for x in y)",
+            "x: await y",
+            "async def f(): await x",
+        ]
+        for case in cases:
+            code = compile(case, "<test>", "exec",
+                           flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+            expected = bool(code.co_flags & inspect.CO_COROUTINE)
+            nt.assert_equal(_has_top_level_await(ast.parse(case)), expected,
+                            case)
+
+    @skipif(sys.version_info < (3, 8), "single parse needs Python 3.8")
+    def test_cell_parsed_once(self):
+        with mock.patch.object(
+            ip.compile, "ast_parse", wraps=ip.compile.ast_parse
+        ) as ast_parse:
+            res = iprc_nr("import asyncio; await asyncio.sleep(0); single_parse = 1")
+            ast_parse.assert_called_once()
+        res.raise_error()
+        nt.assert_equal(ip.user_ns["single_parse"], 1)
+
     def test_execute(self):
         iprc("""
         import asyncio
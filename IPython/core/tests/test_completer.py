@@ -7,6 +7,7 @@
 import os
 import sys
 import textwrap
+import threading
 import unittest
 
 from contextlib import contextmanager
@@ -101,6 +102,16 @@ def test_unicode_range():
     assert len_exp <= 137714, message
 
 
+def test_prefix_index():
+    from IPython.core.completer import _PrefixIndex
+
+    words = ["beta", "alpha", "al", "b", "aleph", "", "alpha\U0010ffff", "Alpha"]
+    index = _PrefixIndex(words)
+    for prefix in ["", "a", "al", "alp", "alpha", "alpha\U0010ffff", "b", "c", "A"]:
+        nt.assert_equal(index.matches(prefix),
+                        [w for w in words if w.startswith(prefix)])
+
+
 @contextmanager
 def greedy_completion():
     ip = get_ipython()
@@ -1252,6 +1263,153 @@ def test_snake_case_completion(self):
         nt.assert_in("some_three", matches)
         nt.assert_in("some_four", matches)
 
+    def test_incremental_completion_cache(self):
+        ip = get_ipython()
+        c = ip.Completer
+        ip.run_cell("incr_alpha_one = 1; incr_alpha_two = 2; incr_beta = 3")
+
+        def complete(text):
+            with provisionalcompleter():
+                return sorted(x.text for x in c.completions(text, len(text)))
+
+        old_use_jedi = c.use_jedi
+        try:
+            for use_jedi in (False, True):
+                c.use_jedi = use_jedi
+                for text in ["incr", "incr_", "incr_a", "incr_alpha_t", "i_a_t"]:
+                    narrowed = complete(text)
+                    c.clear_completion_cache()
+                    nt.assert_equal(narrowed, complete(text))
+
+            # snake case abbreviations survive narrowing
+            c.use_jedi = False
+            complete("i")
+            nt.assert_in("incr_alpha_one", complete("i_a"))
+
+            # Executing code invalidates the cache
+            nt.assert_not_in("incr_alpha_three", complete("incr_al"))
+            ip.run_cell("incr_alpha_three = 3")
+            nt.assert_in("incr_alpha_three", complete("incr_alp"))
+        finally:
+            c.use_jedi = old_use_jedi
+
+    def test_incremental_completion_cache_not_prefix(self):
+        # Matchers which do not filter by prefix are not narrowed
+        ip = get_ipython()
+        c = ip.Completer
+
+        def complete(text):
+            with provisionalcompleter():
+                return sorted(x.text for x in c.completions(text, len(text)))
+
+        for first, second in [("\\alph", "\\alpha"),
+                              ("\\GREEK SMALL LETTER ALPH",
+                               "\\GREEK SMALL LETTER ALPHA"),
+                              ("%tim", "%time")]:
+            c.clear_completion_cache()
+            complete(first)
+            narrowed = complete(second)
+            c.clear_completion_cache()
+            nt.assert_equal(narrowed, complete(second))
+
+        complete("%tim")
+        nt.assert_in("%%timeit", complete("%time"))
+        complete("\\alph")
+        nt.assert_equal(complete("\\alpha"), ["α"])
+
+    def test_matcher_timings(self):
+        ip = get_ipython()
+        c = ip.Completer
+        c.matcher_timings.clear()
+        old_use_jedi = c.use_jedi
+        try:
+            c.use_jedi = False
+            ip.run_cell("timed_name = 1")
+            _, matches = c.complete("timed_n")
+            nt.assert_in("timed_name", matches)
+            names = {t.matcher for t in c.matcher_timings}
+            nt.assert_in("IPCompleter.python_matches", names)
+            nt.assert_in("custom", names)
+
+            c.disabled_matchers = ["python_matches"]
+            _, matches = c.complete("timed_n")
+            nt.assert_not_in("timed_name", matches)
+            nt.assert_not_in(c.python_matches, c.matchers)
+
+            c.disabled_matchers = []
+            c.matcher_order = ["dict_key_matches"]
+            nt.assert_equal(c.matchers[0], c.dict_key_matches)
+        finally:
+            c.use_jedi = old_use_jedi
+            c.disabled_matchers = []
+            c.matcher_order = []
+
+    def test_matcher_timings_size_config(self):
+        cfg = Config()
+        cfg.IPCompleter.matcher_timings_size = 5
+        c = completer.IPCompleter(config=cfg)
+        nt.assert_equal(c.matcher_timings.maxlen, 5)
+        c.matcher_timings_size = 2
+        nt.assert_equal(c.matcher_timings.maxlen, 2)
+
+    def test_cancel_check(self):
+        ip = get_ipython()
+        c = ip.Completer
+        calls = []
+
+        def cancel_check():
+            calls.append(None)
+            return len(calls) > 2
+
+        with provisionalcompleter():
+            with nt.assert_raises(completer.CompletionCancelled):
+                list(c.completions("pri", 3, cancel_check=cancel_check))
+        nt.assert_equal(len(calls), 3)
+
+    def test_cancel_check_overlapping_threads(self):
+        ip = get_ipython()
+        c = ip.Completer
+        entered = threading.Event()
+        release = threading.Event()
+        stale = threading.Event()
+        results = {}
+
+        def blocking_matcher(text):
+            if text == "zzslow":
+                entered.set()
+                release.wait(10)
+                return ["zzslowest"]
+            if text == "zzfast":
+                return ["zzfastest"]
+            return []
+
+        def complete(text):
+            check = stale.is_set if text == "zzslow" else (lambda: False)
+            try:
+                results[text] = [comp.text for comp in
+                                 c.completions(text, len(text), cancel_check=check)]
+            except completer.CompletionCancelled:
+                results[text] = "cancelled"
+
+        c.custom_matchers.append(blocking_matcher)
+        try:
+            with provisionalcompleter():
+                slow = threading.Thread(target=complete, args=("zzslow",))
+                slow.start()
+                nt.assert_true(entered.wait(10))
+                # Starts while the slow request is still running
+                fast = threading.Thread(target=complete, args=("zzfast",))
+                fast.start()
+                stale.set()
+                release.set()
+                slow.join(10)
+                fast.join(10)
+        finally:
+            c.custom_matchers.remove(blocking_matcher)
+            release.set()
+        nt.assert_equal(results["zzslow"], "cancelled")
+        nt.assert_in("zzfastest", results["zzfast"])
+
     def test_mix_terms(self):
         ip = get_ipython()
         from textwrap import dedent
@@ -16,7 +16,12 @@
 
 import nose.tools as nt
 
-from IPython.core.completerlib import magic_run_completer, module_completion, try_import
+from IPython.core.completerlib import (
+    ModuleIndex,
+    magic_run_completer,
+    module_completion,
+    try_import,
+)
 from IPython.utils.tempdir import TemporaryDirectory
 from IPython.testing.decorators import onlyif_unicode_paths
 
@@ -176,3 +181,34 @@ def test_module_without_init():
             assert s == []
         finally:
             sys.path.remove(tmpdir)
+
+
+def test_module_index():
+    with TemporaryDirectory() as tmpdir:
+        pkgdir = join(tmpdir, 'pkgs')
+        os.mkdir(pkgdir)
+        open(join(pkgdir, 'mod_a.py'), 'w').close()
+        os.makedirs(join(pkgdir, 'pack'))
+        open(join(pkgdir, 'pack', '__init__.py'), 'w').close()
+        db_path = join(tmpdir, 'module_index.sqlite')
+        missing = join(tmpdir, 'missing')
+
+        index = ModuleIndex(db_path)
+        nt.assert_equal(sorted(index.modules([pkgdir, missing])), ['mod_a', 'pack'])
+        index.wait()
+
+        # Changes are picked up in the background, once the mtime changes
+        open(join(pkgdir, 'mod_b.py'), 'w').close()
+        mtime = os.stat(pkgdir).st_mtime + 10
+        os.utime(pkgdir, (mtime, mtime))
+        nt.assert_equal(sorted(index.modules([pkgdir])), ['mod_a', 'pack'])
+        index.wait()
+        nt.assert_equal(sorted(index.modules([pkgdir])), ['mod_a', 'mod_b', 'pack'])
+        index.wait()
+
+        # A new index starts from the stored one, without listing again
+        os.remove(join(pkgdir, 'mod_a.py'))
+        os.utime(pkgdir, (mtime, mtime))
+        index = ModuleIndex(db_path)
+        nt.assert_equal(sorted(index.modules([pkgdir])), ['mod_a', 'mod_b', 'pack'])
+        index.wait()
@@ -1,7 +1,9 @@
+import os
 import sys
+import warnings
 from IPython.testing.tools import AssertPrints, AssertNotPrints
 from IPython.core.displayhook import CapturingDisplayHook
-from IPython.utils.capture import CapturedIO
+from IPython.utils.capture import CapturedIO, capture_output
 
 def test_output_displayed():
     """Checking to make sure that output is displayed"""
@@ -110,3 +112,69 @@ def test_capture_display_hook_format():
     captured = CapturedIO(sys.stdout, sys.stderr, hook.outputs)
     # Should not raise with RichOutput transformation error
     captured.outputs
+
+
+def test_cache_max_bytes():
+    dh = ip.displayhook
+    dh.cache_max_bytes = 3 * 10**6
+    try:
+        for mode in ['drop', 'disk']:
+            dh.cache_eviction = mode
+            counts = []
+            for i in range(4):
+                with capture_output():
+                    ip.run_cell('b"%d" * 10**6' % i, store_history=True)
+                counts.append(ip.execution_count - 1)
+            first = counts[0]
+            assert first not in ip.user_ns['_oh'].keys()
+            assert '_%d' % first not in ip.user_ns
+            assert counts[-1] in ip.user_ns['_oh']
+            out = ip.user_ns['Out']
+            if mode == 'drop':
+                assert first not in out.evicted
+                assert first not in out
+                assert out.get(first) is None
+            else:
+                # Membership does not load evicted outputs
+                assert first in out
+                assert first not in out.keys()
+                path = out.evicted[first].args[0]
+                assert os.path.exists(path)
+                assert out.get(first) == b'0' * 10**6
+                assert not os.path.exists(path)
+                # Restored into the cache, not loaded again
+                assert first not in out.evicted
+                assert first in out.keys()
+                assert out[first] is out.get(first)
+    finally:
+        dh.cache_max_bytes = 0
+        dh.cache_eviction = 'drop'
+
+
+def test_cache_eviction_weakref_list():
+    dh = ip.displayhook
+    dh.cache_max_bytes = 3 * 10**6
+    dh.cache_eviction = 'weakref'
+    dh._warned_weakref = False
+    try:
+        with capture_output():
+            dh.flush()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            counts = []
+            for i in range(4):
+                with capture_output():
+                    ip.run_cell('[%d] * 10**6' % i, store_history=True)
+                counts.append(ip.execution_count - 1)
+        # Lists do not support weak references: dropped, with one warning
+        first = counts[0]
+        out = ip.user_ns['Out']
+        assert first not in out
+        assert out.get(first) is None
+        messages = [str(x.message) for x in w
+                    if 'weak references' in str(x.message)]
+        assert len(messages) == 1
+        assert 'list' in messages[0]
+    finally:
+        dh.cache_max_bytes = 0
+        dh.cache_eviction = 'drop'
@@ -238,6 +238,46 @@ def test_pop_string():
     nt.assert_is(f.pop(type_str, None), None)
     
 
+def test_lookup_cache():
+    f = HTMLFormatter()
+    with nt.assert_raises(KeyError):
+        f.lookup_by_type(B)
+
+    # registering a printer for a base class invalidates the cached miss
+    f.for_type(A, lambda obj: 'a')
+    nt.assert_equal(f(B()), 'a')
+    f.for_type_by_name(B.__module__, 'B', lambda obj: 'b')
+    nt.assert_equal(f(B()), 'b')
+    nt.assert_equal(f(A()), 'a')
+
+    # direct changes to the registries are noticed too
+    f.type_printers[B] = lambda obj: 'b2'
+    nt.assert_equal(f(B()), 'b2')
+    del f.type_printers[B]
+    nt.assert_equal(f(B()), 'a')
+
+    # including replacements keeping the sizes of the registries
+    f.type_printers[A] = lambda obj: 'a2'
+    nt.assert_equal(f(B()), 'a2')
+    f.type_printers[B] = lambda obj: 'b3'
+    del f.type_printers[A]
+    nt.assert_equal(f(B()), 'b3')
+    f.type_printers.update({A: lambda obj: 'a3'})
+    f.type_printers.pop(B)
+    nt.assert_equal(f(B()), 'a3')
+
+    # and assigning new registries
+    f.type_printers = {B: lambda obj: 'b4'}
+    nt.assert_equal(f(B()), 'b4')
+    f.type_printers[B] = lambda obj: 'b5'
+    nt.assert_equal(f(B()), 'b5')
+    f.type_printers.clear()
+    f.type_printers[A] = lambda obj: 'a'
+
+    f.pop(A)
+    nt.assert_is(f(B()), None)
+
+
 def test_error_method():
     f = HTMLFormatter()
     class BadHTML(object):
@@ -497,6 +537,35 @@ def _repr_mimebundle_(self, include, exclude, **kwargs):
     f.format(Tester(include=include), include=include)
 
 
+def test_accepted_types():
+    calls = []
+
+    class Rich(object):
+        def _repr_html_(self):
+            calls.append('html')
+            return '<b>rich</b>'
+
+        def _repr_png_(self):
+            calls.append('png')
+            return b'png'
+
+        def _repr_mimebundle_(self, include=None, exclude=None):
+            calls.append(('bundle', include))
+            return {'text/markdown': '**rich**'}
+
+    f = DisplayFormatter()
+    f.accepted_types = ['text/plain', 'text/html']
+    data, md = f.format(Rich())
+    nt.assert_equal(sorted(data), ['text/html', 'text/plain'])
+    nt.assert_equal(calls, [('bundle', ['text/plain', 'text/html']), 'html'])
+
+    # other representations are still computed on request
+    del calls[:]
+    data, md = f.format(Rich(), include={'image/png'})
+    nt.assert_equal(data, {'image/png': b'png'})
+    nt.assert_equal(calls, [('bundle', {'image/png'}), 'png'])
+
+
 def test_repr_mime_meta():
     class HasReprMimeMeta(object):
         def _repr_mimebundle_(self, include=None, exclude=None):
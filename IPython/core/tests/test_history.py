@@ -10,16 +10,22 @@
 from pathlib import Path
 import sys
 import tempfile
+import time
 from datetime import datetime
 import sqlite3
 
 # third party
 import nose.tools as nt
+from nose import SkipTest
 
 # our own packages
 from traitlets.config.loader import Config
 from IPython.utils.tempdir import TemporaryDirectory
-from IPython.core.history import HistoryManager, extract_hist_ranges
+from IPython.core.history import (
+    HistoryAccessor,
+    HistoryManager,
+    extract_hist_ranges,
+)
 from IPython.testing.decorators import skipif
 
 def test_proper_default_encoding():
@@ -190,6 +196,91 @@ def test_hist_file_config():
             # delete it.  I have no clue why
             pass
 
+def test_history_search_fts():
+    """Searches narrowed by the full-text index match the plain GLOB scan."""
+    ip = get_ipython()
+    with TemporaryDirectory() as tmpdir:
+        hist_file = Path(tmpdir) / "history.sqlite"
+        hm = HistoryManager(shell=ip, hist_file=hist_file)
+        try:
+            hist = [u"import numpy as np", u"x = np.arange(10)",
+                    u"def f():\n    return 'numpy'", u"y = x[1]"]
+            for i, h in enumerate(hist, start=1):
+                hm.store_inputs(i, h)
+            hm.writeout_cache()
+            if not hm._fts_available:
+                raise SkipTest("SQLite has no FTS5 trigram tokenizer")
+            nindexed, = hm.db.execute("SELECT count(*) FROM history_fts").fetchone()
+            nt.assert_equal(nindexed, len(hist))
+
+            # A second accessor without the index must agree on everything
+            plain = HistoryAccessor(hist_file=hist_file, fts_index=False)
+            for pattern in ["*numpy*", "*np*", "*x[[]1]*", "*Numpy*",
+                            "def f*'num?y'", "*"]:
+                nt.assert_equal(list(hm.search(pattern)),
+                                list(plain.search(pattern)))
+            nt.assert_equal(list(hm.search("*numpy*", n=1)),
+                            [(hm.session_number, 3, hist[2])])
+
+            # Rows written behind the index's back are picked up on search
+            hm.db.execute("INSERT INTO history VALUES (?, ?, ?, ?)",
+                          (hm.session_number, 5, u"numpy2", u"numpy2"))
+            hm.db.commit()
+            nt.assert_equal([l for s, n, l in hm.search("*numpy2*")], [u"numpy2"])
+
+            # Vacuuming after deleting rows may renumber the rows of the
+            # history table, and the rowids of the latest rows may be reused
+            hm.db.execute("DELETE FROM history WHERE line < 3")
+            hm.db.commit()
+            hm.db.execute("VACUUM")
+            hm.db.execute("INSERT INTO history VALUES (?, ?, ?, ?)",
+                          (hm.session_number, 6, u"numpy3", u"numpy3"))
+            hm.db.commit()
+            for pattern in ["*numpy*", "*y = x*", "*numpy3*"]:
+                nt.assert_equal(list(hm.search(pattern)),
+                                list(plain.search(pattern)))
+            nt.assert_equal([l for s, n, l in hm.search("*numpy3*")], [u"numpy3"])
+            hm.db.execute("DELETE FROM history WHERE line > 4")
+            hm.db.execute("INSERT INTO history VALUES (?, ?, ?, ?)",
+                          (hm.session_number, 7, u"numpy4", u"numpy4"))
+            hm.db.commit()
+            nt.assert_equal([l for s, n, l in hm.search("*numpy4*")], [u"numpy4"])
+            plain.db.close()
+        finally:
+            hm.save_thread.stop()
+            hm.db.close()
+
+
+def test_history_wal_interval_flush():
+    """WAL mode is applied, and the saving thread flushes cached inputs
+    after db_cache_interval even below db_cache_size."""
+    ip = get_ipython()
+    with TemporaryDirectory() as tmpdir:
+        hist_file = Path(tmpdir) / "history.sqlite"
+        hm = HistoryManager(shell=ip, hist_file=hist_file, journal_mode="wal",
+                            synchronous="normal", db_cache_size=100,
+                            db_cache_interval=0.01)
+        reader = sqlite3.connect(str(hist_file))
+        try:
+            mode, = reader.execute("PRAGMA journal_mode").fetchone()
+            nt.assert_equal(mode, "wal")
+            hist = [u"a = 1", u"b = 2", u"c = 3"]
+            for i, h in enumerate(hist, start=1):
+                hm.store_inputs(i, h)
+            for _ in range(200):
+                if not hm.db_input_cache:
+                    break
+                time.sleep(0.01)
+            rows = reader.execute("SELECT source_raw FROM history WHERE "
+                                  "session = ? ORDER BY line",
+                                  (hm.session_number,)).fetchall()
+            nt.assert_equal([r[0] for r in rows], hist)
+        finally:
+            reader.close()
+            hm.save_thread.stop()
+            hm.db.close()
+
+
 def test_histmanager_disabled():
     """Ensure that disabling the history manager doesn't create a database."""
     cfg = Config()
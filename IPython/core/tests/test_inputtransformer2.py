@@ -335,3 +335,41 @@ def counter(lines):
     manager.line_transforms.insert(0, counter)
     assert manager.check_complete("b=1\n") == ('complete', None)
     assert count == 0
+
+
+def test_token_cache():
+    """Tokenizing input line by line resumes from earlier inputs"""
+    src = dedent("""\
+        def f(x):
+            if x:
+        \t\ty = [1,
+                     2]
+                # comment
+
+            z = '''a
+        b'''
+            %time g(x)
+            return y
+        class A: pass
+        """).splitlines(keepends=True)
+    cache = ipt2._TokenCache()
+    calls = []
+    tokens_by_line = ipt2._tokens_by_line
+
+    def spy(lines, start=0, indents=()):
+        calls.append(start)
+        return tokens_by_line(lines, start, indents)
+
+    ipt2._tokens_by_line = spy
+    try:
+        for k in range(1, len(src) + 1):
+            expected = make_tokens_by_line(src[:k])
+            nt.assert_equal(cache.tokens_by_line(src[:k]), expected)
+        nt.assert_equal(calls[-1], len(src) - 1)
+        # Editing a line resumes before it
+        edited = src[:1] + ['    if not x:\n'] + src[2:]
+        expected = make_tokens_by_line(edited)
+        nt.assert_equal(cache.tokens_by_line(edited), expected)
+        nt.assert_equal(calls[-1], 1)
+    finally:
+        ipt2._tokens_by_line = tokens_by_line
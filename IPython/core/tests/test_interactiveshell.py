@@ -11,6 +11,7 @@
 
 import asyncio
 import ast
+import json
 import os
 import signal
 import shutil
@@ -143,6 +144,60 @@ def test_future_flags(self):
             # Reset compiler flags so we don't mess up other tests.
             ip.compile.reset_compiler_flags()
 
+    @skipif(sys.version_info < (3, 8))
+    def test_cell_cache(self):
+        """Running the same cell again reuses its compiled code"""
+        cell = ('def cached_cell_func():\n'
+                '    raise ValueError("in cached cell")\n'
+                'cached_cell_counter = globals().get("cached_cell_counter", 0) + 1\n')
+        ip.run_cell(cell, store_history=True)
+        with mock.patch.object(ip.compile, 'ast_parse') as ast_parse:
+            ip.run_cell(cell, store_history=True)
+            ast_parse.assert_not_called()
+        self.assertEqual(ip.user_ns['cached_cell_counter'], 2)
+
+        # Tracebacks name the latest execution of the cell
+        with tt.AssertPrints('<ipython-input-%d-' % (ip.execution_count - 1)):
+            ip.run_cell('cached_cell_func()')
+
+        # AST transformers run on every execution
+        calls = []
+        class CountingTransformer(ast.NodeTransformer):
+            def visit_Module(self, node):
+                calls.append(None)
+                return node
+        transformer = CountingTransformer()
+        ip.ast_transformers.append(transformer)
+        try:
+            ip.run_cell(cell)
+            ip.run_cell(cell)
+        finally:
+            ip.ast_transformers.remove(transformer)
+        self.assertEqual(len(calls), 2)
+
+        # Including transformers added by pre_run_cell handlers
+        ip.run_cell('hooked_x = 5')
+        negator = Negator()
+        def add_transformer(info):
+            ip.events.unregister('pre_run_cell', add_transformer)
+            ip.ast_transformers.append(negator)
+        ip.events.register('pre_run_cell', add_transformer)
+        try:
+            ip.run_cell('hooked_x = 5')
+        finally:
+            ip.ast_transformers.remove(negator)
+        self.assertEqual(ip.user_ns['hooked_x'], -5)
+
+        # The cache can be disabled
+        ip.cell_cache_size = 0
+        try:
+            with mock.patch.object(ip.compile, 'ast_parse',
+                                   wraps=ip.compile.ast_parse) as ast_parse:
+                ip.run_cell(cell)
+                ast_parse.assert_called_once()
+        finally:
+            ip.cell_cache_size = 128
+
     def test_can_pickle(self):
         "Can we pickle objects defined interactively (GH-29)"
         ip = get_ipython()
@@ -494,6 +549,54 @@ def test_last_execution_result(self):
         self.assertFalse(ip.last_execution_result.success)
         self.assertIsInstance(ip.last_execution_result.error_in_exec, NameError)
 
+    def test_execution_timings(self):
+        """Each phase of running a cell is timed on its result"""
+        result = ip.run_cell('a = 5\na', store_history=True)
+        timings = result.timings
+        for phase in ('transform', 'parse', 'ast_transform', 'compile',
+                      'exec', 'displayhook', 'history'):
+            self.assertIn(phase, timings)
+        wall, cpu, blocks = timings['exec']
+        self.assertGreaterEqual(wall, timings['displayhook'][0])
+        self.assertGreaterEqual(cpu, 0)
+        # Counting memory blocks is opt-in
+        self.assertIsNone(blocks)
+
+        ip.record_allocations = True
+        try:
+            result = ip.run_cell('a = [5] * 10; a')
+        finally:
+            ip.record_allocations = False
+        self.assertIsInstance(result.timings['exec'][2], int)
+        self.assertIn('blocks', result.trace_events()[1]['args'])
+
+        events = result.trace_events()
+        self.assertEqual(events[0]['name'], 'cell')
+        self.assertEqual(len(events), len(result.spans) + 1)
+
+        ip.record_timings = False
+        try:
+            result = ip.run_cell('a = 5')
+        finally:
+            ip.record_timings = True
+        self.assertIsNone(result.spans)
+        self.assertEqual(result.timings, {})
+
+    def test_timings_trace_file(self):
+        with tempfile.TemporaryDirectory() as td:
+            path = join(td, 'trace.json')
+            ip.timings_trace_file = path
+            try:
+                ip.run_cell('a = 5')
+                ip.run_cell('a = 6')
+            finally:
+                ip.timings_trace_file = ''
+            with open(path) as f:
+                text = f.read()
+        events = json.loads(text.rstrip().rstrip(',') + ']')
+        self.assertEqual([e['name'] for e in events].count('cell'), 2)
+        self.assertTrue(all(e['ph'] == 'X' for e in events))
+
     def test_reset_aliasing(self):
         """ Check that standard posix aliases work after %reset. """
         if os.name != 'posix':
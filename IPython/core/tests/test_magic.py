@@ -5,6 +5,7 @@
 """
 
 import io
+import json
 import os
 import re
 import sys
@@ -664,6 +665,64 @@ def test_timeit_return_quiet():
         res = _ip.run_line_magic('timeit', '-n1 -r1 -q -o 1')
     assert (res is not None)
 
+def test_timeit_stats():
+    res = _ip.run_line_magic('timeit', '-n1 -r7 -q -o 1')
+    res.all_runs[:] = [1., 1., 2., 2., 2., 3., 100.]
+    res.timings = list(res.all_runs)
+    nt.assert_equal(res.outliers, 1)
+    nt.assert_equal(res.median, 2.)
+    nt.assert_equal(res.iqr, 0.75)
+    with tt.AssertPrints("median"):
+        _ip.run_line_magic('timeit', '-n1 -r3 --stats 1')
+
+def test_timeit_several_statements():
+    with tt.AssertPrints("1 + 2 is"):
+        res = _ip.run_line_magic('timeit', '-n1 -r3 -o 1 + 1 ;; 1 + 2')
+    nt.assert_equal([r.stmt for r in res], ['1 + 1', '1 + 2'])
+    res = _ip.run_line_magic('timeit', '-n1 -r1 -q -o ";;"')
+    nt.assert_equal(res.stmt, '";;"')
+
+def test_timeit_save_compare():
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, 'timings.json')
+        _ip.run_line_magic('timeit', '-n1 -r5 -q --save %s sum(range(10))' % path)
+        _ip.run_line_magic('timeit', '-n1 -r5 -q --save %s 1' % path)
+        with open(path) as f:
+            nt.assert_equal(sorted(json.load(f)), ['1', 'sum(range(10))'])
+
+        with tt.AssertPrints("Compared to baseline"):
+            res = _ip.run_line_magic(
+                'timeit', '-n1 -r5 -o --compare %s sum(range(10))' % path)
+        ratio, p = res.compare(res.baseline)
+        nt.assert_greater(ratio, 0)
+        nt.assert_true(0 <= p <= 1)
+        with tt.AssertPrints("No baseline"):
+            res = _ip.run_line_magic('timeit', '-n1 -r1 -o --compare %s 2' % path)
+        nt.assert_is_none(res.baseline)
+        with nt.assert_raises(UsageError):
+            _ip.run_line_magic('timeit', '--compare %s 1' % os.path.join(td, 'x'))
+
+def test_mann_whitney():
+    p = execution._mann_whitney(range(7), range(10, 17))
+    nt.assert_almost_equal(p, 0.002165, places=5)
+    nt.assert_equal(execution._mann_whitney([1, 2, 3], [1, 2, 3]), 1.)
+
+def test_time_memory():
+    with tt.AssertPrints("Memory: peak"):
+        _ip.run_line_magic('time', '-m time_memory = bytearray(10**6)')
+    with tt.AssertPrints("<timed exec>:2:"):
+        _ip.run_cell_magic('time', '-m', 'x = 1\ntime_memory = bytearray(10**6)\n')
+    # Not an option
+    _ip.user_ns['m'] = 1
+    with tt.AssertNotPrints("Memory"):
+        nt.assert_equal(_ip.run_line_magic('time', '-m'), -1)
+
+def test_timeit_memory():
+    res = _ip.run_line_magic('timeit', '-n1 -r1 -q -o -m bytearray(10**6)')
+    nt.assert_greater_equal(res.memory.peak, 10**6)
+    nt.assert_less(res.memory.net, 10**6)
+    nt.assert_is_none(_ip.run_line_magic('timeit', '-n1 -r1 -q -o 1').memory)
+
 def test_timeit_invalid_return():
     with nt.assert_raises_regex(SyntaxError, "outside function"):
         _ip.run_line_magic('timeit', 'return')
@@ -689,6 +748,32 @@ def test_prun_quotes():
     _ip.magic(r"prun -q x = '\t'")
     nt.assert_equal(_ip.user_ns['x'], '\t')
 
+def test_prun_sample():
+    "Test %prun --sample"
+    _ip.run_cell("def prun_busy():\n"
+                 "    import time\n"
+                 "    end = time.perf_counter() + 0.05\n"
+                 "    while time.perf_counter() < end: pass\n")
+    sampler = _ip.run_line_magic('prun', '--sample --interval 0.002 -q -r prun_busy()')
+    nt.assert_greater(sampler.samples, 0)
+    nt.assert_in('prun_busy', sampler.summary())
+    with nt.assert_raises(UsageError):
+        _ip.run_line_magic('prun', '--sample --interval x -q pass')
+
+def test_lprun():
+    "Test %lprun"
+    _ip.run_cell("def lprun_f(n):\n"
+                 "    return sum(range(n))\n")
+    prof = _ip.run_line_magic('lprun', '-q -r -f lprun_f x = lprun_f(10)')
+    nt.assert_equal(_ip.user_ns['x'], 45)
+    code = _ip.user_ns['lprun_f'].__code__
+    nt.assert_equal(prof.stats[code][code.co_firstlineno + 1][0], 1)
+    nt.assert_in('return sum(range(n))', prof.format_stats())
+    with nt.assert_raises(UsageError):
+        _ip.run_line_magic('lprun', 'lprun_f(10)')
+    with nt.assert_raises(UsageError):
+        _ip.run_line_magic('lprun', '-f 1 lprun_f(10)')
+
 def test_extension():
     # Debugging information for failures of this test
     print('sys.path:')
@@ -1259,3 +1344,25 @@ def is_package(self, __):
         nt.assert_equal(output, captured.stdout)
 
         sys.meta_path.pop(0)
+
+
+def test_completion_profile():
+    ip = get_ipython()
+    c = ip.Completer
+    try:
+        _ip.run_line_magic("completion_profile", "--clear")
+        with tt.AssertPrints("No completion recorded"):
+            _ip.run_line_magic("completion_profile", "")
+        c.complete("pri")
+        with tt.AssertPrints("IPCompleter.magic_matches"):
+            _ip.run_line_magic("completion_profile", "")
+        _ip.run_line_magic("completion_profile",
+                           "--disable file_matches --disable jedi")
+        nt.assert_equal(c.disabled_matchers, ["file_matches", "jedi"])
+        _ip.run_line_magic("completion_profile", "--enable jedi")
+        nt.assert_equal(c.disabled_matchers, ["file_matches"])
+        _ip.run_line_magic("completion_profile", "--order magic_matches")
+        nt.assert_equal(c.matcher_order, ["magic_matches"])
+    finally:
+        c.disabled_matchers = []
+        c.matcher_order = []
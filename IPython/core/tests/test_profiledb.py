@@ -0,0 +1,97 @@
+"""Tests for the SQLite profile database"""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+import os
+
+import nose.tools as nt
+from pickleshare import PickleShareDB
+
+from IPython.core.profiledb import ProfileDB
+from IPython.utils.tempdir import TemporaryDirectory
+
+
+def test_mapping():
+    with TemporaryDirectory() as td:
+        db = ProfileDB(os.path.join(td, 'db.sqlite'))
+        db['a'] = [1, 2]
+        db['autorestore/x'] = 1
+        db['autorestore/y'] = 'y'
+        db['autorestore/sub/z'] = None
+        nt.assert_equal(db['a'], [1, 2])
+        nt.assert_in('autorestore/x', db)
+        nt.assert_not_in('b', db)
+        nt.assert_equal(db.get('b', 5), 5)
+        nt.assert_equal(len(db), 4)
+        nt.assert_equal(db.keys('autorestore/*'), ['autorestore/x', 'autorestore/y'])
+        nt.assert_equal(sorted(db), db.keys())
+        del db['a']
+        del db['a']  # Missing keys are ignored, as with pickleshare
+        nt.assert_not_in('a', db)
+        db.close()
+
+        # Persisted
+        db = ProfileDB(os.path.join(td, 'db.sqlite'))
+        nt.assert_equal(db['autorestore/y'], 'y')
+        db.close()
+
+
+def test_other_connection():
+    """Values cached by a connection are refreshed when another changes them"""
+    with TemporaryDirectory() as td:
+        filename = os.path.join(td, 'db.sqlite')
+        db1, db2 = ProfileDB(filename), ProfileDB(filename)
+        db1['k'] = 1
+        nt.assert_equal(db2['k'], 1)
+        db1['k'] = 2
+        nt.assert_equal(db2['k'], 2)
+        del db1['k']
+        with nt.assert_raises(KeyError):
+            db2['k']
+        db1.close()
+        db2.close()
+
+
+def test_transaction():
+    with TemporaryDirectory() as td:
+        filename = os.path.join(td, 'db.sqlite')
+        db, other = ProfileDB(filename), ProfileDB(filename)
+        with db.transaction():
+            db['a'] = 1
+            with db.transaction():
+                db['b'] = 2
+            nt.assert_not_in('a', other)
+        nt.assert_equal((other['a'], other['b']), (1, 2))
+
+        with nt.assert_raises(ValueError):
+            with db.transaction():
+                db['a'] = 3
+                raise ValueError
+        nt.assert_equal(db['a'], 1)
+        db.close()
+        other.close()
+
+
+def test_migrate_pickleshare():
+    with TemporaryDirectory() as td:
+        old_dir = os.path.join(td, 'db')
+        old = PickleShareDB(old_dir)
+        old['dhist'] = ['/tmp']
+        old['autorestore/foo'] = {'a': 1}
+        with open(os.path.join(old_dir, 'broken'), 'wb') as f:
+            f.write(b'not a pickle')
+
+        filename = os.path.join(td, 'db.sqlite')
+        db = ProfileDB(filename, migrate_from=old_dir)
+        nt.assert_equal(db['dhist'], ['/tmp'])
+        nt.assert_equal(db.keys('autorestore/*'), ['autorestore/foo'])
+        with nt.assert_raises(KeyError):
+            db['broken']
+        del db['dhist']
+        db.close()
+
+        # Only once
+        db = ProfileDB(filename, migrate_from=old_dir)
+        nt.assert_not_in('dhist', db)
+        db.close()
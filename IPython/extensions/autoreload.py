@@ -48,6 +48,32 @@
     Reload all modules (except those excluded by ``%aimport``) every
     time before executing the Python code typed.
 
+``%autoreload 2 --watch``
+
+    Same as above, but learn which modules changed from a file watcher,
+    rather than by checking the modification time of every module before
+    each cell. On Linux, the watcher uses inotify, which costs nothing until
+    files change. Elsewhere, it still checks the modification time of every
+    module file before each cell, so that no change is missed, unless
+    ``c.AutoreloadMagics.watch_interval`` is set: a thread then checks them
+    every ``watch_interval`` seconds, and a change made less than
+    ``watch_interval`` seconds before running a cell may only be reloaded at
+    the next cell. Also works with ``%autoreload 1``, and can be made the
+    default with ``c.AutoreloadMagics.watch = True``.
+
+``%autoreload 2 --print``
+
+    Also print the modules reloaded, and how long each reload took.
+
+``%autoreload 2 --track``
+
+    Also have the classes created by reloads record their instances, so that
+    the next reloads move them to the new classes without scanning the whole
+    heap with the garbage collector. This speeds up reloads in sessions with
+    many objects, but makes creating instances of the tracked classes several
+    times slower, and their ``__new__`` attribute becomes a tracker object.
+    Can be made the default with ``c.AutoreloadMagics.track = True``.
+
 ``%aimport``
 
     List modules which are to be automatically imported or not to be imported.
@@ -80,6 +106,11 @@
   calling 'c.foo()' on an object 'c' created before the reload causes
   the new code for 'foo' to be executed.
 
+- Modules which import from a changed module (``from xxx import CONSTANT``)
+  are reloaded with it, after it, so that they see its new contents. The
+  imports are read from the bytecode of the modules, except for those of the
+  standard library and site-packages.
+
 Some of the known remaining caveats are:
 
 - Replacing code objects does not always succeed: changing a @property
@@ -110,16 +141,25 @@
 # Imports
 #-----------------------------------------------------------------------------
 
+import abc
+import builtins
+import dis
+import inspect
 import os
 import sys
+import sysconfig
+import threading
+import time
 import traceback
 import types
 import weakref
 import gc
 from importlib import import_module
-from importlib.util import source_from_cache
+from importlib.util import resolve_name, source_from_cache
 from imp import reload
 
+from IPython.utils.filewatch import file_watcher
+
 #------------------------------------------------------------------------------
 # Autoreload functionality
 #------------------------------------------------------------------------------
@@ -131,6 +171,12 @@ class ModuleReloader(object):
     check_all = True
     """Autoreload all modules, not just those listed in 'modules'"""
 
+    verbose = False
+    """Print the modules reloaded, and how long it took"""
+
+    track_instances = False
+    """Record the instances of reloaded classes, see :func:`track_instances`"""
+
     def __init__(self):
         # Modules that failed to reload: {module: mtime-on-failed-reload, ...}
         self.failed = {}
@@ -142,6 +188,19 @@ def __init__(self):
         self.old_objects = {}
         # Module modification timestamps
         self.modules_mtimes = {}
+        # File watcher telling which modules changed, and the interval it
+        # was created with, see watch_files
+        self.watcher = None
+        self._watch_interval = None
+        # Source file -> names of the modules loaded from it, and all the
+        # modules seen by the watcher
+        self._watched_files = {}
+        self._watched_modules = set()
+        # Import graph: module name -> (modification time, names of the
+        # modules it imports), see module_imports
+        self.imports = {}
+        # Time the last reload of each module took, in seconds
+        self.reload_times = {}
 
         # Cache module modification times
         self.check(check_all=True, do_reload=False)
@@ -180,24 +239,29 @@ def aimport_module(self, module_name):
         top_module = sys.modules[top_name]
         return top_module, top_name
 
-    def filename_and_mtime(self, module):
+    def source_filename(self, module):
+        """The source file of a module which can be reloaded, or None"""
         if not hasattr(module, '__file__') or module.__file__ is None:
-            return None, None
+            return None
 
         if getattr(module, '__name__', None) in [None, '__mp_main__', '__main__']:
             # we cannot reload(__main__) or reload(__mp_main__)
-            return None, None
+            return None
 
         filename = module.__file__
         path, ext = os.path.splitext(filename)
 
         if ext.lower() == '.py':
-            py_filename = filename
-        else:
-            try:
-                py_filename = source_from_cache(filename)
-            except ValueError:
-                return None, None
+            return filename
+        try:
+            return source_from_cache(filename)
+        except ValueError:
+            return None
+
+    def filename_and_mtime(self, module):
+        py_filename = self.source_filename(module)
+        if py_filename is None:
+            return None, None
 
         try:
             pymtime = os.stat(py_filename).st_mtime
@@ -206,17 +270,135 @@ def filename_and_mtime(self, module):
 
         return py_filename, pymtime
 
+    def watch_files(self, enable=True, interval=None):
+        """Find the modules to check with a file watcher.
+
+        Only the modules whose source file changed are then checked, instead
+        of stat-ing the source of every module before each cell. Where the
+        watcher has to poll the files, `interval` is passed to
+        :func:`~IPython.utils.filewatch.file_watcher`.
+        """
+        if (enable and self.watcher is not None
+                and interval != self._watch_interval):
+            self.watch_files(False)
+        if enable and self.watcher is None:
+            self.watcher = file_watcher(interval)
+            self._watch_interval = interval
+        elif not enable and self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+            self._watched_files.clear()
+            self._watched_modules.clear()
+
+    def _changed_modules(self):
+        """Names of the modules the watcher saw change, in import order"""
+        candidates = set()
+        for modname in sys.modules.keys() - self._watched_modules:
+            self._watched_modules.add(modname)
+            py_filename = self.source_filename(sys.modules.get(modname))
+            if py_filename is not None:
+                self.watcher.watch(py_filename)
+                self._watched_files.setdefault(py_filename, set()).add(modname)
+                # It may have changed before being watched
+                candidates.add(modname)
+        for path in self.watcher.changes():
+            candidates.update(self._watched_files.get(path, ()))
+        if not candidates:
+            return []
+        return [modname for modname in sys.modules if modname in candidates]
+
+    def module_imports(self, modname):
+        """Names of the loaded modules imported by the top level of a module.
+
+        Read from the bytecode of the module, and cached until the
+        modification time of its source changes. Modules of the standard
+        library and site-packages, which do not import the code being edited,
+        are not read.
+        """
+        module = sys.modules.get(modname)
+        py_filename = self.source_filename(module)
+        if py_filename is None or py_filename.startswith(_library_paths):
+            return frozenset()
+
+        # Known for the modules checked before, stat the others
+        mtime = self.modules_mtimes.get(modname)
+        if mtime is None:
+            try:
+                mtime = os.stat(py_filename).st_mtime
+            except OSError:
+                return frozenset()
+        cached = self.imports.get(modname)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            code = module.__spec__.loader.get_code(modname)
+        except Exception:
+            code = None
+        imports = frozenset()
+        if code is not None:
+            package = getattr(module, '__package__', None) or ''
+            imports = frozenset(name for name in _code_imports(code, package)
+                                if name != modname and name in sys.modules)
+        self.imports[modname] = (mtime, imports)
+        return imports
+
+    def _with_dependents(self, changed, scope):
+        """Add the modules of `scope` importing from changed modules, and
+        sort them so that every module comes after those it imports.
+        """
+        importers = {}
+        for modname in scope:
+            if modname in self.skip_modules or modname not in sys.modules:
+                continue
+            for name in self.module_imports(modname):
+                importers.setdefault(name, []).append(modname)
+        batch = set(changed)
+        todo = list(changed)
+        while todo:
+            for modname in importers.get(todo.pop(), ()):
+                if modname not in batch:
+                    batch.add(modname)
+                    todo.append(modname)
+
+        # Depth first topological sort, in import order otherwise. Cycles
+        # are broken where they are first met.
+        names = [modname for modname in sys.modules if modname in batch]
+        order, seen = [], set()
+        for root in names:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [(root, iter(self.module_imports(root) & batch))]
+            while stack:
+                modname, deps = stack[-1]
+                for dep in deps:
+                    if dep not in seen:
+                        seen.add(dep)
+                        stack.append((dep, iter(self.module_imports(dep) & batch)))
+                        break
+                else:
+                    stack.pop()
+                    order.append(modname)
+        return order
+
     def check(self, check_all=False, do_reload=True):
         """Check whether some modules need to be reloaded."""
 
         if not self.enabled and not check_all:
             return
 
-        if check_all or self.check_all:
+        if self.watcher is not None and not check_all:
+            modules = self._changed_modules()
+            if not self.check_all:
+                modules = [m for m in modules if m in self.modules]
+        elif check_all or self.check_all:
             modules = list(sys.modules.keys())
         else:
             modules = list(self.modules.keys())
 
+        # Changed module name -> (source file, modification time)
+        changed = {}
         for modname in modules:
             m = sys.modules.get(modname, None)
 
@@ -240,16 +422,85 @@ def check(self, check_all=False, do_reload=True):
             self.modules_mtimes[modname] = pymtime
 
             # If we've reached this point, we should try to reload the module
-            if do_reload:
-                try:
-                    superreload(m, reload, self.old_objects)
-                    if py_filename in self.failed:
-                        del self.failed[py_filename]
-                except:
-                    print("[autoreload of %s failed: %s]" % (
-                            modname, traceback.format_exc(10)), file=sys.stderr)
+            changed[modname] = py_filename, pymtime
+
+        if not do_reload or not changed:
+            return
+
+        # Reload the modules importing from the changed ones too, in one
+        # batch, each after the modules it imports.
+        if check_all or self.check_all:
+            scope = sys.modules.keys()
+        else:
+            scope = self.modules.keys()
+        # Modules of the batch which failed to reload, or were skipped
+        broken = set()
+        for modname in self._with_dependents(changed, list(scope)):
+            m = sys.modules.get(modname)
+            if m is None:
+                continue
+            failed_imports = self.module_imports(modname) & broken
+            if failed_imports:
+                # Running it again would only see the old version of these
+                print("[autoreload of %s skipped: %s failed to reload]" % (
+                        modname, ', '.join(sorted(failed_imports))),
+                      file=sys.stderr)
+                broken.add(modname)
+                continue
+            try:
+                start = time.perf_counter()
+                superreload(m, reload, self.old_objects,
+                            track=self.track_instances)
+                self.reload_times[modname] = time.perf_counter() - start
+                if self.verbose:
+                    print("[autoreload of %s took %.3g s]" % (
+                            modname, self.reload_times[modname]))
+                if modname in changed:
+                    self.failed.pop(changed[modname][0], None)
+            except:
+                print("[autoreload of %s failed: %s]" % (
+                        modname, traceback.format_exc(10)), file=sys.stderr)
+                broken.add(modname)
+                if modname in changed:
+                    py_filename, pymtime = changed[modname]
                     self.failed[py_filename] = pymtime
 
+
+_library_paths = tuple(sorted({
+    os.path.join(sysconfig.get_path(name), '')
+    for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+    if sysconfig.get_path(name)
+}))
+
+
+def _code_imports(code, package):
+    """Yield the names of the modules imported by a code object.
+
+    Only the code object itself is looked at, not the functions it defines.
+    Names listed after ``from x import`` are yielded as submodules of x as
+    well, as they may be.
+    """
+    consts = []
+    for instr in dis.get_instructions(code):
+        if instr.opname == 'IMPORT_NAME':
+            name = instr.argval
+            level, fromlist = 0, None
+            if len(consts) >= 2:
+                level, fromlist = consts[-2], consts[-1]
+            if level:
+                try:
+                    name = resolve_name('.' * level + name, package)
+                except (ImportError, ValueError):
+                    continue
+            if name:
+                yield name
+                for item in fromlist or ():
+                    yield name + '.' + item
+        if instr.opname == 'LOAD_CONST':
+            consts.append(instr.argval)
+        else:
+            consts = []
+
 #------------------------------------------------------------------------------
 # superreload
 #------------------------------------------------------------------------------
@@ -268,16 +519,162 @@ def update_function(old, new):
             pass
 
 
+# Classes whose instances are all recorded: class -> WeakSet of instances
+_instance_registry = weakref.WeakKeyDictionary()
+
+
+class _InstanceTracker(object):
+    """``__new__`` of a class, recording the instances it creates.
+
+    Installed by :func:`track_instances`, on top of the ``__new__`` the class
+    had, which it calls.
+    """
+
+    def __init__(self, cls, new):
+        if isinstance(new, _InstanceTracker):
+            new = new.new
+        self.cls = cls
+        self.new = new
+
+    def __call__(self, cls, *args, **kwargs):
+        if self.new is object.__new__:
+            # object.__new__ refuses arguments once __new__ is overridden
+            if (args or kwargs) and cls.__init__ is object.__init__:
+                raise TypeError("%s() takes no arguments" % cls.__name__)
+            obj = object.__new__(cls)
+        else:
+            obj = self.new(cls, *args, **kwargs)
+        instances = _instance_registry.get(type(obj))
+        if instances is not None:
+            try:
+                instances.add(obj)
+            except TypeError:
+                pass
+        return obj
+
+    @property
+    def __signature__(self):
+        # What inspect.signature(cls) gave before, with the cls argument
+        if inspect.isfunction(self.new):
+            return inspect.signature(self.new)
+        init = self.cls.__init__
+        cls_param = inspect.Parameter('cls', inspect.Parameter.POSITIONAL_ONLY)
+        if init is object.__init__:
+            return inspect.Signature([cls_param])
+        try:
+            if isinstance(init, types.WrapperDescriptorType):
+                # Inherited from a builtin type, which knows its signature
+                params = list(inspect.signature(self.cls.__mro__[1]).parameters.values())
+            else:
+                params = list(inspect.signature(init).parameters.values())[1:]
+        except (TypeError, ValueError):
+            params = [
+                inspect.Parameter('args', inspect.Parameter.VAR_POSITIONAL),
+                inspect.Parameter('kwargs', inspect.Parameter.VAR_KEYWORD),
+            ]
+        return inspect.Signature([cls_param] + params)
+
+
+def track_instances(cls):
+    """Record the instances of a class created from now on.
+
+    :func:`update_instances` then finds them without scanning the heap. Only
+    meant for classes without instances yet. Returns whether the class can be
+    tracked: its instances must support weak references, and its metaclass
+    must not depend on its __new__ (like that of enums does).
+
+    This sets the ``__new__`` attribute of the class to an
+    :class:`_InstanceTracker`, which makes creating instances several times
+    slower.
+    """
+    if cls in _instance_registry:
+        return True
+    if type(cls) not in (type, abc.ABCMeta) or not cls.__weakrefoffset__:
+        return False
+    try:
+        cls.__new__ = _InstanceTracker(cls, cls.__new__)
+    except (AttributeError, TypeError):
+        return False
+    _instance_registry[cls] = weakref.WeakSet()
+    return True
+
+
+class _TrackingClasses(object):
+    """Context manager tracking the instances of the classes created in a
+    module while it runs, see :func:`track_instances`.
+
+    Classes are tracked as soon as they are created, before any instance,
+    by replacing ``builtins.__build_class__``. The replacement is installed
+    once for all the threads reloading modules, and only tracks the classes
+    of the module the current thread reloads.
+    """
+
+    _lock = threading.Lock()
+    # Number of threads in the context manager, and the replaced function
+    _users = 0
+    _original = None
+    # .modules: names of the modules reloading in this thread, innermost last
+    _local = threading.local()
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+
+    @staticmethod
+    def _build_class(*args, **kwargs):
+        cls = _TrackingClasses._original(*args, **kwargs)
+        modules = getattr(_TrackingClasses._local, 'modules', None)
+        if (modules and isinstance(cls, type)
+                and cls.__module__ == modules[-1]):
+            track_instances(cls)
+        return cls
+
+    def __enter__(self):
+        cls = type(self)
+        with cls._lock:
+            if not cls._users:
+                cls._original = builtins.__build_class__
+                builtins.__build_class__ = cls._build_class
+            cls._users += 1
+        if not hasattr(cls._local, 'modules'):
+            cls._local.modules = []
+        cls._local.modules.append(self.module_name)
+
+    def __exit__(self, *exc_info):
+        cls = type(self)
+        cls._local.modules.pop()
+        with cls._lock:
+            cls._users -= 1
+            # Unless someone else replaced it since
+            if not cls._users and builtins.__build_class__ is cls._build_class:
+                builtins.__build_class__ = cls._original
+
+
 def update_instances(old, new):
-    """Use garbage collector to find all instances that refer to the old
-    class definition and update their __class__ to point to the new class
-    definition"""
-    
-    refs = gc.get_referrers(old)
+    """Update the __class__ of all the instances of the old class definition
+    to point to the new class definition.
 
+    Instances of classes tracked with :func:`track_instances` are found in
+    their registry, at a cost proportional to their number. Others are found
+    with the garbage collector, which scans the whole heap.
+    """
+    instances = _instance_registry.get(old)
+    if instances is not None:
+        refs = list(instances)
+        instances.clear()
+    else:
+        refs = gc.get_referrers(old)
+
+    new_instances = _instance_registry.get(new)
     for ref in refs:
         if type(ref) is old:
             ref.__class__ = new
+            if new_instances is not None:
+                new_instances.add(ref)
+
+    if instances is None and isinstance(old.__dict__.get('__new__'), _InstanceTracker):
+        # No instances left, and new ones will be recorded as old now creates
+        # them like new does.
+        _instance_registry[old] = weakref.WeakSet()
 
 
 def update_class(old, new):
@@ -356,7 +753,7 @@ def __call__(self):
         return self.obj
 
 
-def superreload(module, reload=reload, old_objects=None):
+def superreload(module, reload=reload, old_objects=None, track=False):
     """Enhanced version of the builtin reload function.
 
     superreload remembers objects previously in the module, and
@@ -364,6 +761,8 @@ def superreload(module, reload=reload, old_objects=None):
     - upgrades the class dictionary of every old class in the module
     - upgrades the code object of every old function and method
     - clears the module's namespace before reloading
+    - if `track` is true, tracks the instances of the new classes, so that
+      the next reload updates them quickly (see :func:`track_instances`)
 
     """
     if old_objects is None:
@@ -391,7 +790,11 @@ def superreload(module, reload=reload, old_objects=None):
         pass
 
     try:
-        module = reload(module)
+        if track:
+            with _TrackingClasses(module.__name__):
+                module = reload(module)
+        else:
+            module = reload(module)
     except:
         # restore module dictionary on failed reload
         module.__dict__.update(old_dict)
@@ -421,9 +824,35 @@ def superreload(module, reload=reload, old_objects=None):
 #------------------------------------------------------------------------------
 
 from IPython.core.magic import Magics, magics_class, line_magic
+from traitlets import Bool, Float
 
 @magics_class
 class AutoreloadMagics(Magics):
+    watch = Bool(False, help=
+        """
+        Use a file watcher to find the modules to reload, as with
+        %autoreload --watch.
+        """
+    ).tag(config=True)
+
+    watch_interval = Float(None, allow_none=True, help=
+        """
+        Where the file watcher polls the files (everywhere but Linux), check
+        them every watch_interval seconds in a thread, rather than checking
+        every module file before each cell. Cells then start sooner, but a
+        change made less than watch_interval seconds before running a cell
+        may only be reloaded at the next one.
+        """
+    ).tag(config=True)
+
+    track = Bool(False, help=
+        """
+        Have the classes created by reloads record their instances, as with
+        %autoreload --track. Reloads then do not scan the heap for instances,
+        but creating instances of these classes is several times slower.
+        """
+    ).tag(config=True)
+
     def __init__(self, *a, **kw):
         super(AutoreloadMagics, self).__init__(*a, **kw)
         self._reloader = ModuleReloader()
@@ -449,6 +878,22 @@ def autoreload(self, parameter_s=''):
         Reload all modules (except those excluded by %aimport) every time
         before executing the Python code typed.
 
+        %autoreload 1 --watch, %autoreload 2 --watch
+        As above, but find the modules which changed with a file watcher
+        rather than by checking every module before each execution. On Linux,
+        where the watcher uses inotify, this is much faster with many modules
+        imported, or on network file systems. Elsewhere, the files are still
+        checked before each execution, unless AutoreloadMagics.watch_interval
+        is set to check them periodically in a thread instead.
+
+        %autoreload 1 --track, %autoreload 2 --track
+        Also have the classes created by reloads record their instances, so
+        that the next reloads find them without scanning the heap. Creating
+        instances of these classes becomes several times slower.
+
+        %autoreload 1 --print, %autoreload 2 --print
+        Also print the modules reloaded, and how long each reload took.
+
         Reloading Python modules in a reliable way is in general
         difficult, and unexpected things may occur. %autoreload tries to
         work around common pitfalls by replacing function code objects and
@@ -475,16 +920,35 @@ def autoreload(self, parameter_s=''):
           autoreloaded.
 
         """
+        args = parameter_s.split()
+        watch = self.watch or '--watch' in args
+        track = self.track or '--track' in args
+        verbose = '--print' in args
+        parameter_s = ' '.join(a for a in args
+                               if a not in ('--watch', '--print', '--track'))
         if parameter_s == '':
-            self._reloader.check(True)
+            self._reloader.verbose, verbose = verbose, self._reloader.verbose
+            try:
+                self._reloader.check(True)
+            finally:
+                self._reloader.verbose = verbose
         elif parameter_s == '0':
             self._reloader.enabled = False
+            self._reloader.verbose = False
+            self._reloader.track_instances = False
+            self._reloader.watch_files(False)
         elif parameter_s == '1':
             self._reloader.check_all = False
             self._reloader.enabled = True
+            self._reloader.verbose = verbose
+            self._reloader.track_instances = track
+            self._reloader.watch_files(watch, self.watch_interval)
         elif parameter_s == '2':
             self._reloader.check_all = True
             self._reloader.enabled = True
+            self._reloader.verbose = verbose
+            self._reloader.track_instances = track
+            self._reloader.watch_files(watch, self.watch_interval)
 
     @line_magic
     def aimport(self, parameter_s='', stream=None):
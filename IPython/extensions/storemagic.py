@@ -8,16 +8,116 @@
 :file:`ipython_config.py` file::
 
   c.StoreMagics.autorestore = True
+
+Large buffers, such as the data of NumPy arrays, are written to files of the
+``store`` directory of the profile rather than pickled in the database, and
+mapped in memory when the variables are restored, so that restoring them costs
+nothing until the data is used.
 """
 
 # Copyright (c) IPython Development Team.
 # Distributed under the terms of the Modified BSD License.
 
-import inspect, os, sys, textwrap
+import contextlib, glob, inspect, mmap, os, pickle, shutil, sys, tempfile, textwrap
 
 from IPython.core.error import UsageError
 from IPython.core.magic import Magics, magics_class, line_magic
-from traitlets import Bool
+from traitlets import Bool, Integer
+
+# Out-of-band buffers need pickle protocol 5 (Python 3.8)
+OUT_OF_BAND = pickle.HIGHEST_PROTOCOL >= 5
+
+
+class OutOfBandValue(object):
+    """Stands in the database for a value whose large buffers are in files.
+
+    The rest of the value is pickled in `data`, and the buffers are the files
+    ``0.buf``, ``1.buf``... of `directory`. Unpickling it gives the value back,
+    with the buffers mapped from the files.
+    """
+
+    def __init__(self, data, directory, count):
+        self.data = data
+        self.directory = directory
+        self.count = count
+
+    def __reduce__(self):
+        return load_out_of_band, (self.data, self.directory, self.count)
+
+
+def load_out_of_band(data, directory, count):
+    """Unpickle `data`, with its buffers mapped from the files of `directory`.
+
+    The mappings are copy-on-write: the value can be changed, without changing
+    the files.
+    """
+    buffers = []
+    for i in range(count):
+        with open(os.path.join(directory, '%d.buf' % i), 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                buffers.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+            else:
+                # Empty files can not be mapped
+                buffers.append(bytearray())
+    return pickle.loads(data, buffers=buffers)
+
+
+def dump_out_of_band(obj, root, name, threshold):
+    """Pickle `obj`, writing its buffers over `threshold` bytes to files.
+
+    The files go in a new directory of `root`, named after `name`. Returns an
+    :class:`OutOfBandValue`, or None if `obj` has no such buffers.
+    """
+    if not OUT_OF_BAND or threshold is None:
+        return None
+    buffers = []
+    def out_of_band(buf):
+        try:
+            raw = buf.raw()
+        except BufferError:
+            # Not contiguous
+            return True
+        if raw.nbytes <= threshold:
+            return True
+        buffers.append(raw)
+        return False
+    data = pickle.dumps(obj, protocol=5, buffer_callback=out_of_band)
+    if not buffers:
+        return None
+    os.makedirs(root, exist_ok=True)
+    directory = tempfile.mkdtemp(prefix=name + '.', dir=root)
+    try:
+        for i, raw in enumerate(buffers):
+            with open(os.path.join(directory, '%d.buf' % i), 'wb') as f:
+                f.write(raw)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return OutOfBandValue(data, directory, len(buffers))
+
+
+def remove_out_of_band(root, name, keep=None):
+    """Remove the buffer files stored for `name`, except those in `keep`"""
+    for directory in glob.glob(os.path.join(root, glob.escape(name) + '.*')):
+        if directory != keep:
+            # Files still mapped can not be removed on Windows: leave them
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def _uncache(db, key):
+    """Have `db` read `key` again, rather than return the value it was set to"""
+    root = getattr(db, 'root', None)
+    # pickleshare caches values by path
+    db.uncache(key if root is None else root / key)
+
+
+def _transaction(db):
+    """Commit the writes made to `db` in the block at once, if it can"""
+    transaction = getattr(db, 'transaction', None)
+    if transaction is None:
+        # pickleshare writes each key to its own file
+        return contextlib.nullcontext()
+    return transaction()
 
 
 def restore_aliases(ip, alias=None):
@@ -68,6 +168,14 @@ class StoreMagics(Magics):
         """
     ).tag(config=True)
 
+    buffer_threshold = Integer(1024 * 1024, allow_none=True, help=
+        """Buffers larger than this many bytes, such as the data of NumPy
+        arrays, are stored in their own files and mapped in memory when
+        restored, rather than pickled in the database. None to pickle them
+        all in the database.
+        """
+    ).tag(config=True)
+
     def __init__(self, shell):
         super(StoreMagics, self).__init__(shell=shell)
         self.shell.configurables.append(self)
@@ -114,6 +222,10 @@ def store(self, parameter_s=''):
         Note also that the variables will need to be pickleable; most basic
         python types can be safely %store'd.
 
+        Large buffers, such as the data of NumPy arrays, are stored in files
+        of the profile, and mapped in memory when restored: they are only
+        read when used (see ``StoreMagics.buffer_threshold``).
+
         Also aliases can be %store'd across sessions.
         To remove an alias from the storage, use the %unalias magic.
         """
@@ -122,6 +234,7 @@ def store(self, parameter_s=''):
         args = argsl.split()
         ip = self.shell
         db = ip.db
+        buffer_root = os.path.join(ip.profile_dir.location, 'store')
         # delete
         if 'd' in opts:
             try:
@@ -133,10 +246,13 @@ def store(self, parameter_s=''):
                     del db['autorestore/' + todel]
                 except BaseException as e:
                     raise UsageError("Can't delete variable '%s'" % todel) from e
+                remove_out_of_band(buffer_root, todel)
         # reset
         elif 'z' in opts:
-            for k in db.keys('autorestore/*'):
-                del db[k]
+            with _transaction(db):
+                for k in db.keys('autorestore/*'):
+                    del db[k]
+            shutil.rmtree(buffer_root, ignore_errors=True)
 
         elif 'r' in opts:
             if args:
@@ -195,36 +311,50 @@ def store(self, parameter_s=''):
                 return
 
             # %store foo
-            for arg in args:
-                try:
-                    obj = ip.user_ns[arg]
-                except KeyError:
-                    # it might be an alias
-                    name = arg
+            # Buffers of the previous values are only removed once the new
+            # values are committed
+            stored_buffers = []
+            with _transaction(db):
+                for arg in args:
                     try:
-                        cmd = ip.alias_manager.retrieve_alias(name)
-                    except ValueError as e:
-                        raise UsageError("Unknown variable '%s'" % name) from e
+                        obj = ip.user_ns[arg]
+                    except KeyError:
+                        # it might be an alias
+                        name = arg
+                        try:
+                            cmd = ip.alias_manager.retrieve_alias(name)
+                        except ValueError as e:
+                            raise UsageError("Unknown variable '%s'" % name) from e
 
-                    staliases = db.get('stored_aliases',{})
-                    staliases[name] = cmd
-                    db['stored_aliases'] = staliases
-                    print("Alias stored: %s (%s)" % (name, cmd))
-                    return
+                        staliases = db.get('stored_aliases',{})
+                        staliases[name] = cmd
+                        db['stored_aliases'] = staliases
+                        print("Alias stored: %s (%s)" % (name, cmd))
+                        break
 
-                else:
-                    modname = getattr(inspect.getmodule(obj), '__name__', '')
-                    if modname == '__main__':
-                        print(textwrap.dedent("""\
-                        Warning:%s is %s
-                        Proper storage of interactively declared classes (or instances
-                        of those classes) is not possible! Only instances
-                        of classes in real modules on file system can be %%store'd.
-                        """ % (arg, obj) ))
-                        return
-                    #pickled = pickle.dumps(obj)
-                    db[ 'autorestore/' + arg ] = obj
-                    print("Stored '%s' (%s)" % (arg, obj.__class__.__name__))
+                    else:
+                        modname = getattr(inspect.getmodule(obj), '__name__', '')
+                        if modname == '__main__':
+                            print(textwrap.dedent("""\
+                            Warning:%s is %s
+                            Proper storage of interactively declared classes (or instances
+                            of those classes) is not possible! Only instances
+                            of classes in real modules on file system can be %%store'd.
+                            """ % (arg, obj) ))
+                            break
+                        key = 'autorestore/' + arg
+                        stored = dump_out_of_band(obj, buffer_root, arg,
+                                                  self.buffer_threshold)
+                        if stored is None:
+                            db[key] = obj
+                        else:
+                            db[key] = stored
+                            _uncache(db, key)
+                        stored_buffers.append(
+                            (arg, getattr(stored, 'directory', None)))
+                        print("Stored '%s' (%s)" % (arg, obj.__class__.__name__))
+            for arg, directory in stored_buffers:
+                remove_out_of_band(buffer_root, arg, keep=directory)
 
 
 def load_ipython_extension(ip):
@@ -12,20 +12,24 @@
 # Imports
 #-----------------------------------------------------------------------------
 
+import builtins
+import inspect
 import os
 import sys
 import tempfile
 import textwrap
 import shutil
 import random
+import threading
 import time
 from io import StringIO
 
 import nose.tools as nt
 import IPython.testing.tools as tt
 
-from unittest import TestCase
+from unittest import TestCase, mock
 
+from IPython.extensions import autoreload
 from IPython.extensions.autoreload import AutoreloadMagics
 from IPython.core.events import EventManager, pre_run_cell
 
@@ -435,6 +439,158 @@ def check_module_contents():
         self.shell.run_code("pass") # trigger reload
         nt.assert_equal(mod.x, -99)
 
+    def test_reload_dependents(self):
+        """Modules importing from a changed module are reloaded after it"""
+        self.shell.magic_autoreload("2")
+        a_name, a_fn = self.new_module("CONST = 1\n")
+        b_name, _ = self.new_module("from %s import CONST\nVALUE = CONST * 10\n"
+                                    % a_name)
+        c_name, _ = self.new_module("import os\nfrom %s import VALUE\n"
+                                    "TOTAL = VALUE + 1\n" % b_name)
+        self.shell.run_code("import %s" % c_name)
+        reloader = self.shell.auto_magics._reloader
+        self.assertEqual(reloader.module_imports(b_name), {a_name})
+        self.assertEqual(reloader.module_imports(c_name), {b_name, 'os'})
+
+        self.write_file(a_fn, "CONST = 2\n")
+        self.shell.run_code("total = %s.TOTAL" % c_name)
+        self.assertEqual(self.shell.ns['total'], 21)
+
+        # The dependents of a module which fails to reload are left alone
+        self.write_file(a_fn, "CONST = 3\nraise ValueError('broken')\n")
+        with tt.AssertPrints("skipped: %s failed" % a_name, channel='stderr'):
+            self.shell.run_code("pass")
+        self.assertEqual(sys.modules[b_name].VALUE, 20)
+        self.assertEqual(sys.modules[c_name].TOTAL, 21)
+
+        self.write_file(a_fn, "CONST = 4\n")
+        self.shell.run_code("total = %s.TOTAL" % c_name)
+        self.assertEqual(self.shell.ns['total'], 41)
+
+    def test_reload_tracked_instances(self):
+        """Instances of reloaded classes are found without scanning the heap"""
+        mod_name, mod_fn = self.new_module("""
+            class Test:
+                def __init__(self, x):
+                    self.x = x
+                def meth(self):
+                    return 1
+            """)
+        self.shell.magic_autoreload("2 --print --track")
+        self.shell.run_code("from %s import Test" % mod_name)
+        self.shell.run_code("before = Test(0)")
+        with tt.AssertPrints("[autoreload of %s took" % mod_name):
+            self.write_file(mod_fn, """
+                class Test:
+                    def __init__(self, x):
+                        self.x = x
+                    def meth(self):
+                        return 2
+                """)
+            self.shell.run_code("after = Test(1)")
+        new_class = sys.modules[mod_name].Test
+        self.assertIn(new_class, autoreload._instance_registry)
+        self.assertEqual(str(inspect.signature(new_class)), "(x)")
+        self.assertIn(mod_name, self.shell.auto_magics._reloader.reload_times)
+
+        self.write_file(mod_fn, """
+            class Test:
+                def __init__(self, x):
+                    self.x = x
+                def meth(self):
+                    return 3
+            """)
+        with mock.patch.object(autoreload.gc, 'get_referrers',
+                               wraps=autoreload.gc.get_referrers) as get_referrers:
+            self.shell.run_code("pass")
+            get_referrers.assert_not_called()
+        for name in ("before", "after"):
+            obj = self.shell.ns[name]
+            self.assertIs(type(obj), sys.modules[mod_name].Test)
+            self.assertEqual(obj.meth(), 3)
+
+        # Tracking is opt-in
+        self.shell.magic_autoreload("2")
+        self.write_file(mod_fn, """
+            class Test:
+                pass
+            """)
+        self.shell.run_code("pass")
+        self.assertNotIn(sys.modules[mod_name].Test, autoreload._instance_registry)
+
+    def test_tracking_classes_other_threads(self):
+        """Classes created by other threads during a reload are not tracked"""
+        build_class = builtins.__build_class__
+        created = []
+        def define():
+            class Other:
+                __module__ = "tracked_module"
+            created.append(Other)
+        with autoreload._TrackingClasses("tracked_module"):
+            class Mine:
+                __module__ = "tracked_module"
+            thread = threading.Thread(target=define)
+            thread.start()
+            thread.join()
+        self.assertIs(builtins.__build_class__, build_class)
+        self.assertIn(Mine, autoreload._instance_registry)
+        self.assertNotIn(created[0], autoreload._instance_registry)
+
+    def test_autoreload_watch(self):
+        """With --watch, only the modules whose files changed are checked"""
+        mod_name, mod_fn = self.new_module("x = 1\n")
+        other_name, _ = self.new_module("y = 1\n")
+        self.shell.magic_autoreload("2 --watch")
+        reloader = self.shell.auto_magics._reloader
+        self.assertIsNotNone(reloader.watcher)
+        self.shell.run_code("import %s, %s" % (mod_name, other_name))
+        self.shell.run_code("pass")
+
+        self.write_file(mod_fn, "x = 2\n")
+        checked = []
+        filename_and_mtime = reloader.filename_and_mtime
+        def spy(module):
+            checked.append(module.__name__)
+            return filename_and_mtime(module)
+        reloader.filename_and_mtime = spy
+        for _ in range(100):
+            self.shell.run_code("x = %s.x" % mod_name)
+            if self.shell.ns['x'] == 2:
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.shell.ns['x'], 2)
+        self.assertEqual(set(checked), {mod_name})
+
+        self.shell.magic_autoreload("0")
+        self.assertIsNone(reloader.watcher)
+
+    def test_autoreload_watch_interval(self):
+        """With watch_interval, a polling watcher checks files in a thread"""
+        from IPython.utils import filewatch
+        mod_name, mod_fn = self.new_module("x = 1\n")
+        self.shell.auto_magics.watch_interval = 0.01
+        with mock.patch.object(filewatch, 'InotifyWatcher', side_effect=OSError):
+            self.shell.magic_autoreload("2 --watch")
+        reloader = self.shell.auto_magics._reloader
+        try:
+            self.assertIsInstance(reloader.watcher, filewatch.PollingWatcher)
+            self.assertEqual(reloader.watcher.interval, 0.01)
+            self.shell.run_code("import %s" % mod_name)
+            self.shell.run_code("pass")
+            self.assertIsNotNone(reloader.watcher._thread)
+
+            self.write_file(mod_fn, "x = 2\n")
+            for _ in range(100):
+                self.shell.run_code("x = %s.x" % mod_name)
+                if self.shell.ns['x'] == 2:
+                    break
+                time.sleep(0.05)
+            self.assertEqual(self.shell.ns['x'], 2)
+        finally:
+            self.shell.auto_magics.watch_interval = None
+            self.shell.magic_autoreload("0")
+        self.assertIsNone(reloader.watcher)
+
     def test_smoketest_aimport(self):
         self._check_smoketest(use_aimport=True)
 
@@ -1,8 +1,14 @@
 import tempfile, os
+from unittest import SkipTest
 
 from traitlets.config.loader import Config
 import nose.tools as nt
 
+from IPython.core.error import UsageError
+
+from IPython.extensions import storemagic
+from IPython.testing import decorators as dec
+
 
 def setup_module():
     ip.magic('load_ext storemagic')
@@ -64,3 +70,61 @@ def test_autorestore():
         nt.assert_equal(ip.user_ns['foo'], 95)
     finally:
         ip.config = orig_config
+
+@dec.skipif(not storemagic.OUT_OF_BAND, "needs pickle protocol 5")
+@dec.skip_without('numpy')
+def test_store_buffers():
+    import numpy
+    a = numpy.arange(300000, dtype='float64')
+    ip.user_ns['bigarray'] = a
+    ip.user_ns['smallarray'] = numpy.arange(10)
+    root = os.path.join(ip.profile_dir.location, 'store')
+    try:
+        ip.magic('store bigarray smallarray')
+        stored = os.listdir(root)
+        nt.assert_equal(len([d for d in stored if d.startswith('bigarray.')]), 1)
+        nt.assert_false([d for d in stored if d.startswith('smallarray.')])
+
+        del ip.user_ns['bigarray']
+        ip.magic('store -r bigarray')
+        b = ip.user_ns['bigarray']
+        nt.assert_is_not(b, a)
+        numpy.testing.assert_array_equal(b, a)
+        # Mapped from the file, copy-on-write
+        b[0] = -1
+        ip.db.uncache()
+        nt.assert_equal(ip.db['autorestore/bigarray'][0], 0)
+
+        # Storing it again replaces the file
+        ip.magic('store bigarray')
+        stored = [d for d in os.listdir(root) if d.startswith('bigarray.')]
+        nt.assert_equal(len(stored), 1)
+        ip.db.uncache()
+        nt.assert_equal(ip.db['autorestore/bigarray'][0], -1)
+
+        ip.magic('store -d bigarray')
+        nt.assert_false([d for d in os.listdir(root) if d.startswith('bigarray.')])
+    finally:
+        ip.magic('store -d smallarray')
+        ip.user_ns.pop('bigarray', None)
+        ip.user_ns.pop('smallarray', None)
+
+
+def test_store_transaction():
+    if not hasattr(ip.db, 'transaction'):
+        raise SkipTest('the profile database has no transactions')
+    ip.user_ns['store_t1'] = 1
+    ip.user_ns['store_t2'] = 2
+    # Stored together, or not at all
+    ip.user_ns.pop('store_t_missing', None)
+    with nt.assert_raises(UsageError):
+        ip.magic('store store_t1 store_t2 store_t_missing')
+    nt.assert_not_in('autorestore/store_t1', ip.db.keys('autorestore/*'))
+
+    ip.magic('store store_t1 store_t2')
+    nt.assert_equal(ip.db['autorestore/store_t1'], 1)
+    nt.assert_equal(ip.db['autorestore/store_t2'], 2)
+    ip.magic('store -z')
+    nt.assert_equal(ip.db.keys('autorestore/*'), [])
+    ip.user_ns.pop('store_t1')
+    ip.user_ns.pop('store_t2')
@@ -0,0 +1,234 @@
+"""A line by line profiler for selected functions.
+
+:class:`LineProfiler` records how many times each line of the functions given
+to it runs, and how long it takes, callees included::
+
+    prof = LineProfiler()
+    prof.add_function(work)
+    with prof:
+        work()
+    print(prof.format_stats())
+
+Only the code of the selected functions is monitored: on Python 3.12 and above
+through :mod:`sys.monitoring`, so that the rest of the program runs at full
+speed, and through :func:`sys.settrace` on older versions.
+"""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+import inspect
+import linecache
+import sys
+import time
+
+from IPython.utils import PyColorize
+
+__all__ = ['LineProfiler']
+
+
+class LineProfiler(object):
+    """Profile the functions added with :meth:`add_function`, line by line.
+
+    After running, :attr:`stats` maps the code object of each function to a
+    dict of ``{lineno: [hits, seconds]}``.
+    """
+
+    #: Whether :mod:`sys.monitoring` is used, rather than :func:`sys.settrace`
+    use_monitoring = hasattr(sys, 'monitoring')
+
+    def __init__(self):
+        self.stats = {}
+        # Line being run, and since when, for each profiled frame
+        self._current = {}
+        self._enabled = False
+
+    def add_function(self, func):
+        """Profile a function, method, or all the functions of a class"""
+        if inspect.isclass(func):
+            functions = []
+            for attr in vars(func).values():
+                if isinstance(attr, (staticmethod, classmethod)):
+                    attr = attr.__func__
+                elif isinstance(attr, property):
+                    functions.extend(f for f in (attr.fget, attr.fset, attr.fdel)
+                                     if f is not None)
+                    continue
+                if inspect.isfunction(attr):
+                    functions.append(attr)
+            for f in functions:
+                self.add_function(f)
+            return
+        if inspect.ismethod(func):
+            func = func.__func__
+        code = getattr(func, '__code__', None)
+        if code is None:
+            raise TypeError("Can not profile %r, which is not a Python function"
+                            % (func,))
+        self.stats.setdefault(code, {})
+        if self._enabled and self.use_monitoring:
+            self._monitor(code)
+
+    #-------------------------------------------------------------------------
+    # Collecting
+    #-------------------------------------------------------------------------
+
+    def _line(self, frame, code, lineno):
+        now = time.perf_counter()
+        lines = self.stats[code]
+        previous = self._current.get(frame)
+        if previous is not None:
+            lines[previous[0]][1] += now - previous[1]
+        line = lines.get(lineno)
+        if line is None:
+            line = lines[lineno] = [0, 0.]
+        line[0] += 1
+        self._current[frame] = (lineno, time.perf_counter())
+
+    def _leave(self, frame, code):
+        now = time.perf_counter()
+        previous = self._current.pop(frame, None)
+        if previous is not None:
+            self.stats[code][previous[0]][1] += now - previous[1]
+
+    # sys.settrace
+    def _trace(self, frame, event, arg):
+        if frame.f_code in self.stats:
+            return self._trace_lines
+        return None
+
+    def _trace_lines(self, frame, event, arg):
+        if event == 'line':
+            self._line(frame, frame.f_code, frame.f_lineno)
+        elif event == 'return':
+            self._leave(frame, frame.f_code)
+        return self._trace_lines
+
+    # sys.monitoring: callbacks are called from the monitored frame
+    def _on_line(self, code, lineno):
+        self._line(sys._getframe(1), code, lineno)
+
+    def _on_leave(self, code, offset, value):
+        self._leave(sys._getframe(1), code)
+
+    def _on_unwind(self, code, offset, exception):
+        # PY_UNWIND can not be a local event, it is seen for every function
+        if code in self.stats:
+            self._leave(sys._getframe(1), code)
+
+    def _monitor(self, code):
+        events = sys.monitoring.events
+        sys.monitoring.set_local_events(
+            self._tool_id, code,
+            events.LINE | events.PY_RETURN | events.PY_YIELD)
+
+    def enable(self):
+        """Start profiling the functions added"""
+        if self._enabled:
+            return
+        if self.use_monitoring:
+            monitoring = sys.monitoring
+            events = monitoring.events
+            # cProfile may be using the profiler's id already
+            for tool_id in (monitoring.PROFILER_ID, 3, 4):
+                if monitoring.get_tool(tool_id) is None:
+                    break
+            else:
+                raise RuntimeError("No sys.monitoring tool id available")
+            self._tool_id = tool_id
+            monitoring.use_tool_id(tool_id, 'IPython line profiler')
+            monitoring.register_callback(self._tool_id, events.LINE, self._on_line)
+            monitoring.register_callback(self._tool_id, events.PY_RETURN, self._on_leave)
+            monitoring.register_callback(self._tool_id, events.PY_YIELD, self._on_leave)
+            monitoring.register_callback(self._tool_id, events.PY_UNWIND, self._on_unwind)
+            monitoring.set_events(self._tool_id, events.PY_UNWIND)
+            for code in self.stats:
+                self._monitor(code)
+        else:
+            self._previous_trace = sys.gettrace()
+            sys.settrace(self._trace)
+        self._enabled = True
+
+    def disable(self):
+        """Stop profiling"""
+        if not self._enabled:
+            return
+        if self.use_monitoring:
+            monitoring = sys.monitoring
+            events = monitoring.events
+            monitoring.set_events(self._tool_id, 0)
+            for code in self.stats:
+                monitoring.set_local_events(self._tool_id, code, 0)
+            for event in (events.LINE, events.PY_RETURN, events.PY_YIELD,
+                          events.PY_UNWIND):
+                monitoring.register_callback(self._tool_id, event, None)
+            monitoring.free_tool_id(self._tool_id)
+        else:
+            sys.settrace(self._previous_trace)
+            self._previous_trace = None
+        # Frames still running when profiling stops
+        self._current.clear()
+        self._enabled = False
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def runctx(self, code, globals, locals):
+        """Run `code` in the given namespaces, while profiling"""
+        with self:
+            exec(code, globals, locals)
+        return self
+
+    #-------------------------------------------------------------------------
+    # Results
+    #-------------------------------------------------------------------------
+
+    def format_stats(self, style='NoColor'):
+        """Return a report of the lines run, with their source.
+
+        Functions which did not run are left out. `style` is the
+        :class:`IPython.utils.PyColorize.Parser` color scheme to show the
+        source with.
+        """
+        reports = [self._format_function(code, lines, style)
+                   for code, lines in self.stats.items() if lines]
+        return '\n\n'.join(reports) or 'None of the profiled functions ran.'
+
+    @staticmethod
+    def _format_function(code, lines, style):
+        filename = code.co_filename
+        first = code.co_firstlineno
+        source = linecache.getlines(filename)
+        block = inspect.getblock(source[first - 1:]) if source else []
+        linenos = range(first, max([first + len(block) - 1] + list(lines)) + 1)
+        plain = [source[i - 1].rstrip('\n') if i <= len(source) else ''
+                 for i in linenos]
+        colored = plain
+        if style != 'NoColor':
+            text = PyColorize.Parser(out='str', style=style).format('\n'.join(plain) + '\n')
+            colored = text.split('\n')[:len(plain)]
+            if len(colored) != len(plain):
+                colored = plain
+
+        total = sum(t for _, t in lines.values())
+        out = ['Total time: %g s' % total,
+               'File: %s' % filename,
+               'Function: %s at line %d' % (code.co_name, first),
+               '',
+               '%6s %9s %12s %12s %8s  %s' % ('Line #', 'Hits', 'Time (ms)',
+                                              'Per Hit (us)', '% Time',
+                                              'Line Contents'),
+               '=' * 66]
+        for lineno, text in zip(linenos, colored):
+            if lineno in lines:
+                hits, t = lines[lineno]
+                out.append('%6d %9d %12.3f %12.2f %7.1f%%  %s' % (
+                    lineno, hits, 1e3 * t, 1e6 * t / hits,
+                    100 * t / total if total else 0, text))
+            else:
+                out.append('%6d %44s  %s' % (lineno, '', text))
+        return '\n'.join(out)
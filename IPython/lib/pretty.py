@@ -84,6 +84,18 @@ def _repr_pretty_(self, p, cycle):
     with p.indent(2):
         ...
 
+The output can be bounded with ``max_output`` (characters), ``max_lines``
+and ``max_depth``.  Once the budget is spent, the output ends with ``...``
+and the remaining objects are not visited: ``p.text()``, ``p.breakable()``
+and ``p.pretty()`` do nothing and ``p.exhausted`` is true.  Printers looping
+over large collections should use ``p.enumerate`` to stop early::
+
+    for idx, item in p.enumerate(self.items):
+        if idx:
+            p.text(',')
+            p.breakable()
+        p.pretty(item)
+
 Inheritance diagram:
 
 .. inheritance-diagram:: IPython.lib.pretty
@@ -149,22 +161,26 @@ def _sorted_for_pprint(items):
         except Exception:
             return items
 
-def pretty(obj, verbose=False, max_width=79, newline='\n', max_seq_length=MAX_SEQ_LENGTH):
+def pretty(obj, verbose=False, max_width=79, newline='\n', max_seq_length=MAX_SEQ_LENGTH,
+           max_depth=0, max_output=0, max_lines=0):
     """
     Pretty print the object's representation.
     """
     stream = StringIO()
-    printer = RepresentationPrinter(stream, verbose, max_width, newline, max_seq_length=max_seq_length)
+    printer = RepresentationPrinter(stream, verbose, max_width, newline, max_seq_length=max_seq_length,
+                                    max_depth=max_depth, max_output=max_output, max_lines=max_lines)
     printer.pretty(obj)
     printer.flush()
     return stream.getvalue()
 
 
-def pprint(obj, verbose=False, max_width=79, newline='\n', max_seq_length=MAX_SEQ_LENGTH):
+def pprint(obj, verbose=False, max_width=79, newline='\n', max_seq_length=MAX_SEQ_LENGTH,
+           max_depth=0, max_output=0, max_lines=0):
     """
     Like `pretty` but print to stdout.
     """
-    printer = RepresentationPrinter(sys.stdout, verbose, max_width, newline, max_seq_length=max_seq_length)
+    printer = RepresentationPrinter(sys.stdout, verbose, max_width, newline, max_seq_length=max_seq_length,
+                                    max_depth=max_depth, max_output=max_output, max_lines=max_lines)
     printer.pretty(obj)
     printer.flush()
     sys.stdout.write(newline)
@@ -198,7 +214,16 @@ class PrettyPrinter(_PrettyPrinterBase):
     callback method.
     """
 
-    def __init__(self, output, max_width=79, newline='\n', max_seq_length=MAX_SEQ_LENGTH):
+    def __init__(self, output, max_width=79, newline='\n', max_seq_length=MAX_SEQ_LENGTH,
+                 max_output=0, max_lines=0):
+        # Output budget, 0 meaning unlimited
+        self.max_output = max_output
+        self.max_lines = max_lines
+        # Characters passed to text() and breakable() so far
+        self.text_length = 0
+        self.exhausted = False
+        if max_output or max_lines:
+            output = _BudgetedOutput(self, output)
         self.output = output
         self.max_width = max_width
         self.newline = newline
@@ -229,8 +254,25 @@ def _break_outer_groups(self):
                 return
             self._break_one_group(group)
 
+    def _over_budget(self, obj):
+        """Account for text added to the output, and return the part of it
+        that fits in the budget, or None if the budget is already spent."""
+        if self.exhausted:
+            return None
+        if self.max_output:
+            # Everything fed ends up in the output: once past the budget,
+            # stop feeding. One more character makes the output ellipsized.
+            if self.text_length + len(obj) > self.max_output:
+                obj = obj[:self.max_output - self.text_length + 1]
+                self.exhausted = True
+            self.text_length += len(obj)
+        return obj
+
     def text(self, obj):
         """Add literal text to the output."""
+        obj = self._over_budget(obj)
+        if obj is None:
+            return
         width = len(obj)
         if self.buffer:
             text = self.buffer[-1]
@@ -250,6 +292,9 @@ def breakable(self, sep=' '):
         will automatically break here.  If no breaking on this position takes
         place the `sep` is inserted which default to one space.
         """
+        sep = self._over_budget(sep)
+        if sep is None:
+            return
         width = len(sep)
         group = self.group_stack[-1]
         if group.want_break:
@@ -267,6 +312,8 @@ def break_(self):
         """
         Explicitly insert a newline into the output, maintaining correct indentation.
         """
+        if self.exhausted:
+            return
         group = self.group_queue.deq()
         if group:
             self._break_one_group(group)
@@ -291,9 +338,12 @@ def begin_group(self, indent=0, open=''):
         self.group_queue.enq(group)
         self.indentation += indent
 
-    def _enumerate(self, seq):
-        """like enumerate, but with an upper limit on the number of items"""
+    def enumerate(self, seq):
+        """like enumerate, but with an upper limit on the number of items, and
+        stopping once the output budget is spent"""
         for idx, x in enumerate(seq):
+            if self.exhausted:
+                return
             if self.max_seq_length and idx >= self.max_seq_length:
                 self.text(',')
                 self.breakable()
@@ -301,6 +351,8 @@ def _enumerate(self, seq):
                 return
             yield idx, x
 
+    _enumerate = enumerate
+
     def end_group(self, dedent=0, close=''):
         """End a group. See `begin_group` for more details."""
         self.indentation -= dedent
@@ -318,6 +370,43 @@ def flush(self):
         self.buffer_width = 0
 
 
+class _BudgetedOutput(object):
+    """Output stream of a `PrettyPrinter` with an output budget.
+
+    Writes past ``max_output`` characters or ``max_lines`` lines are replaced
+    by ``...``, and mark the printer as exhausted, which stops it.
+    """
+
+    def __init__(self, printer, stream):
+        self.printer = printer
+        self.stream = stream
+        self.length = 0
+        self.lines = 0
+        self.truncated = False
+
+    def write(self, data):
+        if self.truncated:
+            return
+        printer = self.printer
+        cut = len(data)
+        if printer.max_output:
+            cut = min(cut, printer.max_output - self.length)
+        if printer.max_lines and printer.newline:
+            idx = -1
+            for _ in range(printer.max_lines - self.lines):
+                idx = data.find(printer.newline, idx + 1)
+                if idx == -1:
+                    break
+            else:
+                cut = min(cut, idx)
+        if cut < len(data):
+            data = data[:cut] + '...'
+            self.truncated = printer.exhausted = True
+        self.length += len(data)
+        self.lines += data.count(printer.newline)
+        self.stream.write(data)
+
+
 def _get_mro(obj_class):
     """ Get a reasonable method resolution order of a class and its superclasses
     for both old-style and new-style classes.
@@ -354,11 +443,15 @@ class RepresentationPrinter(PrettyPrinter):
 
     def __init__(self, output, verbose=False, max_width=79, newline='\n',
         singleton_pprinters=None, type_pprinters=None, deferred_pprinters=None,
-        max_seq_length=MAX_SEQ_LENGTH):
+        max_seq_length=MAX_SEQ_LENGTH, max_depth=0, max_output=0, max_lines=0):
 
-        PrettyPrinter.__init__(self, output, max_width, newline, max_seq_length=max_seq_length)
+        PrettyPrinter.__init__(self, output, max_width, newline, max_seq_length=max_seq_length,
+                               max_output=max_output, max_lines=max_lines)
         self.verbose = verbose
-        self.stack = []
+        # ids of the objects being printed, to detect cycles
+        self.stack = set()
+        self.depth = 0
+        self.max_depth = max_depth
         if singleton_pprinters is None:
             singleton_pprinters = _singleton_pprinters.copy()
         self.singleton_pprinters = singleton_pprinters
@@ -371,9 +464,16 @@ def __init__(self, output, verbose=False, max_width=79, newline='\n',
 
     def pretty(self, obj):
         """Pretty print the given object."""
+        if self.exhausted:
+            return
+        if self.max_depth and self.depth >= self.max_depth:
+            self.text('...')
+            return
         obj_id = id(obj)
         cycle = obj_id in self.stack
-        self.stack.append(obj_id)
+        if not cycle:
+            self.stack.add(obj_id)
+        self.depth += 1
         self.begin_group()
         try:
             obj_class = _safe_getattr(obj, '__class__', None) or type(obj)
@@ -412,7 +512,9 @@ def pretty(self, obj):
             return _default_pprint(obj, self, cycle)
         finally:
             self.end_group()
-            self.stack.pop()
+            self.depth -= 1
+            if not cycle:
+                self.stack.discard(obj_id)
 
     def _in_deferred_types(self, cls):
         """
@@ -0,0 +1,237 @@
+"""A low overhead statistical profiler, sampling the call stack of a thread.
+
+Unlike :mod:`cProfile`, which traces every call and return, the
+:class:`StackSampler` only looks at the stack of the profiled thread at
+regular intervals, from a background thread. This keeps the profiled code
+running at close to full speed, at the price of statistical results.
+
+Example::
+
+    with StackSampler(interval=0.001) as sampler:
+        work()
+    print(sampler.summary(limit=10))
+    sampler.dump('work.speedscope.json')
+
+Results can be written as collapsed stacks, the format read by
+``flamegraph.pl`` and most flame graph viewers, or as a speedscope_ JSON file.
+
+.. _speedscope: https://www.speedscope.app
+"""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from collections import Counter
+import json
+import os
+import sys
+import threading
+import time
+
+__all__ = ['StackSampler']
+
+
+class StackSampler(object):
+    """Sample the call stack of a thread at regular intervals.
+
+    Parameters
+    ----------
+    interval : float
+        Time between two samples, in seconds.
+    thread_id : int, optional
+        Identifier of the thread to sample, as returned by
+        :func:`threading.get_ident`. Defaults to the thread calling
+        :meth:`start`.
+
+    Only the frames called from the one which started sampling are recorded.
+    Stacks are tuples of ``(name, filename, first line)``, outermost first,
+    and are counted in :attr:`stacks`.
+    """
+
+    def __init__(self, interval=0.001, thread_id=None):
+        if interval <= 0:
+            raise ValueError("Sampling interval must be positive, not %r" % interval)
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.elapsed = 0.
+        self._thread = None
+        self._stopped = threading.Event()
+        self._base = None
+
+    @property
+    def samples(self):
+        """Total number of samples taken"""
+        return sum(self.stacks.values())
+
+    def start(self):
+        """Start sampling, from the caller's frame"""
+        if self._thread is not None:
+            raise RuntimeError("Sampler already started")
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_code in _own_codes:
+            frame = frame.f_back
+        self._base = frame
+        # The sampling thread needs the GIL to look at the stack: make sure
+        # the profiled thread hands it over often enough.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='StackSampler',
+                                        daemon=True)
+        self._start_time = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self.elapsed += time.perf_counter() - self._start_time
+        sys.setswitchinterval(self._switch_interval)
+        self._thread = self._base = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        current_frames = sys._current_frames
+        clock = time.perf_counter
+        deadline = clock()
+        while True:
+            # Keep to the schedule, whatever the time spent sampling
+            deadline = max(deadline + self.interval, clock())
+            if self._stopped.wait(deadline - clock()):
+                break
+            stack = self._stack(current_frames().get(self.thread_id))
+            if stack:
+                self.stacks[stack] += 1
+
+    def _stack(self, frame):
+        """The part of a stack called from the base frame, or None"""
+        stack = []
+        child = None
+        while frame is not None and frame is not self._base:
+            stack.append(frame.f_code)
+            child, frame = frame, frame.f_back
+        if frame is None or child is None or child.f_code in _own_codes:
+            # Not under the base frame, or in the sampler itself
+            return None
+        stack.reverse()
+        return tuple((c.co_name, c.co_filename, c.co_firstlineno) for c in stack)
+
+    #-------------------------------------------------------------------------
+    # Results
+    #-------------------------------------------------------------------------
+
+    @staticmethod
+    def frame_label(frame):
+        """Name a ``(name, filename, first line)`` stack entry for display"""
+        name, filename, lineno = frame
+        return '%s (%s:%d)' % (name, filename, lineno)
+
+    def collapsed(self):
+        """Return the samples as collapsed stacks.
+
+        One line per distinct stack, frames separated by semicolons, followed
+        by a space and the number of samples.
+        """
+        lines = []
+        for stack, count in sorted(self.stacks.items()):
+            labels = (self.frame_label(f).replace(';', ':') for f in stack)
+            lines.append('%s %d\n' % (';'.join(labels), count))
+        return ''.join(lines)
+
+    def speedscope(self, name='IPython'):
+        """Return the samples as a dict in the speedscope file format"""
+        frames, index = [], {}
+        samples, weights = [], []
+        period = self.elapsed / self.samples if self.stacks else self.interval
+        for stack, count in sorted(self.stacks.items()):
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1],
+                                   'line': frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * period)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'activeProfileIndex': 0,
+            'exporter': 'IPython',
+        }
+
+    def dump(self, filename):
+        """Write the samples to a file.
+
+        Files ending in ``.json`` are written in the speedscope format, any
+        other as collapsed stacks.
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            if filename.endswith('.json'):
+                json.dump(self.speedscope(os.path.basename(filename)), f)
+            else:
+                f.write(self.collapsed())
+
+    def summary(self, limit=None, sort='self', restrict=()):
+        """Return a text table of the functions seen most often.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Number of functions to list.
+        sort : {'self', 'total'}
+            Sort by samples in the function itself, or in the function and
+            the ones it called.
+        restrict : sequence of str
+            Only list functions whose label contains one of these strings.
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                total[frame] += count
+
+        nsamples = self.samples
+        header = '%d samples in %.3g s' % (nsamples, self.elapsed)
+        if nsamples:
+            header += ', one every %.3g ms' % (1e3 * self.elapsed / nsamples)
+        lines = [header, '',
+                 '%7s %7s %7s %7s  %s' % ('self', 'self%', 'total', 'total%',
+                                          'function')]
+        key = (lambda f: (own[f], total[f])) if sort == 'self' \
+            else (lambda f: (total[f], own[f]))
+        frames = sorted(total, key=key, reverse=True)
+        if restrict:
+            frames = [f for f in frames
+                      if any(r in self.frame_label(f) for r in restrict)]
+        for frame in frames[:limit]:
+            lines.append('%7d %6.1f%% %7d %6.1f%%  %s' % (
+                own[frame], 100. * own[frame] / nsamples,
+                total[frame], 100. * total[frame] / nsamples,
+                self.frame_label(frame)))
+        return '\n'.join(lines)
+
+
+_own_codes = {f.__code__ for f in (StackSampler.start, StackSampler.stop,
+                                   StackSampler.__enter__, StackSampler.__exit__)}
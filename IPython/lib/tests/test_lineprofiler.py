@@ -0,0 +1,99 @@
+"""Tests for the line profiler."""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+import sys
+
+import nose.tools as nt
+
+from IPython.lib.lineprofiler import LineProfiler
+
+
+def square(i):
+    return i * i
+
+
+def total(n):
+    s = 0
+    for i in range(n):
+        s += square(i)
+    return s
+
+
+def fail(n):
+    n += 1
+    raise ValueError(sum(range(10000)))
+
+
+def countdown(n):
+    while n:
+        yield n
+        n -= 1
+
+
+class Klass(object):
+    def method(self):
+        return total(3)
+
+    @property
+    def prop(self):
+        return 1
+
+
+def test_line_profiler():
+    prof = LineProfiler()
+    prof.add_function(total)
+    prof.add_function(countdown)
+    with prof:
+        total(10)
+        list(countdown(3))
+    first = total.__code__.co_firstlineno
+    stats = prof.stats[total.__code__]
+    nt.assert_equal(sorted(stats), [first + 1, first + 2, first + 3, first + 4])
+    nt.assert_equal(stats[first + 1][0], 1)
+    nt.assert_equal(stats[first + 3][0], 10)
+    # Calls are counted with the line calling them
+    nt.assert_greater(stats[first + 3][1], stats[first + 1][1])
+    nt.assert_not_in(square.__code__, prof.stats)
+
+    # Not profiled any more
+    total(10)
+    nt.assert_equal(stats[first + 1][0], 1)
+
+    first = countdown.__code__.co_firstlineno
+    nt.assert_equal(prof.stats[countdown.__code__][first + 2][0], 3)
+
+    report = prof.format_stats()
+    nt.assert_in('Function: total at line', report)
+    nt.assert_in('s += square(i)', report)
+    if not prof.use_monitoring:
+        nt.assert_is_none(sys.gettrace())
+
+
+def test_add_class():
+    prof = LineProfiler()
+    prof.add_function(Klass)
+    with prof:
+        Klass().method()
+    codes = {code.co_name for code, lines in prof.stats.items()}
+    nt.assert_equal(codes, {'method', 'prop'})
+    report = prof.format_stats()
+    nt.assert_in('Function: method', report)
+    nt.assert_not_in('Function: prop', report)
+    nt.assert_raises(TypeError, prof.add_function, len)
+
+
+def test_raising_function():
+    prof = LineProfiler()
+    prof.add_function(fail)
+    with prof:
+        for i in range(3):
+            with nt.assert_raises(ValueError):
+                fail(i)
+        # The frames left by the exception are not kept
+        nt.assert_equal(prof._current, {})
+    first = fail.__code__.co_firstlineno
+    hits, seconds = prof.stats[fail.__code__][first + 2]
+    nt.assert_equal(hits, 3)
+    nt.assert_greater(seconds, 0)
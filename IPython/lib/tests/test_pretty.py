@@ -490,3 +490,34 @@ def test_custom_repr():
     nt.assert_in("OrderedCounter(OrderedDict", pretty.pretty(oc))
 
     nt.assert_equal(pretty.pretty(MySet()), 'mine')
+
+
+def test_output_budget():
+    nt.assert_equal(pretty.pretty(list(range(100)), max_output=20),
+                    '[0, 1, 2, 3, 4, 5, 6...')
+    nt.assert_equal(pretty.pretty(list(range(100)), max_lines=3),
+                    '[0,\n 1,\n 2,...')
+    nt.assert_equal(pretty.pretty(list(range(3)), max_output=20), '[0, 1, 2]')
+    nt.assert_equal(pretty.pretty([[[[1]]], 2], max_depth=2), '[[...], 2]')
+
+    # Traversal stops once the budget is spent
+    visited = []
+
+    class Item(object):
+        def _repr_pretty_(self, p, cycle):
+            visited.append(self)
+            p.text('item')
+
+    pretty.pretty({i: [Item()] for i in range(1000)}, max_output=100)
+    nt.assert_less(len(visited), 20)
+
+    # Printers of their own collections can stop early too
+    class Items(object):
+        def _repr_pretty_(self, p, cycle):
+            for idx, i in p.enumerate(range(10**6)):
+                if idx:
+                    p.text(',')
+                    p.breakable()
+                p.pretty(i)
+
+    nt.assert_equal(pretty.pretty(Items(), max_output=10), '0, 1, 2, 3...')
@@ -0,0 +1,60 @@
+"""Tests for the stack sampling profiler."""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+import json
+import os
+import time
+
+import nose.tools as nt
+
+from IPython.lib.sampling import StackSampler
+from IPython.utils.tempdir import TemporaryDirectory
+
+
+def busy(duration):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+def caller():
+    busy(0.05)
+
+
+def test_sampler():
+    with StackSampler(interval=0.001) as sampler:
+        caller()
+    nt.assert_greater(sampler.samples, 0)
+    nt.assert_greater_equal(sampler.elapsed, 0.05)
+    for stack in sampler.stacks:
+        # Only frames under the one which started sampling
+        nt.assert_equal(stack[0][0], 'caller')
+    nt.assert_in(('caller', 'busy'), {(s[0][0], s[1][0]) for s in sampler.stacks
+                                      if len(s) > 1})
+
+    lines = sampler.summary(limit=1).splitlines()
+    nt.assert_equal(len(lines), 4)
+    nt.assert_in('busy', lines[-1])
+    nt.assert_in('caller', sampler.summary(limit=2, sort='total'))
+    nt.assert_not_in('caller', sampler.summary(limit=1, sort='self'))
+    nt.assert_equal(len(sampler.summary(restrict=['nothing']).splitlines()), 3)
+
+    with TemporaryDirectory() as td:
+        collapsed = os.path.join(td, 'out.txt')
+        sampler.dump(collapsed)
+        with open(collapsed) as f:
+            counts = [int(line.rsplit(' ', 1)[1]) for line in f]
+        nt.assert_equal(sum(counts), sampler.samples)
+
+        speedscope = os.path.join(td, 'out.speedscope.json')
+        sampler.dump(speedscope)
+        with open(speedscope) as f:
+            profile = json.load(f)['profiles'][0]
+        nt.assert_equal(profile['type'], 'sampled')
+        nt.assert_equal(len(profile['samples']), len(sampler.stacks))
+
+
+def test_invalid_interval():
+    nt.assert_raises(ValueError, StackSampler, 0)
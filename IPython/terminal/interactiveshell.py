@@ -32,6 +32,11 @@
 from prompt_toolkit.filters import (HasFocus, Condition, IsDone)
 from prompt_toolkit.formatted_text import PygmentsTokens
 from prompt_toolkit.history import InMemoryHistory
+try:
+    from prompt_toolkit.history import ThreadedHistory
+except ImportError:
+    # prompt_toolkit < 3.0.6 loads history in the event loop
+    ThreadedHistory = None
 from prompt_toolkit.layout.processors import ConditionalProcessor, HighlightMatchingBracketProcessor
 from prompt_toolkit.output import ColorDepth
 from prompt_toolkit.patch_stdout import patch_stdout
@@ -48,7 +53,7 @@
 from .magics import TerminalMagics
 from .pt_inputhooks import get_inputhook_name_and_func
 from .prompts import Prompts, ClassicPrompts, RichPromptDisplayHook
-from .ptutils import IPythonPTCompleter, IPythonPTLexer
+from .ptutils import IPythonPTCompleter, IPythonPTHistory, IPythonPTLexer
 from .shortcuts import create_ipython_shortcuts
 
 DISPLAY_BANNER_DEPRECATED = object()
@@ -276,6 +281,13 @@ def _displayhook_class_default(self):
                 ),
         default_value='multicolumn').tag(config=True)
 
+    complete_in_thread = Bool(False,
+        help="""Compute completions in a background thread, so that typing is
+        never blocked by a slow completion (e.g. Jedi inferring a large
+        module). Completions are displayed as they are produced, and a request
+        is abandoned as soon as the input changes.""",
+    ).tag(config=True)
+
     highlight_matching_brackets = Bool(True,
         help="Highlight matching brackets.",
     ).tag(config=True)
@@ -336,16 +348,11 @@ def prompt():
         # Set up keyboard shortcuts
         key_bindings = create_ipython_shortcuts(self)
 
-        # Pre-populate history from IPython's history database
-        history = InMemoryHistory()
-        last_cell = u""
-        for __, ___, cell in self.history_manager.get_tail(self.history_load_length,
-                                                        include_latest=True):
-            # Ignore blank lines and consecutive duplicates
-            cell = cell.rstrip()
-            if cell and (cell != last_cell):
-                history.append_string(cell)
-                last_cell = cell
+        # Stream history from IPython's history database
+        history = IPythonPTHistory(self.history_manager,
+                                   max_entries=self.history_load_length)
+        if ThreadedHistory is not None:
+            history = ThreadedHistory(history)
 
         self._style = self._make_style_from_name_or_cls(self.highlighting_style)
         self.style = DynamicStyle(lambda: self._style)
@@ -466,7 +473,7 @@ def get_message():
             get_message = get_message()
 
         options = {
-                'complete_in_thread': False,
+                'complete_in_thread': self.complete_in_thread,
                 'lexer':IPythonPTLexer(),
                 'reserve_space_for_menu':self.space_for_menu,
                 'message': get_message,
@@ -12,8 +12,11 @@
 
 from IPython.core.completer import (
     provisionalcompleter, cursor_to_position,
-    _deduplicate_completions)
+    _deduplicate_completions, CompletionCancelled)
+from IPython.core.history import HistoryAccessor
+from prompt_toolkit.application.current import get_app
 from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.history import History
 from prompt_toolkit.lexers import Lexer
 from prompt_toolkit.lexers import PygmentsLexer
 from prompt_toolkit.patch_stdout import patch_stdout
@@ -84,7 +87,13 @@ def _adjust_completion_text_based_on_context(text, body, offset):
 
 
 class IPythonPTCompleter(Completer):
-    """Adaptor to provide IPython completions to prompt_toolkit"""
+    """Adaptor to provide IPython completions to prompt_toolkit
+
+    When prompt_toolkit runs it in a background thread (``complete_in_thread``),
+    a request is abandoned between two matchers as soon as the buffer no
+    longer holds the document it was made for, so that the completion of the
+    new input can start right away.
+    """
     def __init__(self, ipy_completer=None, shell=None):
         if shell is None and ipy_completer is None:
             raise TypeError("Please pass shell=an InteractiveShell instance.")
@@ -111,8 +120,13 @@ def get_completions(self, document, complete_event):
             cursor_col = document.cursor_position_col
             cursor_position = document.cursor_position
             offset = cursor_to_position(body, cursor_row, cursor_col)
+            ipyc = self.ipy_completer
             try:
-                yield from self._get_completions(body, offset, cursor_position, self.ipy_completer)
+                yield from self._get_completions(
+                    body, offset, cursor_position, ipyc,
+                    cancel_check=lambda: self._is_stale(document))
+            except CompletionCancelled:
+                pass
             except Exception as e:
                 try:
                     exc_type, exc_value, exc_tb = sys.exc_info()
@@ -121,13 +135,20 @@ def get_completions(self, document, complete_event):
                     print('Unrecoverable Error in completions')
 
     @staticmethod
-    def _get_completions(body, offset, cursor_position, ipyc):
+    def _is_stale(document):
+        """Whether the input changed since completions of ``document`` were
+        requested."""
+        app = get_app()
+        return app.is_running and app.current_buffer.document != document
+
+    @staticmethod
+    def _get_completions(body, offset, cursor_position, ipyc, cancel_check=None):
         """
         Private equivalent of get_completions() use only for unit_testing.
         """
         debug = getattr(ipyc, 'debug', False)
         completions = _deduplicate_completions(
-            body, ipyc.completions(body, offset))
+            body, ipyc.completions(body, offset, cancel_check=cancel_check))
         for c in completions:
             if not c.text:
                 # Guard against completion machinery giving us an empty string.
@@ -161,6 +182,51 @@ def _get_completions(body, offset, cursor_position, ipyc):
             else:
                 yield Completion(adjusted_text, start_position=c.start - offset, display=_elide(display_text,  body[c.start:c.end]), display_meta=c.type)
 
+class IPythonPTHistory(History):
+    """Adaptor streaming IPython's history database to prompt_toolkit.
+
+    Cells are read from the database most recent first, one page at a time,
+    skipping blank cells and consecutive duplicates. Wrap it in
+    ``prompt_toolkit.history.ThreadedHistory`` to load in a background
+    thread, so that the first prompt does not wait for the history.
+
+    New cells are written to the database by the shell's HistoryManager, so
+    :meth:`store_string` does nothing.
+    """
+    def __init__(self, history_manager, max_entries=None, page_size=1000):
+        super().__init__()
+        self.history_manager = history_manager
+        self.max_entries = max_entries
+        self.page_size = page_size
+
+    def load_history_strings(self):
+        hm = self.history_manager
+        if not hm.enabled or hm.hist_file == ':memory:' or self.max_entries == 0:
+            return
+        # This may run in a loading thread, and SQLite connections can't be
+        # shared between threads, so read through an accessor of our own.
+        accessor = HistoryAccessor(hist_file=hm.hist_file,
+                                   connection_options=hm.connection_options,
+                                   fts_index=False)
+        try:
+            last_cell = None
+            n = 0
+            for __, ___, cell in accessor.iter_tail(page_size=self.page_size):
+                cell = cell.rstrip()
+                if not cell or cell == last_cell:
+                    continue
+                yield cell
+                last_cell = cell
+                n += 1
+                if self.max_entries is not None and n >= self.max_entries:
+                    break
+        finally:
+            accessor.db.close()
+
+    def store_string(self, string):
+        pass
+
+
 class IPythonPTLexer(Lexer):
     """
     Wrapper around PythonLexer and BashLexer.
@@ -6,12 +6,20 @@
 import sys
 import unittest
 import os
+from pathlib import Path
 
 from IPython.core.inputtransformer import InputTransformer
 from IPython.testing import tools as tt
 from IPython.utils.capture import capture_output
 
-from IPython.terminal.ptutils import _elide, _adjust_completion_text_based_on_context
+from IPython.core.history import HistoryManager
+from IPython.terminal.ptutils import (
+    IPythonPTCompleter,
+    IPythonPTHistory,
+    _elide,
+    _adjust_completion_text_based_on_context,
+)
+from IPython.utils.tempdir import TemporaryDirectory
 import nose.tools as nt
 
 class TestElide(unittest.TestCase):
@@ -56,6 +64,46 @@ def test_adjust_completion_text_based_on_context(self):
         nt.assert_equal(_adjust_completion_text_based_on_context('%magic', 'func1(a=)', 7), '%magic')
         nt.assert_equal(_adjust_completion_text_based_on_context('func2', 'func1(a=)', 7), 'func2')
 
+
+class TestPTCompleter(unittest.TestCase):
+
+    def test_stale_request_is_dropped(self):
+        from prompt_toolkit.document import Document
+        ip = get_ipython()
+        ptc = IPythonPTCompleter(shell=ip)
+        document = Document("pri")
+        nt.assert_in("print", [c.text for c in ptc.get_completions(document, None)])
+
+        ptc._is_stale = lambda document: True
+        with capture_output() as captured:
+            nt.assert_equal(list(ptc.get_completions(document, None)), [])
+        nt.assert_equal(captured.stdout, "")
+
+
+class TestPTHistory(unittest.TestCase):
+
+    def test_load_history_strings(self):
+        ip = get_ipython()
+        with TemporaryDirectory() as tmpdir:
+            hm = HistoryManager(shell=ip, hist_file=Path(tmpdir) / "history.sqlite")
+            try:
+                cells = ["a = 1", "b = 2", "b = 2", "   ", "c = 3\n"]
+                for i, cell in enumerate(cells, start=1):
+                    hm.store_inputs(i, cell)
+                hm.reset()
+                hm.store_inputs(1, "d = 4")
+                hm.writeout_cache()
+
+                history = IPythonPTHistory(hm, page_size=2)
+                nt.assert_equal(list(history.load_history_strings()),
+                                ["d = 4", "c = 3", "b = 2", "a = 1"])
+                history = IPythonPTHistory(hm, max_entries=2, page_size=2)
+                nt.assert_equal(list(history.load_history_strings()),
+                                ["d = 4", "c = 3"])
+            finally:
+                hm.save_thread.stop()
+                hm.db.close()
+
 # Decorator for interaction loop tests -----------------------------------------
 
 class mock_input_helper(object):
@@ -0,0 +1,233 @@
+"""Watch files for changes.
+
+A watcher is told which files to watch with :meth:`~PollingWatcher.watch`, and
+returns the paths of those which changed since the last call from
+:meth:`~PollingWatcher.changes`::
+
+    watcher = file_watcher()
+    watcher.watch('/path/to/module.py')
+    ...
+    for path in watcher.changes():
+        print(path, 'changed')
+
+On Linux, :class:`InotifyWatcher` has the kernel queue the changes, which costs
+nothing until they are read. Elsewhere, :class:`PollingWatcher` checks the
+modification times of the files when asked for the changes.
+"""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import threading
+import time
+
+__all__ = ['file_watcher', 'InotifyWatcher', 'PollingWatcher']
+
+
+class PollingWatcher(object):
+    """Watch files by checking their modification times.
+
+    By default, the files are checked by :meth:`changes`, so that no change
+    is reported late, at the cost of a ``stat`` per watched file on every
+    call.
+
+    With an `interval`, a daemon thread checks them every `interval` seconds
+    instead, so that :meth:`changes` does not hold up the caller; it only
+    checks the files itself if the last check is older than `interval`.
+    Changes can then be reported up to `interval` seconds late, and the files
+    are checked even when nobody asks for changes.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        # path -> last modification time seen, None until the first check
+        self._mtimes = {}
+        self._changed = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        # time.monotonic() at the start of the last check
+        self._last_poll = None
+
+    def watch(self, path):
+        """Report changes to `path` from now on"""
+        with self._lock:
+            self._mtimes.setdefault(path, None)
+        if self.interval is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='PollingWatcher', daemon=True)
+            self._thread.start()
+
+    def changes(self):
+        """Return the set of watched paths changed since the last call"""
+        last_poll = self._last_poll
+        if (self.interval is None or last_poll is None
+                or time.monotonic() - last_poll > self.interval):
+            self.poll()
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def close(self):
+        """Stop watching"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self):
+        """Check all the watched files now"""
+        self._last_poll = time.monotonic()
+        with self._lock:
+            paths = list(self._mtimes)
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = -1
+        with self._lock:
+            # Compare with the latest times, which another poll may have set
+            for path, mtime in mtimes.items():
+                previous = self._mtimes[path]
+                if mtime != previous:
+                    self._mtimes[path] = mtime
+                    if previous is not None:
+                        self._changed.add(path)
+
+    def _run(self):
+        while True:
+            self.poll()
+            if self._stopped.wait(self.interval):
+                break
+
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+_event_header = struct.Struct('iIII')
+
+
+class InotifyWatcher(object):
+    """Watch files with the Linux inotify API.
+
+    The directories holding the files are watched, rather than the files
+    themselves, so that files replaced by editors which write a new file and
+    rename it are still followed. The kernel queues the events until
+    :meth:`changes` reads them, so no thread is needed.
+
+    Raises OSError if inotify is not available.
+    """
+
+    def __init__(self):
+        self._fd = -1
+        # watch descriptor -> directory, and directory -> names watched in it
+        self._dirs = {}
+        self._names = {}
+        # Files which could not be watched, reported as changed every time
+        self._unwatched = set()
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+
+    def watch(self, path):
+        """Report changes to `path` from now on"""
+        directory, name = os.path.split(os.path.abspath(path))
+        names = self._names.get(directory)
+        if names is None:
+            mask = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO |
+                    IN_CREATE | IN_ONLYDIR)
+            wd = self._add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                    # Gone, there is nothing to watch
+                    return
+                # Typically out of watches (ENOSPC): fall back to checking
+                # the file every time.
+                self._unwatched.add(path)
+                return
+            names = self._names[directory] = {}
+            self._dirs[wd] = directory
+        names.setdefault(name, set()).add(path)
+
+    def changes(self):
+        """Return the set of watched paths changed since the last call"""
+        changed = set(self._unwatched)
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _event_header.unpack_from(data, offset)
+                offset += _event_header.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost: anything may have changed
+                    for names in self._names.values():
+                        for paths in names.values():
+                            changed.update(paths)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                names = self._names[directory]
+                if mask & IN_IGNORED:
+                    # The directory went away: nothing more will come from it
+                    del self._dirs[wd], self._names[directory]
+                    for paths in names.values():
+                        changed.update(paths)
+                        self._unwatched.update(paths)
+                    continue
+                changed.update(names.get(os.fsdecode(name), ()))
+        return changed
+
+    def close(self):
+        """Stop watching"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._dirs.clear()
+        self._names.clear()
+
+    def __del__(self):
+        self.close()
+
+
+def file_watcher(interval=None):
+    """Return the best watcher for this platform.
+
+    An :class:`InotifyWatcher` if possible, otherwise a :class:`PollingWatcher`
+    checking the files when asked for changes, or every `interval` seconds.
+    """
+    try:
+        return InotifyWatcher()
+    except OSError:
+        return PollingWatcher(interval)
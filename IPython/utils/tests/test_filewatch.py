@@ -0,0 +1,74 @@
+"""Tests for IPython.utils.filewatch"""
+
+# Copyright (c) IPython Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+import os
+import time
+
+import nose.tools as nt
+
+from IPython.testing.decorators import skip_if_not_linux
+from IPython.utils.filewatch import InotifyWatcher, PollingWatcher
+from IPython.utils.tempdir import TemporaryDirectory
+
+
+def wait_for_changes(watcher, timeout=5):
+    """Wait until the watcher reports some changes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        changes = watcher.changes()
+        if changes:
+            return changes
+        time.sleep(0.01)
+    return set()
+
+
+def check_watcher(watcher):
+    with TemporaryDirectory() as td:
+        a, b = os.path.join(td, 'a.py'), os.path.join(td, 'b.py')
+        for path in (a, b):
+            with open(path, 'w') as f:
+                f.write('x = 1\n')
+        watcher.watch(a)
+        watcher.watch(b)
+        if isinstance(watcher, PollingWatcher):
+            watcher.poll()
+        nt.assert_equal(watcher.changes(), set())
+
+        # A single change, which a polling thread can not see half done
+        os.utime(a, (1, 1))
+        nt.assert_equal(wait_for_changes(watcher), {a})
+        nt.assert_equal(watcher.changes(), set())
+
+        # Files replaced by a rename, as many editors do
+        tmp = os.path.join(td, 'b.tmp')
+        with open(tmp, 'w') as f:
+            f.write('x = 3\n')
+        os.utime(tmp, (2, 2))
+        os.replace(tmp, b)
+        nt.assert_equal(wait_for_changes(watcher), {b})
+        watcher.close()
+
+
+def test_polling_watcher():
+    check_watcher(PollingWatcher())
+    check_watcher(PollingWatcher(interval=0.01))
+
+
+def test_polling_watcher_not_late():
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, 'a.py')
+        with open(path, 'w') as f:
+            f.write('x = 1\n')
+        watcher = PollingWatcher()
+        watcher.watch(path)
+        nt.assert_equal(watcher.changes(), set())
+        os.utime(path, (1, 1))
+        # Checked on demand, so reported right away
+        nt.assert_equal(watcher.changes(), {path})
+
+
+@skip_if_not_linux
+def test_inotify_watcher():
+    check_watcher(InotifyWatcher())
@@ -14,6 +14,8 @@
 # Imports
 #-----------------------------------------------------------------------------
 
+from contextlib import contextmanager
+import sys
 import time
 
 #-----------------------------------------------------------------------------
@@ -114,3 +116,35 @@ def timing(func,*args,**kw):
 
     return timings_out(1,func,*args,**kw)[0]
 
+
+_allocated_blocks = getattr(sys, 'getallocatedblocks', lambda: 0)
+
+
+@contextmanager
+def record_span(spans, name, blocks=False):
+    """record_span(spans, name, blocks=False) -> context manager
+
+    Append ``(name, start, wall, cpu, blocks)`` to the list `spans` for the
+    code run in the ``with`` block: its start and wall clock duration from
+    time.perf_counter(), and the CPU time of the process it took from
+    time.process_time(). Does nothing if `spans` is None.
+
+    If `blocks` is true, the last item is the change in the number of memory
+    blocks allocated by the interpreter, otherwise None. Counting the blocks
+    walks every memory pool, so it takes time proportional to the size of
+    the heap."""
+
+    if spans is None:
+        yield
+        return
+    count = _allocated_blocks() if blocks else None
+    cpu = time.process_time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        if count is not None:
+            count = _allocated_blocks() - count
+        spans.append((name, start, wall, cpu, count))